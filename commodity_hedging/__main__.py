@@ -0,0 +1,6 @@
+"""
+Runs the pipeline from the repository root, e.g. python -m commodity_hedging market.
+"""
+from shared.project import run
+
+run(__file__)
@@ -0,0 +1,75 @@
+"""
+Deterministic synthetic inputs for the benchmarks, so no downloads are needed.
+"""
+import numpy as np
+import pandas as pd
+from config.config import START_DATE, END_DATE
+
+def get_tickers(num_tickers):
+    return [f"T{i}" for i in range(num_tickers)]
+
+def generate_prices(num_tickers, num_days = None, seed = 0):
+    """
+    Generates a business-day price panel ending at END_DATE, starting at
+    START_DATE unless num_days is given.
+    """
+    rng = np.random.default_rng(seed)
+
+    if num_days is None:
+        dates = pd.bdate_range(START_DATE, END_DATE)
+    else:
+        dates = pd.bdate_range(end = END_DATE, periods = num_days)
+
+    log_returns = rng.normal(0.0, 0.02, size = (len(dates), num_tickers))
+
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(log_returns, axis = 0)), index = dates, columns = get_tickers(num_tickers))
+
+    # Gaps in trading history, e.g. listings and delistings
+    prices.iloc[:300, ::7] = np.nan
+    prices.iloc[-200:, 3::11] = np.nan
+
+    return prices
+
+def generate_fundamentals(num_firms, seed = 0):
+    """
+    Generates yearly fundamentals shaped like data/input.xlsx: one row per firm
+    and year from END_DATE back to START_DATE, with gaps in the reported values.
+    """
+    rng = np.random.default_rng(seed)
+    years = np.arange(END_DATE.year, START_DATE.year - 1, -1)
+    num_rows = num_firms * len(years)
+
+    firm = np.repeat(np.arange(num_firms), len(years))
+    tickers = np.array(get_tickers(num_firms))
+
+    # Firm size drives all balance sheet items, with yearly noise
+    size = np.exp(rng.normal(9.5, 1.2, num_firms))[firm] * rng.lognormal(0, 0.15, num_rows)
+    total_assets = size
+    total_equity = total_assets * rng.uniform(0.3, 0.6, num_rows)
+
+    df = pd.DataFrame({
+        "Company": np.char.add("Company ", tickers[firm]),
+        "Ticker": tickers[firm],
+        "Year": np.tile(years, num_firms),
+        "Country": (rng.random(num_firms) < 0.17).astype(int)[firm],
+        "Upstream": (rng.random(num_firms) < 0.78).astype(int)[firm],
+        "Downstream": (rng.random(num_firms) < 0.34).astype(int)[firm],
+        "Dividend": (rng.random(num_rows) < 0.8).astype(float),
+        "Market Cap": total_assets * rng.uniform(0.4, 1.6, num_rows),
+        "Total Sales": total_assets * rng.uniform(0.5, 1.2, num_rows),
+        "Net Income": total_assets * rng.normal(0.04, 0.05, num_rows),
+        "Total Equity": total_equity,
+        "Total Debt": (total_assets - total_equity) * rng.uniform(0.3, 0.7, num_rows),
+        "Total Assets": total_assets,
+        "CAPEX": total_assets * rng.uniform(0.03, 0.12, num_rows),
+        "FH": np.clip(rng.normal(0.25, 0.3, num_rows), 0, None),
+        "OH": np.clip(rng.normal(0.18, 0.25, num_rows), 0, None)
+    })
+
+    df = df.round({column: 0 for column in ["Market Cap", "Total Sales", "Net Income", "Total Equity", "Total Debt", "Total Assets", "CAPEX"]})
+
+    # Missing values, about as often as in the collected data
+    for column, share in [("Dividend", 0.12), ("Market Cap", 0.12), ("Net Income", 0.12), ("Total Assets", 0.04), ("FH", 0.04), ("OH", 0.04)]:
+        df.loc[rng.random(num_rows) < share, column] = np.nan
+
+    return df
@@ -0,0 +1,100 @@
+"""
+Parity check and benchmarks of the Excel store.
+
+Compares pd.read_excel with the first (cold) and later (warm) reads of
+ExcelStore on synthetic fundamentals workbooks, and a cold parse of many
+workbooks serially and in a process pool.
+"""
+import glob
+import itertools
+import os
+import pandas as pd
+import pytest
+from shared.excel_store import ExcelStore
+from benchmarks.synthetic import generate_fundamentals
+from shared.benchmark_suite import SCALES
+
+FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Firms in data/input.xlsx
+NUM_FIRMS = 41
+
+# Workbooks of the parallel cold parse, each of PARALLEL_FIRMS firms
+NUM_WORKBOOKS = 8
+PARALLEL_FIRMS = 1000
+
+@pytest.fixture(scope = "module")
+def folder(tmp_path_factory):
+    """Folder of the synthetic workbooks, each written once per module."""
+    return str(tmp_path_factory.mktemp("workbooks"))
+
+def write_workbook(folder, num_firms, name = None):
+    path = os.path.join(folder, name or f"fundamentals_{num_firms}.xlsx")
+
+    if not os.path.exists(path):
+        generate_fundamentals(num_firms).to_excel(path, index = False)
+
+    return path
+
+def test_parity(tmp_path):
+    store = ExcelStore(str(tmp_path / "store"))
+    paths = [os.path.join(FOLDER, "data/input.xlsx")] + sorted(glob.glob(os.path.join(FOLDER, "../valuation/*.xlsx")))
+
+    for path in paths:
+        expected = pd.read_excel(path, sheet_name = None)
+
+        # Once parsing into the store and once from the store
+        for sheets in [store.read(path, None), store.read(path, None)]:
+            assert list(sheets) == list(expected)
+
+            for name, df in expected.items():
+                pd.testing.assert_frame_equal(sheets[name], df)
+
+def test_removed_sheets(tmp_path):
+    """A workbook saved again with fewer sheets keeps only the files of its current sheets."""
+    store = ExcelStore(str(tmp_path / "store"))
+    path = str(tmp_path / "rewritten.xlsx")
+
+    with pd.ExcelWriter(path) as writer:
+        for name in ["A", "B", "C"]:
+            generate_fundamentals(10).to_excel(writer, sheet_name = name, index = False)
+
+    store.read(path, None)
+    generate_fundamentals(20).to_excel(path, sheet_name = "A", index = False)
+
+    assert list(store.read(path, None)) == ["A"]
+    assert sorted(os.listdir(store.get_folder(path))) == ["0.feather", "manifest.json"]
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_read_excel(benchmark, folder, scale):
+    path = write_workbook(folder, NUM_FIRMS * scale)
+    benchmark.group = f"read {scale}x"
+
+    benchmark.pedantic(pd.read_excel, args = (path,), rounds = 3)
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_cold_read(benchmark, folder, scale, tmp_path):
+    path = write_workbook(folder, NUM_FIRMS * scale)
+    benchmark.group = f"read {scale}x"
+
+    # Every round parses into an empty store
+    stores = (ExcelStore(str(tmp_path / f"store_{i}")) for i in itertools.count())
+    benchmark.pedantic(lambda store: store.read(path), setup = lambda: ((next(stores),), {}), rounds = 3)
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_warm_read(benchmark, folder, scale, tmp_path):
+    path = write_workbook(folder, NUM_FIRMS * scale)
+    benchmark.group = f"read {scale}x"
+
+    store_folder = str(tmp_path / "store")
+    expected = ExcelStore(store_folder).read(path)
+
+    assert len(benchmark(lambda: ExcelStore(store_folder).read(path))) == len(expected)
+
+@pytest.mark.parametrize("mode", ["serial", "pool"])
+def test_read_many(benchmark, folder, mode, tmp_path):
+    paths = [write_workbook(folder, PARALLEL_FIRMS, f"parallel_{i}.xlsx") for i in range(NUM_WORKBOOKS)]
+    processes = min(NUM_WORKBOOKS, os.cpu_count()) if mode == "pool" else None
+    benchmark.group = f"read_many {NUM_WORKBOOKS} workbooks"
+
+    benchmark.pedantic(lambda: ExcelStore(str(tmp_path / "store")).read_many(paths, processes = processes), rounds = 1)
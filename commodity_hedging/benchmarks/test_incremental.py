@@ -0,0 +1,83 @@
+"""
+Parity check and benchmarks of the incremental month-append mode.
+
+A previous run ends one month before END_DATE; the monthly refresh to
+END_DATE through ReturnStore is compared with recomputing the full history
+with DataIngestion.get_returns. Prices are served from memory, so only the
+computation and the store are timed.
+"""
+import itertools
+import shutil
+from unittest import mock
+import pandas as pd
+import pytest
+from dateutil.relativedelta import relativedelta
+from config.config import START_DATE, END_DATE
+from data_ingestion.data_ingestion import DataIngestion
+from data_ingestion.return_store import ReturnStore
+from benchmarks.synthetic import generate_prices
+from shared.benchmark_suite import SCALES
+
+# Firms in data/input.xlsx
+NUM_FIRMS = 41
+
+# End dates of earlier runs in the parity check, each refreshed to END_DATE
+PREVIOUS_END_DATES = [END_DATE - relativedelta(months = 1), END_DATE - relativedelta(days = 10), END_DATE - relativedelta(years = 3)]
+
+def get_download(prices):
+    return lambda start_date, end_date: prices.loc[(prices.index >= pd.Timestamp(start_date)) & (prices.index < pd.Timestamp(end_date))]
+
+def full_returns(prices, end_date = END_DATE):
+    return DataIngestion.get_returns(get_download(prices)(START_DATE, end_date), 100, START_DATE, end_date)
+
+@pytest.mark.parametrize("previous_end_date", PREVIOUS_END_DATES)
+def test_parity(tmp_path, previous_end_date):
+    prices = generate_prices(40)
+    download = get_download(prices)
+    store = ReturnStore(str(tmp_path))
+
+    # The earlier run, then the refresh
+    pd.testing.assert_frame_equal(store.get_returns("companies", download, list(prices.columns), previous_end_date), full_returns(prices, previous_end_date))
+    pd.testing.assert_frame_equal(store.get_returns("companies", download, list(prices.columns), END_DATE), full_returns(prices), rtol = 1e-10)
+
+def test_interrupted_refresh(tmp_path):
+    """A refresh interrupted before its state is replaced leaves the previous run's state."""
+    prices = generate_prices(40)
+    download = get_download(prices)
+
+    store = ReturnStore(str(tmp_path))
+    store.get_returns("companies", download, list(prices.columns), PREVIOUS_END_DATES[0])
+
+    with mock.patch("data_ingestion.return_store.os.replace", side_effect = KeyboardInterrupt):
+        with pytest.raises(KeyboardInterrupt):
+            store.get_returns("companies", download, list(prices.columns), END_DATE)
+
+    assert store.read("companies")["end_date"] == PREVIOUS_END_DATES[0].isoformat()
+    pd.testing.assert_frame_equal(store.get_returns("companies", download, list(prices.columns), END_DATE), full_returns(prices), rtol = 1e-10)
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_full_returns(benchmark, scale):
+    prices = generate_prices(NUM_FIRMS * scale)
+    benchmark.group = f"monthly refresh {scale}x"
+
+    benchmark.pedantic(full_returns, args = (prices,), rounds = 3)
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_incremental_returns(benchmark, scale, tmp_path):
+    prices = generate_prices(NUM_FIRMS * scale)
+    download = get_download(prices)
+    benchmark.group = f"monthly refresh {scale}x"
+
+    primed = tmp_path / "primed"
+    ReturnStore(str(primed)).get_returns("companies", download, list(prices.columns), PREVIOUS_END_DATES[0])
+
+    # Every round starts from a copy of the state of the previous month's run
+    folders = (tmp_path / f"store_{i}" for i in itertools.count())
+
+    def setup():
+        folder = next(folders)
+        shutil.copytree(primed, folder)
+
+        return (ReturnStore(str(folder)),), {}
+
+    benchmark.pedantic(lambda store: store.get_returns("companies", download, list(prices.columns), END_DATE), setup = setup, rounds = 3)
@@ -0,0 +1,98 @@
+"""
+Parity check and benchmarks of the Market Model panel build against the loop it replaced.
+"""
+import os
+import pandas as pd
+import pytest
+from data_ingestion.data_ingestion import DataIngestion
+from panel.panel import Panel
+from shared.benchmark_suite import SCALES
+
+FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The loop takes seconds on the real universe and grows with its square, so it is only timed at 1x
+LEGACY_SCALES = [1]
+
+def legacy_build_market_panel(df, comp, sub, tickers):
+    """Ticker x month loop previously used in main.py."""
+    data_list = []
+
+    for t in tickers:
+        dates = DataIngestion.get_index()
+
+        for i in dates:
+            fh_value, oh_value = float("nan"), float("nan")
+
+            if i.year != 2012:
+                filtered_data = df.loc[(df["Year"] == i.year - 1) & (df["Ticker"] == t), ["FH", "OH"]]
+
+                if not filtered_data.empty:
+                    fh_value = filtered_data["FH"].values[0]
+                    oh_value = filtered_data["OH"].values[0]
+
+            data_list.append((t, i, fh_value, oh_value))
+
+    df_risk = pd.DataFrame(data_list, columns=["Ticker", "Date", "FH", "OH"])
+
+    comp_stdev = []
+    market_stdev = []
+    oil_stdev = []
+
+    for t in tickers:
+        comp_stdev += comp[t].to_list()
+        market_stdev += sub["Market"].to_list()
+        oil_stdev += sub["Oil"].to_list()
+
+    df_risk["StDev"] = comp_stdev
+    df_risk["Market_StDev"] = market_stdev
+    df_risk["Oil_StDev"] = oil_stdev
+
+    return df_risk
+
+def load_inputs(multiplier = 1):
+    """Rebuilds the pipeline inputs from data/input.xlsx and regression/output_market.xlsx."""
+    df = pd.read_excel(os.path.join(FOLDER, "data/input.xlsx"))
+    market = pd.read_excel(os.path.join(FOLDER, "regression/output_market.xlsx"))
+
+    tickers = df.drop_duplicates(subset=["Ticker"])["Ticker"].to_list()
+    dates = DataIngestion.get_index()
+
+    comp = market.pivot(index = "Date", columns = "Ticker", values = "StDev").iloc[::-1]
+    comp.index = dates
+
+    sub = market.loc[market["Ticker"] == tickers[0], ["Market_StDev", "Oil_StDev"]]
+    sub.columns = ["Market", "Oil"]
+    sub.index = dates
+
+    # Replicate the universe to emulate a larger number of firms
+    if multiplier > 1:
+        df = pd.concat([df.assign(Ticker = df["Ticker"] + f"_{k}") for k in range(multiplier)], ignore_index = True)
+        comp = pd.concat([comp.add_suffix(f"_{k}") for k in range(multiplier)], axis = 1)
+        tickers = [f"{t}_{k}" for k in range(multiplier) for t in tickers]
+
+    return df, comp, sub, tickers, market
+
+def test_parity():
+    df, comp, sub, tickers, market = load_inputs()
+
+    result = Panel.build_market_panel(df, comp, sub, tickers)
+    expected = legacy_build_market_panel(df, comp, sub, tickers)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+    result["Date"] = pd.to_datetime(result["Date"]).astype(market["Date"].dtype)
+    pd.testing.assert_frame_equal(result, market, check_dtype = False)
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_build_market_panel(benchmark, scale):
+    df, comp, sub, tickers, _ = load_inputs(scale)
+    benchmark.group = f"build_market_panel {scale}x"
+
+    benchmark(Panel.build_market_panel, df, comp, sub, tickers)
+
+@pytest.mark.parametrize("scale", LEGACY_SCALES)
+def test_legacy_build_market_panel(benchmark, scale):
+    df, comp, sub, tickers, _ = load_inputs(scale)
+    benchmark.group = f"build_market_panel {scale}x"
+
+    benchmark.pedantic(legacy_build_market_panel, args = (df, comp, sub, tickers), rounds = 1)
@@ -0,0 +1,118 @@
+"""
+Parity check and benchmarks of the clustered panel regressions.
+
+The reference fits every specification from its own rows, as Stata does for
+each 'reg ..., cluster(number)' line. PanelRegression fits all of them from
+the per-cluster moments of one design matrix.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from config.config import MARKET_MODELS
+from regression.panel_regression import PanelRegression
+from benchmarks.synthetic import get_tickers
+from shared.benchmark_suite import SCALES
+
+NUM_FIRMS = 40
+NUM_MONTHS = 144
+
+def generate_grid(num_specifications, seed = 0):
+    """A stacked Market Model panel: one block of firms and months per specification."""
+    rng = np.random.default_rng(seed)
+    tickers = get_tickers(NUM_FIRMS)
+    num_rows = NUM_FIRMS * NUM_MONTHS
+
+    frames = []
+
+    for i in range(num_specifications):
+        frame = pd.DataFrame({
+            "Specification": f"S{i}",
+            "Ticker": np.repeat(tickers, NUM_MONTHS),
+            "FH": np.repeat(rng.exponential(0.2, NUM_FIRMS), NUM_MONTHS) * (rng.random(num_rows) > 0.3),
+            "OH": np.repeat(rng.exponential(0.2, NUM_FIRMS), NUM_MONTHS) * (rng.random(num_rows) > 0.3),
+            "Market_StDev": np.tile(rng.gamma(4, 0.01, NUM_MONTHS), NUM_FIRMS),
+            "Oil_StDev": np.tile(rng.gamma(4, 0.02, NUM_MONTHS), NUM_FIRMS)
+        })
+        frame["StDev"] = 0.02 + 0.5 * frame["Market_StDev"] + 0.3 * frame["Oil_StDev"] + rng.normal(0, 0.01, num_rows)
+        frame.loc[rng.random(num_rows) < 0.05, "StDev"] = np.nan
+        frames.append(frame)
+
+    return pd.concat(frames, ignore_index = True)
+
+def get_categories():
+    tickers = get_tickers(NUM_FIRMS)
+    return {name: tickers[i::4] for i, name in enumerate(["Small", "Mid-Small", "Mid-Large", "Large"])}
+
+def get_samples(sample):
+    categories = list(get_categories())
+    specifications = sample["Specification"].unique()
+
+    return [{"Specification": x} for x in specifications] + [{"Specification": x, "Category": y} for x in specifications for y in categories]
+
+def reference_fit(sample, dependent, regressors, mask):
+    """OLS with Stata's clustered errors from the rows of one subsample."""
+    rows = sample[mask]
+
+    X = np.column_stack([np.ones(len(rows))] + [np.prod([rows[x].to_numpy() for x in term.split("#")], axis = 0) for term in regressors])
+    y = rows[dependent].to_numpy()
+
+    bread = np.linalg.inv(X.T @ X)
+    params = bread @ X.T @ y
+
+    codes, clusters = pd.factorize(rows["number"])
+    scores = np.zeros((len(clusters), X.shape[1]))
+    np.add.at(scores, codes, X * (y - X @ params)[:, None])
+
+    G, N, K = len(clusters), len(y), X.shape[1]
+    cov = bread @ scores.T @ scores @ bread * G / (G - 1) * (N - 1) / (N - K)
+
+    return params, np.sqrt(np.diag(cov))
+
+def reference_fit_all(sample, specs):
+    results = []
+
+    for spec in specs:
+        mask = np.ones(len(sample), dtype = bool)
+
+        for column, value in spec.sample:
+            mask &= (sample[column] == value).to_numpy()
+
+        results.append(reference_fit(sample, "StDev", spec.regressors, mask))
+
+    return results
+
+def fit_all(sample, specs):
+    regressors = [x for regressors in MARKET_MODELS.values() for x in regressors]
+    model = PanelRegression(sample, "StDev", regressors, cluster = ["Specification", "number"], groups = ["Specification", "Category"])
+
+    return model.fit_all(specs)
+
+def prepare(grid):
+    return PanelRegression.prepare(grid, ["StDev", "Market_StDev", "Oil_StDev", "FH", "OH"], ["OH", "FH"], by = "Specification", categories = get_categories())
+
+def get_inputs(num_specifications):
+    """The stacked panel of the volatility specifications and the specs fitted on it."""
+    sample = prepare(generate_grid(num_specifications))
+    return sample, PanelRegression.get_specs(MARKET_MODELS, get_samples(sample))
+
+def test_parity():
+    sample, specs = get_inputs(3)
+
+    for result, (params, bse) in zip(fit_all(sample, specs), reference_fit_all(sample, specs)):
+        np.testing.assert_allclose(result.params, params, rtol = 1e-9)
+        np.testing.assert_allclose(result.bse, bse, rtol = 1e-9)
+
+# The scale is the number of volatility specifications stacked in one panel, as in the volatility stage
+@pytest.mark.parametrize("scale", SCALES)
+def test_fit_all(benchmark, scale):
+    sample, specs = get_inputs(scale)
+    benchmark.group = f"fit_all {scale}x"
+
+    assert len(benchmark(fit_all, sample, specs)) == len(specs)
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_reference_fit_all(benchmark, scale):
+    sample, specs = get_inputs(scale)
+    benchmark.group = f"fit_all {scale}x"
+
+    benchmark.pedantic(reference_fit_all, args = (sample, specs), rounds = 1)
@@ -0,0 +1,40 @@
+"""
+Measures the import time of each CLI stage with python -X importtime.
+
+A stage imports what the functions it runs import in main.py; those import
+statements are read from main.py and run in a fresh interpreter, so no data
+is downloaded. The legacy case imports what main.py loaded up front before
+the stages were split. The benchmark times the whole interpreter run; the
+import time and the slowest imports are kept in its extra info.
+"""
+import os
+import pytest
+from shared.benchmark_startup import get_stage_imports, measure
+
+FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Functions of main.py run by each stage
+STAGE_FUNCTIONS = {
+    "cli": [],
+    "market": ["run", "load_input", "market"],
+    "tobin": ["run", "load_input", "tobin"],
+    "regress": ["run", "load_input", "market", "tobin", "regress"],
+    "study": ["run", "study"],
+    "volatility": ["run", "load_input", "volatility"],
+    "all": ["run", "load_input", "market", "tobin", "regress"]
+}
+
+LEGACY_IMPORTS = """
+import numpy, pandas, yfinance
+from config.config import MARKET_INDEX, OIL_INDEX
+from data_ingestion.data_ingestion import DataIngestion
+from panel.panel import Panel
+"""
+
+@pytest.mark.parametrize("stage", ["legacy", *STAGE_FUNCTIONS])
+def test_startup(benchmark, stage):
+    code = LEGACY_IMPORTS if stage == "legacy" else get_stage_imports(STAGE_FUNCTIONS[stage], os.path.join(FOLDER, "main.py"))
+    benchmark.group = "startup"
+
+    total, slowest = benchmark.pedantic(measure, args = (code, FOLDER), rounds = 5)
+    benchmark.extra_info.update({"import_ms": total, "slowest_imports_ms": slowest})
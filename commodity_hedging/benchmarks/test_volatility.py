@@ -0,0 +1,81 @@
+"""
+Parity check and benchmarks of the monthly volatility engine against the per-month loop it replaced.
+"""
+import datetime as dt
+import statistics
+import numpy as np
+import pandas as pd
+import pytest
+from dateutil.relativedelta import relativedelta
+from config.config import START_DATE, END_DATE
+from data_ingestion.data_ingestion import DataIngestion
+from benchmarks.synthetic import generate_prices
+from shared.benchmark_suite import SCALES
+
+# Firms in data/input.xlsx
+NUM_FIRMS = 41
+
+# The per-month loop takes seconds per 41 tickers, so it is not timed at 100x
+LEGACY_SCALES = [1, 10]
+
+def legacy_annual_stdev(data: pd.Series):
+    """Per-month loop previously used by DataIngestion.calculate_annual_stdev."""
+    stdev_values = []
+
+    month_start = dt.date(END_DATE.year, 12, 1)
+
+    while month_start >= START_DATE:
+        month_end = month_start + relativedelta(months=1) - relativedelta(days=1)
+
+        n_d = data.loc[pd.Timestamp(month_start):pd.Timestamp(month_end)].dropna()
+
+        stdev_values.append(statistics.stdev(n_d) if len(n_d) >= 15 else float("nan"))
+
+        month_start -= relativedelta(months=1)
+
+    return np.array(stdev_values)
+
+def legacy_get_returns(data: pd.DataFrame):
+    data_log = np.log(data/data.shift(1))
+    data_sum = data_log.rolling(window = 100, min_periods = 100).sum()
+
+    st_dev = pd.DataFrame()
+    st_dev.index = DataIngestion.get_index()
+
+    for t in data.columns:
+        st_dev[t] = legacy_annual_stdev(data_sum[t])
+
+    return st_dev
+
+# The loop inserts one column per ticker, as it did
+@pytest.mark.filterwarnings("ignore::pandas.errors.PerformanceWarning")
+def test_parity():
+    prices = generate_prices(25)
+
+    expected = legacy_get_returns(prices)
+    result = DataIngestion.get_returns(prices)
+
+    assert list(result.index) == list(expected.index)
+    assert list(result.columns) == list(expected.columns)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol = 1e-9, equal_nan = True)
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_get_returns(benchmark, scale):
+    prices = generate_prices(NUM_FIRMS * scale)
+    benchmark.group = f"get_returns {scale}x"
+
+    assert benchmark(DataIngestion.get_returns, prices).shape[1] == NUM_FIRMS * scale
+
+@pytest.mark.filterwarnings("ignore::pandas.errors.PerformanceWarning")
+@pytest.mark.parametrize("scale", LEGACY_SCALES)
+def test_legacy_get_returns(benchmark, scale):
+    prices = generate_prices(NUM_FIRMS * scale)
+    benchmark.group = f"get_returns {scale}x"
+
+    benchmark.pedantic(legacy_get_returns, args = (prices,), rounds = 1)
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_calculate_annual_stdev(benchmark, scale):
+    series = generate_prices(scale)
+
+    benchmark(lambda: [DataIngestion.calculate_annual_stdev(series[t]) for t in series.columns])
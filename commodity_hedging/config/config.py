@@ -8,4 +8,47 @@ END_DATE = dt.date(2023,12,31)
 MARKET_INDEX = "^GSPC"
 
 #Crude Oil Futures
-OIL_INDEX = "CL=F"
\ No newline at end of file
+OIL_INDEX = "CL=F"
+# Further studies run together by the "study" stage, each written to output/<name>.
+# Keys not given are taken from the settings above; window is the number of
+# trading days summed before the monthly standard deviation.
+STUDIES = [
+    {"name": "brent", "oil_index": "BZ=F"},
+    {"name": "natural_gas", "oil_index": "NG=F"},
+    {"name": "europe_brent", "market_index": "^STOXX", "oil_index": "BZ=F"},
+    {"name": "window_50", "window": 50}
+]
+
+# Volatility grid of the "volatility" stage: estimators ("rolling", "ewma",
+# "parkinson", "garman_klass"), rolling windows in trading days, minimum
+# observations per month and EWMA decay
+VOLATILITY_ESTIMATORS = ["rolling", "ewma", "parkinson", "garman_klass"]
+VOLATILITY_WINDOWS = [50, 100, 150, 200]
+VOLATILITY_MIN_OBS = [10, 15, 20]
+EWMA_DECAY = 0.94
+
+# Size categories of the regressions, smallest to largest (cat 1 to 4 of
+# do_market.do and do_tobin.do); firms in none of them are left out
+SIZE_CATEGORIES = {
+    "Small": ["NOG", "TALO", "PARR", "BTE", "CRC", "CVI", "KOS", "VET", "MTDR", "RRC"],
+    "Mid-Small": ["CHRD", "VRN", "PDCE.OQ", "DK", "MUR", "PBF", "AR", "APA", "OVV", "CHK.O"],
+    "Mid-Large": ["DINO", "MRO", "CTRA", "HES", "DVN", "FANG", "IMO", "PXD", "EOG", "CVE"],
+    "Large": ["WMB", "CNQ", "VLO", "SU", "OXY", "PSX", "MPC", "COP", "CVX", "XOM"]
+}
+
+# Models of the "regress" stage, fitted on the full sample and every size
+# category with standard errors clustered by firm. "a#b" is the product of
+# two variables and "i.Year" a dummy for every year but the first.
+MARKET_MODELS = {
+    "Basic": ["Market_StDev", "Oil_StDev"],
+    "Oil_Interaction": ["Market_StDev", "Oil_StDev", "Oil_StDev#FH", "Oil_StDev#OH"],
+    "Dummy": ["Market_StDev", "Oil_StDev", "Oil_StDev#FH_Dummy", "Oil_StDev#OH_Dummy"]
+}
+
+# Tobin's Q models also have firm fixed effects
+TOBIN_MODELS = {
+    "Multivariate": ["FH", "OH", "Size", "Leverage", "ROA", "Growth", "Dividend", "i.Year"],
+    "Dummy": ["FH_Dummy", "OH_Dummy", "Size", "Leverage", "ROA", "Growth", "Dividend", "i.Year"],
+    "Interaction": ["FH", "OH", "FH#OH", "Size", "Leverage", "ROA", "Growth", "Dividend", "i.Year"],
+    "Leverage_Interaction": ["FH", "OH", "FH#Leverage", "OH#Leverage", "Size", "Leverage", "ROA", "Growth", "Dividend", "i.Year"]
+}
@@ -1,63 +1,90 @@
 import datetime as dt
 import numpy as np
 import pandas as pd
-import statistics
-import yfinance as yf
 from dateutil.relativedelta import relativedelta
 from config.config import START_DATE, END_DATE
+from shared.excel_store import ExcelStore
+from shared.price_store import PriceStore
+from shared.tracer import Tracer
 
 class DataIngestion:
+    store = PriceStore()
+    excel_store = ExcelStore()
+
+    @staticmethod
+    @Tracer.traced()
+    def read_excel(path: str, sheet_name = 0):
+        """Reads a workbook like pd.read_excel, from the local store once it has been parsed."""
+        return __class__.excel_store.read(path, sheet_name)
+
+    @staticmethod
+    @Tracer.traced()
+    def read_workbooks(paths: list, sheet_name = 0, processes: int = None) -> dict:
+        """Reads many workbooks, by path, parsing those not in the store in parallel."""
+        return __class__.excel_store.read_many(paths, sheet_name, processes)
+
     @staticmethod
-    def download_daily_data(tickers):
+    @Tracer.traced()
+    def download_daily_data(tickers, start_date = START_DATE, end_date = END_DATE):
         """Downloads historical monthly closing price data."""
-        df = yf.download(tickers, start=START_DATE, end=END_DATE, interval='1d', auto_adjust=True)
+        df = __class__.store.get_close(tickers, start_date, end_date, '1d', auto_adjust=True)
 
         #Remove as the price for oil futures was negative
-        df = df.drop(pd.to_datetime("2020-04-20"))
+        df = df.drop(pd.to_datetime("2020-04-20"), errors = "ignore")
+
+        return df
+
+    @staticmethod
+    @Tracer.traced()
+    def download_daily_ohlc(tickers, start_date = START_DATE, end_date = END_DATE) -> dict:
+        """Downloads daily open, high, low and close prices, one frame per field."""
+        prices = {}
 
-        return df['Close']
+        for field in ['Open', 'High', 'Low', 'Close']:
+            df = __class__.store.get_field(tickers, start_date, end_date, '1d', True, field)
+
+            #Remove as the price for oil futures was negative
+            prices[field] = df.drop(pd.to_datetime("2020-04-20"), errors = "ignore")
+
+        return prices
     
     @staticmethod
-    def get_returns(data: pd.DataFrame):
+    def get_returns(data: pd.DataFrame, window = 100, start_date = START_DATE, end_date = END_DATE):
         data_log = np.log(data/data.shift(1))
-        data_sum = data_log.rolling(window = 100, min_periods = 100).sum()
+        data_sum = data_log.rolling(window = window, min_periods = window).sum()
 
-        st_dev = pd.DataFrame()
-        st_dev.index = __class__.get_index()
+        return __class__.calculate_monthly_stdev(data_sum, start_date = start_date, end_date = end_date)
+
+    @staticmethod
+    def calculate_monthly_stdev(data: pd.DataFrame, min_periods = 15, start_date = START_DATE, end_date = END_DATE):
+        """Compute monthly standard deviation for all tickers at once"""
+        months = data.index.to_period("M")
+        grouped = data.groupby(months)
 
-        for t in data.columns:
-            st_dev[t] = __class__.calculate_annual_stdev(data_sum[t])
+        # A month needs at least min_periods observations, otherwise NaN
+        st_dev = grouped.std().where(grouped.count() >= min_periods)
+
+        date_values = __class__.get_index(start_date, end_date)
+        st_dev = st_dev.reindex(pd.PeriodIndex(date_values, freq = "M"))
+        st_dev.index = date_values
 
         return st_dev
 
     @staticmethod
-    def calculate_annual_stdev(data: pd.DataFrame):
+    def calculate_annual_stdev(data: pd.Series):
         """Compute monthly standard deviation"""
-        stdev_values = []
-
-        month_start = dt.date(END_DATE.year, 12, 1)
-        
-        while month_start >= START_DATE:
-            month_end = month_start + relativedelta(months=1) - relativedelta(days=1)
-
-            n_d = data.loc[month_start:month_end].dropna()
-            
-            stdev_values.append(statistics.stdev(n_d) if len(n_d) >= 15 else float("nan"))
-            
-            month_start -= relativedelta(months=1)
-            
-        return np.array(stdev_values)
+        return __class__.calculate_monthly_stdev(data.to_frame()).iloc[:, 0].to_numpy()
     
     @staticmethod
-    def get_index():
+    def get_index(start_date = START_DATE, end_date = END_DATE):
         date_values = []
         
-        temp_date = dt.date(START_DATE.year, 1, 31)
+        temp_date = dt.date(start_date.year, 1, 31)
 
         month_shift = 0
 
-        while END_DATE - relativedelta(months=month_shift) >= temp_date:
-            date_values.append(END_DATE - relativedelta(months=month_shift))
+        while end_date - relativedelta(months=month_shift) >= temp_date:
+            date_values.append(end_date - relativedelta(months=month_shift))
             month_shift += 1
 
         return date_values
\ No newline at end of file
@@ -0,0 +1,102 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from config.config import START_DATE
+from data_ingestion.data_ingestion import DataIngestion
+from volatility.volatility import VolatilityEngine
+
+# Minimum observations per month of DataIngestion.calculate_monthly_stdev
+MIN_PERIODS = 15
+
+class ReturnStore:
+    """
+    Local store of the monthly standard deviations of DataIngestion.get_returns,
+    so a run with a later end date only computes the new months.
+
+    Each named series keeps its settings, end date, monthly values and the
+    last window + 1 daily prices before the month of its end date, in one
+    file replaced at once. The next run downloads prices from the start of
+    that month only, as earlier months and the windows reaching into it are
+    unchanged, and recomputes that month, which may have been incomplete,
+    and every month after it. A change of columns, start
+    date or window, or an earlier end date, recomputes the full history.
+
+    The new months use the rolling sums of VolatilityEngine, from one
+    cumulative sum, which match get_returns to rounding. Values and prices
+    are kept as plain arrays, as the frames are short and wide.
+    """
+    def __init__(self, folder="cache/returns"):
+        self.folder = folder
+
+    def get_returns(self, name: str, download, columns: list, end_date, window=100, start_date=START_DATE) -> pd.DataFrame:
+        """
+        Monthly standard deviations as DataIngestion.get_returns, where
+        download(start_date, end_date) returns the daily prices of the columns in [start_date, end_date).
+        """
+        state = self.read(name)
+        settings = {'columns': list(columns), 'start_date': start_date.isoformat(), 'window': window}
+
+        if state is None or {x: state[x] for x in settings} != settings or state['end_date'] > end_date.isoformat():
+            prices = download(start_date, end_date)
+            monthly = __class__.to_monthly(DataIngestion.get_returns(prices, window, start_date, end_date))
+        else:
+            open_month = pd.Timestamp(state['end_date']).to_period('M')
+            open_start = open_month.start_time.date()
+
+            prices = pd.concat([state['tail'], download(open_start, end_date)])
+
+            stored = state['monthly']
+            stored.index = stored.index.to_period('M')
+
+            new = __class__.to_monthly(VolatilityEngine.rolling_grid(prices, [window], [MIN_PERIODS], open_start, end_date)[(window, MIN_PERIODS)])
+            monthly = pd.concat([stored[stored.index < open_month], new[new.index >= open_month]])
+
+        # Prices the windows of the month of end_date and later start from
+        tail = prices[prices.index < pd.Timestamp(end_date).to_period('M').start_time].iloc[-(window + 1):]
+
+        self.write(name, {**settings, 'end_date': end_date.isoformat()}, tail, monthly.set_axis(monthly.index.to_timestamp()))
+
+        # Rows in the get_index() order, as calculate_monthly_stdev returns them
+        date_values = DataIngestion.get_index(start_date, end_date)
+        st_dev = monthly.reindex(pd.PeriodIndex(date_values, freq="M"))
+        st_dev.index = date_values
+
+        return st_dev
+
+    @staticmethod
+    def to_monthly(st_dev: pd.DataFrame) -> pd.DataFrame:
+        """Values of get_returns indexed by month, oldest first."""
+        return st_dev.set_axis(pd.PeriodIndex(st_dev.index, freq="M")).sort_index()
+
+    def get_path(self, name: str) -> str:
+        return os.path.join(self.folder, f'{name}.npz')
+
+    def read(self, name: str):
+        """The settings, end date, tail prices and monthly values of a series, or None if it is not stored."""
+        path = self.get_path(name)
+
+        if not os.path.exists(path):
+            return None
+
+        with np.load(path) as data:
+            state = json.loads(str(data['state']))
+            frames = {kind: pd.DataFrame(data[f'{kind}_values'], index=pd.DatetimeIndex(data[f'{kind}_index'], name='Date'), columns=state['columns']) for kind in ['tail', 'monthly']}
+
+        return {**state, **frames}
+
+    def write(self, name: str, state: dict, tail: pd.DataFrame, monthly: pd.DataFrame):
+        """Writes the state and both frames to one file, replaced at once, so an interrupted run leaves the previous state."""
+        path = self.get_path(name)
+        os.makedirs(self.folder, exist_ok=True)
+
+        arrays = {'state': np.array(json.dumps(state))}
+
+        for kind, df in [('tail', tail), ('monthly', monthly)]:
+            arrays[f'{kind}_values'] = df.to_numpy(dtype=float)
+            arrays[f'{kind}_index'] = df.index.to_numpy(dtype='datetime64[ns]')
+
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, **arrays)
+
+        os.replace(path + '.tmp', path)
@@ -1,96 +1,226 @@
-import numpy as np
-import pandas as pd
-from config.config import MARKET_INDEX, OIL_INDEX
-from data_ingestion.data_ingestion import DataIngestion
-
-###########
-# Step 1: Import the prepared financial data
-###########
-df = pd.read_excel("data/input.xlsx")
-
-###########
-# Step 2: Find all companies' tickers
-###########
-tickers = df.drop_duplicates(subset=["Ticker"])["Ticker"]
-tickers = tickers.reset_index(drop = True).to_list()
-
-###########
-# Step 3: Prepare data for a Market Model regression
-###########
-data_list = []
-df_risk = pd.DataFrame()
-
-for t in tickers:
-    dates = DataIngestion.get_index()
-
-    for i in dates:
-        # Default financial and operational hedging values
-        fh_value, oh_value = float("nan"), float("nan")
-
-        if i.year != 2012:
-            # Filter the DataFrame efficiently
-            filtered_data = df.loc[(df["Year"] == i.year - 1) & (df["Ticker"] == t), ["FH", "OH"]]
-            
-            if not filtered_data.empty:
-                fh_value = filtered_data["FH"].values[0]
-                oh_value = filtered_data["OH"].values[0]
-
-        data_list.append((t, i, fh_value, oh_value))
-
-df_risk = pd.DataFrame(data_list, columns=["Ticker", "Date", "FH", "OH"])
-
-###########
-# Step 4: Prepare Companies' returns
-###########
-comp_df = DataIngestion.download_daily_data(tickers)
-comp = DataIngestion.get_returns(comp_df)
-
-###########
-# Step 5: Prepare Market and Oil returns
-###########
-sub_df = pd.DataFrame()
-
-sub_df["Market"] = DataIngestion.download_daily_data(MARKET_INDEX)
-sub_df["Oil"] = DataIngestion.download_daily_data(OIL_INDEX)
-
-sub = DataIngestion.get_returns(sub_df)
-
-###########
-# Step 6: Combine all returns
-###########
-comp_stdev = []
-market_stdev = []
-oil_stdev = []
-
-for t in tickers:
-    comp_stdev += comp[t].to_list()
-    market_stdev += sub["Market"].to_list()
-    oil_stdev += sub["Oil"].to_list()
-
-df_risk["StDev"] = comp_stdev
-df_risk["Market_StDev"] = market_stdev
-df_risk["Oil_StDev"] = oil_stdev
-
-###########
-# Step 6: Export Market Model data to Excel
-###########
-df_risk.to_excel('regression/output_market.xlsx', sheet_name = "Data", index = False)
-
-###########
-# Step 7: Prepare data for Tobin's Q regression
-###########
-df["Q"] = np.log((df["Total Assets"] - df["Total Equity"] + df["Market Cap"]) / df["Total Assets"])
-
-df["Size"] = np.log(df["Total Assets"])
-df["Leverage"] = df["Total Debt"] / df["Market Cap"]
-df["ROA"] = df["Net Income"] / df["Total Assets"]
-df["Growth"] = df["CAPEX"] / df["Total Assets"]
-
-# Data not needed for future analysis
-df = df.drop(columns=["Market Cap", "Total Sales", "Net Income", "Total Equity", 
-                      "Total Debt", "Total Assets", "CAPEX"])
-
-###########
-# Step 8: Export Tobin's Q data to Excel
-###########
-df.to_excel('regression/output_tobin.xlsx', sheet_name = "Data", index = False)
\ No newline at end of file
+import argparse
+import os
+from shared.project import resolve_path
+from shared.tracer import Tracer
+
+# Stages that can be run on their own; "all" runs the whole pipeline, "study" the STUDIES in config.py
+# and "volatility" the Market Model panel and regressions for every measure of the volatility grid.
+# "regress" fits the models of do_market.do and do_tobin.do on the market and tobin panels.
+STAGES = ["market", "tobin", "regress", "study", "volatility", "all"]
+
+@Tracer.traced()
+def load_input():
+    from data_ingestion.data_ingestion import DataIngestion
+
+    ###########
+    # Step 1: Import the prepared financial data
+    ###########
+    return DataIngestion.read_excel("data/input.xlsx")
+
+@Tracer.traced()
+def market(df, incremental = False):
+    import pandas as pd
+    from config.config import START_DATE, END_DATE, MARKET_INDEX, OIL_INDEX
+    from data_ingestion.data_ingestion import DataIngestion
+    from panel.panel import Panel
+
+    def download_sub(start_date = START_DATE, end_date = END_DATE):
+        sub_df = pd.DataFrame()
+
+        sub_df["Market"] = DataIngestion.download_daily_data(MARKET_INDEX, start_date, end_date)
+        sub_df["Oil"] = DataIngestion.download_daily_data(OIL_INDEX, start_date, end_date)
+
+        return sub_df
+
+    ###########
+    # Step 2: Find all companies' tickers
+    ###########
+    tickers = df.drop_duplicates(subset=["Ticker"])["Ticker"]
+    tickers = tickers.reset_index(drop = True).to_list()
+
+    if incremental:
+        from data_ingestion.return_store import ReturnStore
+
+        ###########
+        # Steps 3 and 4: Companies', Market and Oil returns of the months after the previous run
+        ###########
+        store = ReturnStore()
+
+        comp = store.get_returns("companies", lambda start_date, end_date: DataIngestion.download_daily_data(tickers, start_date, end_date), tickers, END_DATE)
+        sub = store.get_returns("market_oil", download_sub, ["Market", "Oil"], END_DATE)
+    else:
+        ###########
+        # Step 3: Prepare Companies' returns
+        ###########
+        comp_df = DataIngestion.download_daily_data(tickers)
+        comp = DataIngestion.get_returns(comp_df)
+
+        ###########
+        # Step 4: Prepare Market and Oil returns
+        ###########
+        sub = DataIngestion.get_returns(download_sub())
+
+    ###########
+    # Step 5: Prepare data for a Market Model regression
+    ###########
+    df_risk = Panel.build_market_panel(df, comp, sub, tickers)
+
+    ###########
+    # Step 6: Export Market Model data to Excel
+    ###########
+    df_risk.to_excel('regression/output_market.xlsx', sheet_name = "Data", index = False)
+
+    return df_risk
+
+@Tracer.traced()
+def tobin(df):
+    from panel.panel import Panel
+
+    ###########
+    # Step 7: Prepare data for Tobin's Q regression
+    ###########
+    df = Panel.build_tobin_panel(df)
+
+    ###########
+    # Step 8: Export Tobin's Q data to Excel
+    ###########
+    df.to_excel('regression/output_tobin.xlsx', sheet_name = "Data", index = False)
+
+    return df
+
+@Tracer.traced()
+def regress(df_risk, df_tobin):
+    import pandas as pd
+    from config.config import SIZE_CATEGORIES, MARKET_MODELS, TOBIN_MODELS
+    from regression.panel_regression import PanelRegression
+
+    samples = [None] + [{"Category": x} for x in SIZE_CATEGORIES]
+
+    ###########
+    # Step 9: Prepare the regression samples
+    ###########
+    market_sample = PanelRegression.prepare(df_risk, ["StDev", "Market_StDev", "Oil_StDev", "FH", "OH"], ["OH", "FH"])
+
+    tobin_variables = ["Q", "OH", "FH", "Size", "Leverage", "ROA", "Growth", "Dividend"]
+    tobin_sample = PanelRegression.prepare(df_tobin, tobin_variables, tobin_variables[:-1])
+
+    ###########
+    # Step 10: Market Model regressions, clustered by firm
+    ###########
+    model = PanelRegression(market_sample, "StDev", [x for regressors in MARKET_MODELS.values() for x in regressors], groups = ["Category"])
+    market_results = model.fit_all(PanelRegression.get_specs(MARKET_MODELS, samples))
+
+    ###########
+    # Step 11: Tobin's Q regressions with firm fixed effects, clustered by firm
+    ###########
+    model = PanelRegression(tobin_sample, "Q", [x for regressors in TOBIN_MODELS.values() for x in regressors], groups = ["Category"])
+    tobin_results = model.fit_all(PanelRegression.get_specs(TOBIN_MODELS, samples, fixed_effects = True))
+
+    ###########
+    # Step 12: Export the regression tables to Excel, one sheet per model
+    ###########
+    for path, results in [('regression/Regression_Market.xlsx', market_results), ('regression/Regression_Tobin.xlsx', tobin_results)]:
+        with pd.ExcelWriter(path) as writer:
+            for name in dict.fromkeys(x.name for x in results):
+                PanelRegression.get_table([x for x in results if x.name == name]).to_excel(writer, sheet_name = name)
+
+@Tracer.traced()
+def volatility(df):
+    import pandas as pd
+    from config.config import MARKET_INDEX, OIL_INDEX, VOLATILITY_ESTIMATORS, VOLATILITY_WINDOWS, VOLATILITY_MIN_OBS, EWMA_DECAY, SIZE_CATEGORIES, MARKET_MODELS
+    from data_ingestion.data_ingestion import DataIngestion
+    from regression.panel_regression import PanelRegression
+    from volatility.volatility import VolatilityEngine
+
+    tickers = df.drop_duplicates(subset=["Ticker"])["Ticker"]
+    tickers = tickers.reset_index(drop = True).to_list()
+
+    specs = VolatilityEngine.get_specs(VOLATILITY_ESTIMATORS, VOLATILITY_WINDOWS, VOLATILITY_MIN_OBS, EWMA_DECAY)
+
+    # Range estimators need open, high and low prices as well
+    if any(x.estimator in VolatilityEngine.RANGE_ESTIMATORS for x in specs):
+        comp_prices = DataIngestion.download_daily_ohlc(tickers)
+        market_prices = DataIngestion.download_daily_ohlc(MARKET_INDEX)
+        oil_prices = DataIngestion.download_daily_ohlc(OIL_INDEX)
+    else:
+        comp_prices = {'Close': DataIngestion.download_daily_data(tickers)}
+        market_prices = {'Close': DataIngestion.download_daily_data(MARKET_INDEX)}
+        oil_prices = {'Close': DataIngestion.download_daily_data(OIL_INDEX)}
+
+    # Oil is aligned to the trading days of the market index, as in the market stage
+    sub_prices = {}
+
+    for field, market_df in market_prices.items():
+        sub_prices[field] = pd.DataFrame({"Market": market_df[MARKET_INDEX], "Oil": oil_prices[field][OIL_INDEX].reindex(market_df.index)})
+
+    comp = VolatilityEngine.estimate(comp_prices, specs)
+    sub = VolatilityEngine.estimate(sub_prices, specs)
+
+    df_grid = VolatilityEngine.build_market_grid(df, comp, sub, tickers)
+
+    # A Stata dataset, as the stacked panel is too large to write to Excel quickly
+    df_grid["Date"] = pd.to_datetime(df_grid["Date"])
+    df_grid.to_stata('regression/output_market_grid.dta', write_index = False)
+
+    # Every Market Model on every category of every specification, from one design matrix
+    # with errors clustered by firm within each specification
+    sample = PanelRegression.prepare(df_grid, ["StDev", "Market_StDev", "Oil_StDev", "FH", "OH"], ["OH", "FH"], by = "Specification")
+
+    model = PanelRegression(sample, "StDev", [x for regressors in MARKET_MODELS.values() for x in regressors], cluster = ["Specification", "number"], groups = ["Specification", "Category"])
+
+    samples = [{"Specification": x} for x in sample["Specification"].unique()]
+    samples += [{"Specification": x["Specification"], "Category": y} for x in samples for y in SIZE_CATEGORIES]
+
+    results = model.fit_all(PanelRegression.get_specs(MARKET_MODELS, samples))
+    PanelRegression.get_results_frame(results).to_excel('regression/Regression_Market_Grid.xlsx', sheet_name = "Results", index = False)
+
+@Tracer.traced()
+def study():
+    import os
+    from config.config import STUDIES
+    from study.study import StudyConfig, StudyRunner
+
+    configs = [StudyConfig(**x) for x in STUDIES]
+
+    for name, files in StudyRunner.run(configs, processes = min(len(configs), os.cpu_count())).items():
+        print(f"{name}: {', '.join(files)}")
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Commodity hedging: market model and Tobin's Q data")
+    parser.add_argument("stage", nargs = "?", default = "all", choices = STAGES, help = "stage to run (default: all)")
+    parser.add_argument("--incremental", action = "store_true", help = "compute only the months after the previous run's END_DATE (market stage)")
+    parser.add_argument("--trace", type = resolve_path, help = "write the stage timings to this .json or .csv file")
+    parser.add_argument("--profile", metavar = "STAGE", help = "profile one traced stage: run, a stage function or a download")
+    parser.add_argument("--profiler", default = "cprofile", choices = ["cprofile", "pyinstrument"])
+    args = parser.parse_args(argv)
+
+    if args.trace or args.profile:
+        Tracer.start(args.profile, args.profiler)
+
+    with Tracer.stage("run"):
+        run(args.stage, args.incremental)
+
+    if args.trace:
+        Tracer.save(args.trace)
+        print("\n" + Tracer.summary())
+
+def run(stage, incremental = False):
+    if stage == "study":
+        return study()
+
+    df = load_input()
+
+    if stage in ("market", "regress", "all"):
+        df_risk = market(df, incremental)
+
+    if stage in ("tobin", "regress", "all"):
+        df_tobin = tobin(df)
+
+    if stage in ("regress", "all"):
+        regress(df_risk, df_tobin)
+
+    if stage == "volatility":
+        volatility(df)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from config.config import START_DATE, END_DATE
+from data_ingestion.data_ingestion import DataIngestion
+
+class Panel:
+    @staticmethod
+    def build_market_panel(df: pd.DataFrame, comp: pd.DataFrame, sub: pd.DataFrame, tickers: list, start_date = START_DATE, end_date = END_DATE) -> pd.DataFrame:
+        """Builds the Market Model panel: one row per ticker and month."""
+        dates = DataIngestion.get_index(start_date, end_date)
+
+        panel = pd.DataFrame({
+            "Ticker": np.repeat(tickers, len(dates)),
+            "Date": dates * len(tickers),
+            # Hedging values come from the previous financial year
+            "Year": np.tile([d.year - 1 for d in dates], len(tickers))
+        })
+
+        # There are no hedging values before the first year of the sample
+        panel.loc[panel["Year"] < start_date.year, "Year"] = -1
+
+        panel = panel.join(__class__.index_fundamentals(df), on = ["Ticker", "Year"]).drop(columns = ["Year"])
+
+        # Return frames share the get_index() row order, so stack them ticker by ticker
+        panel["StDev"] = comp[tickers].to_numpy().T.ravel()
+        panel["Market_StDev"] = np.tile(sub["Market"].to_numpy(), len(tickers))
+        panel["Oil_StDev"] = np.tile(sub["Oil"].to_numpy(), len(tickers))
+
+        return panel
+
+    @staticmethod
+    def index_fundamentals(df: pd.DataFrame) -> pd.DataFrame:
+        """Indexes hedging values by (Ticker, Year), keeping the first row of each pair."""
+        return df.drop_duplicates(subset = ["Ticker", "Year"]).set_index(["Ticker", "Year"])[["FH", "OH"]]
+
+    @staticmethod
+    def build_tobin_panel(df: pd.DataFrame) -> pd.DataFrame:
+        """Builds the Tobin's Q panel from the yearly fundamentals."""
+        df = df.copy()
+        df["Q"] = np.log((df["Total Assets"] - df["Total Equity"] + df["Market Cap"]) / df["Total Assets"])
+
+        df["Size"] = np.log(df["Total Assets"])
+        df["Leverage"] = df["Total Debt"] / df["Market Cap"]
+        df["ROA"] = df["Net Income"] / df["Total Assets"]
+        df["Growth"] = df["CAPEX"] / df["Total Assets"]
+
+        # Data not needed for future analysis
+        return df.drop(columns=["Market Cap", "Total Sales", "Net Income", "Total Equity", 
+                                "Total Debt", "Total Assets", "CAPEX"])
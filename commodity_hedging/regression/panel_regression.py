@@ -0,0 +1,320 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from scipy import stats
+from scipy.linalg import cho_factor, cho_solve
+from config.config import SIZE_CATEGORIES
+from shared.collinearity import get_independent
+
+@dataclass
+class ClusteredResult:
+    """Coefficients and cluster-robust inference of a single fit."""
+    name: str
+    sample: dict
+    columns: list
+    params: np.ndarray
+    bse: np.ndarray
+    tvalues: np.ndarray
+    pvalues: np.ndarray
+    nobs: int
+    nclusters: int
+    rsquared: float
+    rsquared_overall: float
+
+    def get_sample_name(self) -> str:
+        return ", ".join(str(x) for x in self.sample.values()) if self.sample else "Full sample"
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "coef": self.params,
+            "std err": self.bse,
+            "t": self.tvalues,
+            "P>|t|": self.pvalues
+        }, index = self.columns)
+
+    def summary(self) -> str:
+        return (
+            f"{self.name} ({self.get_sample_name()})\n"
+            f"No. Observations: {self.nobs}  Clusters: {self.nclusters}  R-squared: {self.rsquared:.3f}\n"
+            f"{self.to_frame().to_string(float_format = lambda x: f'{x:.4f}')}"
+        )
+
+@dataclass(frozen = True)
+class PanelSpec:
+    """
+    A model to fit: the regressors on the rows whose cluster attributes equal
+    sample (pairs of column and value; empty for the full sample), with firm
+    fixed effects when fixed_effects is set.
+    """
+    name: str
+    regressors: tuple
+    sample: tuple = ()
+    fixed_effects: bool = False
+
+class PanelRegression:
+    """
+    Replaces the regressions of do_market.do and do_tobin.do.
+
+    'reg y x, cluster(number)' and 'xtreg y x, cluster(number) fe' on any
+    sample of whole clusters only need the per-cluster sums of the design
+    matrix and its cross-products. These are reduced once from one shared
+    design matrix. Every fit then adds up the moments of its clusters and
+    takes its score sums X_g'y_g - X_g'X_g b from the same moments, so a fit
+    costs O(clusters * regressors^2) whatever the number of rows.
+
+    Fixed effects follow xtreg: the regressors are demeaned within clusters
+    and the sample means added back, which gives Stata's constant.
+    Coefficients of collinear regressors are omitted (NaN) in column order.
+    """
+    def __init__(self, data: pd.DataFrame, dependent: str, regressors: list, cluster = "number", groups: list = None):
+        groups = groups if groups else []
+
+        if groups and (data.groupby(cluster)[groups].nunique() > 1).any(axis = None):
+            raise ValueError(f"Sample columns {groups} must be constant within each {cluster}")
+
+        # Rows sorted by cluster, so that each cluster is one contiguous block
+        data = data.sort_values(cluster, kind = "stable")
+
+        self.terms, X = __class__.get_design(data, regressors)
+        self.columns = ["Intercept"] + [x for columns in self.terms.values() for x in columns]
+
+        Z = np.column_stack([np.ones(len(data)), X, data[dependent].to_numpy(dtype = float)])
+
+        # cluster may be several columns, e.g. a firm within each specification
+        codes = data.groupby(cluster, sort = False).ngroup().to_numpy()
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+
+        # Sample attributes of every cluster, as codes; a sample is always a set of clusters
+        self.groups = {}
+
+        for column in groups:
+            codes, values = pd.factorize(data[column].to_numpy()[starts])
+            self.groups[column] = (codes, {x: i for i, x in enumerate(values)})
+
+        self.counts = np.diff(np.r_[starts, len(Z)])
+        self.sums = np.add.reduceat(Z, starts, axis = 0)
+
+        # One pair of columns at a time, so no array of per-row outer products is needed
+        self.cross_products = np.empty((len(starts), Z.shape[1], Z.shape[1]))
+
+        for i in range(Z.shape[1]):
+            for j in range(i, Z.shape[1]):
+                self.cross_products[:, i, j] = self.cross_products[:, j, i] = np.add.reduceat(Z[:, i] * Z[:, j], starts)
+
+        # Cross-products of the data demeaned within each cluster
+        self.within = self.cross_products - self.sums[:, :, None] * self.sums[:, None, :] / self.counts[:, None, None]
+
+    def get_clusters(self, sample: tuple) -> np.ndarray:
+        mask = np.ones(len(self.counts), dtype = bool)
+
+        for column, value in sample:
+            codes, values = self.groups[column]
+            mask &= codes == values.get(value, -2)
+
+        return np.flatnonzero(mask)
+
+    def fit(self, spec: PanelSpec) -> ClusteredResult:
+        clusters = self.get_clusters(spec.sample)
+
+        if len(clusters) < 2:
+            raise ValueError(f"{spec.name}: the sample {dict(spec.sample)} has fewer than two clusters")
+
+        counts = self.counts[clusters]
+        sums = self.sums[clusters].sum(axis = 0)
+        nobs = counts.sum()
+
+        if spec.fixed_effects:
+            # Demeaned data plus the sample means: the moments of the within
+            # regression with a constant, as xtreg fe reports it
+            means = sums / nobs
+            moments = self.within[clusters] + counts[:, None, None] * np.outer(means, means)
+        else:
+            moments = self.cross_products[clusters]
+
+        columns = [0] + [self.columns.index(x) for term in spec.regressors for x in self.terms[term]]
+
+        ZtZ = moments.sum(axis = 0)
+        selected = [columns[i] for i in get_independent(ZtZ[np.ix_(columns, columns)])]
+
+        XtX = ZtZ[np.ix_(selected, selected)]
+        Xty = ZtZ[selected, -1]
+
+        factor = cho_factor(XtX)
+        params = cho_solve(factor, Xty)
+
+        # Score sums of every cluster, X_g'y_g - X_g'X_g b, from the cluster moments
+        scores = moments[:, selected, -1] - moments[:, selected][:, :, selected] @ params
+
+        # Stata's small-sample correction: G/(G-1) * (N-1)/(N-K)
+        nclusters = len(clusters)
+        # (X'X)^-1 M (X'X)^-1 with two solves against the Cholesky factor, as M is symmetric
+        cov = cho_solve(factor, cho_solve(factor, scores.T @ scores).T) * nclusters / (nclusters - 1) * (nobs - 1) / (nobs - len(selected))
+
+        bse = np.sqrt(np.diag(cov))
+        tvalues = params / bse
+        pvalues = 2 * stats.t.sf(np.abs(tvalues), nclusters - 1)
+
+        # Within R-squared with fixed effects, as the moments are then demeaned; y'y - b'X'y as X'Xb = X'y
+        ssr = ZtZ[-1, -1] - params @ Xty
+        rsquared = 1 - ssr / (ZtZ[-1, -1] - ZtZ[0, -1] ** 2 / nobs)
+
+        # Overall R-squared: the squared correlation of y and xb on the raw data
+        raw = self.cross_products[clusters].sum(axis = 0) - np.outer(sums, sums) / nobs
+        slopes, b = selected[1:], params[1:]
+        rsquared_overall = (b @ raw[slopes, -1]) ** 2 / (b @ raw[np.ix_(slopes, slopes)] @ b * raw[-1, -1]) if slopes else 0.0
+
+        # Omitted regressors are reported as NaN
+        values = np.full((4, len(columns)), np.nan)
+        values[:, [columns.index(x) for x in selected]] = [params, bse, tvalues, pvalues]
+
+        return ClusteredResult(spec.name, dict(spec.sample), [self.columns[x] for x in columns], *values, nobs, nclusters, rsquared, rsquared_overall)
+
+    def fit_all(self, specs: list) -> list:
+        return [self.fit(spec) for spec in specs]
+
+    @staticmethod
+    def get_specs(models: dict, samples: list, fixed_effects: bool = False) -> list:
+        """Every model (name: regressors) on every sample; None is the full sample."""
+        return [PanelSpec(name, tuple(regressors), tuple(sample.items()) if sample else (), fixed_effects)
+                for name, regressors in models.items() for sample in samples]
+
+    @staticmethod
+    def get_design(data: pd.DataFrame, regressors: list) -> tuple:
+        """
+        Columns of the regressors: "a#b" is the product of a and b and "i.x"
+        a dummy for every level of x but the first. Returns the column names
+        of every regressor and the design matrix without the intercept.
+        """
+        terms, columns = {}, []
+
+        for term in dict.fromkeys(regressors):
+            if term.startswith("i."):
+                variable = term[2:]
+                levels = np.sort(data[variable].unique())[1:]
+
+                terms[term] = [f"{x}.{variable}" for x in levels]
+                columns += [(data[variable].to_numpy() == x).astype(float) for x in levels]
+            else:
+                terms[term] = [term]
+                columns.append(np.prod([data[x].to_numpy(dtype = float) for x in term.split("#")], axis = 0))
+
+        return terms, np.column_stack(columns) if columns else np.empty((len(data), 0))
+
+    @staticmethod
+    def winsorize(data: pd.DataFrame, columns: list, by: str = None, lower: int = 1, upper: int = 99) -> pd.DataFrame:
+        """
+        Clips the columns at their lower and upper percentiles, within each
+        group of by when given, with the percentiles of Stata's 'sum, detail'.
+        """
+        data = data.copy()
+        codes = pd.factorize(data[by])[0] if by else np.zeros(len(data), dtype = int)
+
+        for column in columns:
+            values = data[column].to_numpy(dtype = float)
+
+            # Values sorted within each group; the groups are contiguous blocks
+            order = np.lexsort((values, codes))
+            counts = np.bincount(codes)
+            starts = np.r_[0, np.cumsum(counts)[:-1]]
+            ordered = values[order]
+
+            bounds = [__class__.get_percentile(ordered, starts, counts, p)[codes] for p in (lower, upper)]
+            data[column] = np.clip(values, *bounds)
+
+        return data
+
+    @staticmethod
+    def get_percentile(ordered: np.ndarray, starts: np.ndarray, counts: np.ndarray, p: int) -> np.ndarray:
+        """
+        The p-th percentile of sorted groups as Stata's 'sum, detail': x(i+1)
+        for i = floor(n * p / 100), or the mean of x(i) and x(i+1) when n * p / 100 is whole.
+        """
+        i = counts * p // 100
+        whole = counts * p % 100 == 0
+
+        upper = ordered[starts + i]
+        lower = ordered[starts + np.maximum(i - 1, 0)]
+
+        return np.where(whole, (lower + upper) / 2, upper)
+
+    @staticmethod
+    def prepare(data: pd.DataFrame, variables: list, winsorized: list, by: str = None, categories: dict = SIZE_CATEGORIES) -> pd.DataFrame:
+        """
+        The regression sample of do_market.do and do_tobin.do, within each
+        group of by when given. Drops rows missing any of the variables, sets
+        negative hedging to 0 and winsorizes at p1/p99. Adds the firm number,
+        the hedge dummies and the size Category, dropping firms in no category.
+        """
+        data = data.dropna(subset = variables)
+        data = data.assign(FH = data["FH"].clip(lower = 0), OH = data["OH"].clip(lower = 0))
+
+        data = __class__.winsorize(data, winsorized, by)
+
+        data["number"] = pd.factorize(data["Ticker"], sort = True)[0]
+
+        data["FH_Dummy"] = (data["FH"] > 0).astype(int)
+        data["OH_Dummy"] = (data["OH"] > 0).astype(int)
+
+        category = {ticker: name for name, tickers in categories.items() for ticker in tickers}
+        data["Category"] = data["Ticker"].map(category)
+
+        return data.dropna(subset = ["Category"]).reset_index(drop = True)
+
+    @staticmethod
+    def get_table(results: list) -> pd.DataFrame:
+        """
+        An esttab table: coefficients with stars (* .10 ** .05 *** .01) over
+        standard errors in parentheses, one column per result. Year dummies
+        are shown as a single 'Year Effect' row.
+        """
+        table = {}
+
+        for result in results:
+            column = {}
+
+            # The intercept after the slopes, and year dummies as a single row
+            for i in list(range(1, len(result.columns))) + [0]:
+                name, b, se, p = result.columns[i], result.params[i], result.bse[i], result.pvalues[i]
+
+                if name.endswith(".Year"):
+                    continue
+
+                stars = "***" if p < 0.01 else "**" if p < 0.05 else "*" if p < 0.1 else ""
+                column[name] = f"{b:.3f}{stars}" if not np.isnan(b) else "(omitted)"
+                column[f"{name} SE"] = f"({se:.3f})" if not np.isnan(b) else ""
+
+            if any(x.endswith(".Year") for x in result.columns):
+                column["Year Effect"] = "Yes"
+
+            column["N"] = str(result.nobs)
+            column["R-square"] = f"{result.rsquared_overall:.3f}"
+
+            table[result.get_sample_name()] = column
+
+        table = pd.DataFrame(table).fillna("")
+        table.index = ["" if x.endswith(" SE") else x for x in table.index]
+
+        return table
+
+    @staticmethod
+    def get_results_frame(results: list) -> pd.DataFrame:
+        """All results in long form: one row per fit and regressor."""
+        frames = []
+
+        for result in results:
+            frame = result.to_frame().rename_axis("Variable").reset_index()
+
+            for column, value in result.sample.items():
+                frame[column] = value
+
+            frame["N"] = result.nobs
+            frame["Clusters"] = result.nclusters
+            frame["R-squared"] = result.rsquared
+            frame["R-squared overall"] = result.rsquared_overall
+            frames.append(frame.assign(Model = result.name))
+
+        frame = pd.concat(frames, ignore_index = True)
+
+        # Model and the sample columns first
+        first = ["Model"] + list(dict.fromkeys(x for result in results for x in result.sample))
+        return frame[first + [x for x in frame.columns if x not in first]]
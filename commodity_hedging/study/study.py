@@ -0,0 +1,110 @@
+import datetime as dt
+import os
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from config.config import START_DATE, END_DATE, MARKET_INDEX, OIL_INDEX
+from data_ingestion.data_ingestion import DataIngestion
+from panel.panel import Panel
+from shared.tracer import Tracer
+
+@dataclass(frozen = True)
+class StudyConfig:
+    """Benchmarks, sample period, volatility window and input of one hedging study."""
+    name: str
+    market_index: str = MARKET_INDEX
+    oil_index: str = OIL_INDEX
+    start_date: dt.date = START_DATE
+    end_date: dt.date = END_DATE
+    window: int = 100
+    input_path: str = "data/input.xlsx"
+    output_folder: str = None
+
+    def get_output_folder(self) -> str:
+        return self.output_folder or os.path.join("output", self.name)
+
+# Inputs and prices of the worker process, set once by the pool initializer
+_worker_data = None
+
+class StudyRunner:
+    """
+    Runs many hedging studies in one pass.
+
+    Inputs are read once per file and the prices of every ticker and
+    benchmark are downloaded once, over the widest period of all studies.
+    Returns, volatilities and panels of each study are then built in a
+    process pool and written to the study's output folder.
+    """
+    @staticmethod
+    def run(configs: list, processes: int = None) -> dict:
+        """Runs all studies and returns the output files of each, by study name."""
+        inputs = DataIngestion.read_workbooks([x.input_path for x in configs], processes = processes)
+        prices = __class__.download_prices(configs, inputs)
+
+        if not processes:
+            results = [__class__.run_config(config, inputs, prices) for config in configs]
+        else:
+            with ProcessPoolExecutor(max_workers = processes, initializer = __class__.init_worker, initargs = (inputs, prices)) as executor:
+                results = list(executor.map(__class__.run_in_worker, configs))
+
+        return {config.name: files for config, files in zip(configs, results)}
+
+    @staticmethod
+    @Tracer.traced()
+    def download_prices(configs: list, inputs: dict) -> pd.DataFrame:
+        """Closing prices of all tickers and benchmarks over the widest study period."""
+        tickers = []
+
+        for df in inputs.values():
+            tickers += __class__.get_tickers(df)
+
+        for config in configs:
+            tickers += [config.market_index, config.oil_index]
+
+        start_date = min(x.start_date for x in configs)
+        end_date = max(x.end_date for x in configs)
+
+        return DataIngestion.download_daily_data(list(dict.fromkeys(tickers)), start_date, end_date)
+
+    @staticmethod
+    def get_tickers(df: pd.DataFrame) -> list:
+        return df.drop_duplicates(subset=["Ticker"])["Ticker"].reset_index(drop = True).to_list()
+
+    @staticmethod
+    def init_worker(inputs: dict, prices: pd.DataFrame):
+        global _worker_data
+        _worker_data = (inputs, prices)
+
+    @staticmethod
+    def run_in_worker(config: StudyConfig) -> list:
+        return __class__.run_config(config, *_worker_data)
+
+    @staticmethod
+    def run_config(config: StudyConfig, inputs: dict, prices: pd.DataFrame) -> list:
+        """Builds and writes the Market Model and Tobin's Q panels of one study."""
+        df = inputs[config.input_path]
+        tickers = __class__.get_tickers(df)
+
+        prices = prices.loc[(prices.index >= pd.Timestamp(config.start_date)) & (prices.index < pd.Timestamp(config.end_date))]
+
+        # Each frame keeps the trading days of its own tickers, as separate downloads would
+        comp_df = prices[tickers].dropna(how = "all")
+
+        market = prices[config.market_index].dropna()
+        sub_df = pd.DataFrame({"Market": market, "Oil": prices[config.oil_index].reindex(market.index)})
+
+        comp = DataIngestion.get_returns(comp_df, config.window, config.start_date, config.end_date)
+        sub = DataIngestion.get_returns(sub_df, config.window, config.start_date, config.end_date)
+
+        df_risk = Panel.build_market_panel(df, comp, sub, tickers, config.start_date, config.end_date)
+        df_tobin = Panel.build_tobin_panel(df)
+
+        folder = config.get_output_folder()
+        os.makedirs(folder, exist_ok = True)
+
+        files = [os.path.join(folder, "output_market.xlsx"), os.path.join(folder, "output_tobin.xlsx")]
+
+        df_risk.to_excel(files[0], sheet_name = "Data", index = False)
+        df_tobin.to_excel(files[1], sheet_name = "Data", index = False)
+
+        return files
@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from config.config import START_DATE, END_DATE
+from data_ingestion.data_ingestion import DataIngestion
+from panel.panel import Panel
+
+@dataclass(frozen = True)
+class VolatilitySpec:
+    """One volatility measure: estimator, rolling window (days), minimum observations per month and EWMA decay."""
+    estimator: str
+    window: int = None
+    min_obs: int = 15
+    decay: float = None
+
+    def get_name(self) -> str:
+        if self.estimator == 'rolling':
+            return f"rolling_{self.window}_{self.min_obs}"
+        if self.estimator == 'ewma':
+            return f"ewma_{self.decay}_{self.min_obs}"
+
+        return f"{self.estimator}_{self.min_obs}"
+
+class VolatilityEngine:
+    """
+    Monthly volatility of many tickers under a grid of specifications.
+
+    'rolling' is the measure of DataIngestion.get_returns: the standard
+    deviation within each month of window-day sums of log returns. All
+    windows come from one cumulative sum of log returns, so every window
+    costs a single subtraction whatever its length, and the monthly
+    statistics of all windows are grouped in one pass.
+
+    'ewma', 'parkinson' and 'garman_klass' are daily volatilities within the
+    month: the month-end EWMA of squared log returns and the monthly means of
+    the high-low and open-high-low-close range estimators. Every measure is
+    NaN for months with fewer than min_obs observations.
+    """
+    ESTIMATORS = ['rolling', 'ewma', 'parkinson', 'garman_klass']
+
+    # Estimators that need open, high and low prices besides the close
+    RANGE_ESTIMATORS = ['parkinson', 'garman_klass']
+
+    @staticmethod
+    def get_specs(estimators: list, windows: list, min_obs: list, decay: float = 0.94) -> list:
+        """The grid of specifications: every window for 'rolling', every minimum for all estimators."""
+        specs = []
+
+        for estimator in estimators:
+            if estimator not in __class__.ESTIMATORS:
+                raise ValueError(f"Unknown volatility estimator: {estimator}")
+
+            for m in min_obs:
+                if estimator == 'rolling':
+                    specs += [VolatilitySpec(estimator, window = w, min_obs = m) for w in windows]
+                elif estimator == 'ewma':
+                    specs.append(VolatilitySpec(estimator, min_obs = m, decay = decay))
+                else:
+                    specs.append(VolatilitySpec(estimator, min_obs = m))
+
+        return specs
+
+    @staticmethod
+    def estimate(prices: dict, specs: list, start_date = START_DATE, end_date = END_DATE) -> dict:
+        """
+        Monthly volatilities of every spec, keyed by spec, in the row order of
+        DataIngestion.get_index. prices maps 'Open', 'High', 'Low' and 'Close'
+        to daily frames; only 'Close' is needed without range estimators.
+        """
+        results = {}
+
+        rolling = [x for x in specs if x.estimator == 'rolling']
+
+        if rolling:
+            grid = __class__.rolling_grid(prices['Close'], sorted({x.window for x in rolling}), sorted({x.min_obs for x in rolling}), start_date, end_date)
+            results.update({x: grid[(x.window, x.min_obs)] for x in rolling})
+
+        for spec in specs:
+            if spec.estimator == 'ewma':
+                results[spec] = __class__.ewma(prices['Close'], spec.decay, spec.min_obs, start_date, end_date)
+            elif spec.estimator == 'parkinson':
+                results[spec] = __class__.parkinson(prices['High'], prices['Low'], spec.min_obs, start_date, end_date)
+            elif spec.estimator == 'garman_klass':
+                results[spec] = __class__.garman_klass(prices['Open'], prices['High'], prices['Low'], prices['Close'], spec.min_obs, start_date, end_date)
+
+        return {spec: results[spec] for spec in specs}
+
+    @staticmethod
+    def get_log_returns(prices: pd.DataFrame) -> np.ndarray:
+        """Daily log returns with a NaN first row, as np.log(data/data.shift(1))."""
+        values = prices.to_numpy(dtype = float)
+
+        log_returns = np.full(values.shape, np.nan)
+        log_returns[1:] = np.log(values[1:] / values[:-1])
+
+        return log_returns
+
+    @staticmethod
+    def rolling_sums(prices: pd.DataFrame, windows: list) -> pd.DataFrame:
+        """Rolling sums of log returns for every window, with (window, ticker) columns."""
+        log_returns = __class__.get_log_returns(prices)
+        valid = ~np.isnan(log_returns)
+
+        # Running sums of the returns and of the gaps; a window with a gap is NaN, as in rolling().sum()
+        zeros = np.zeros((1, log_returns.shape[1]))
+        sums = np.vstack([zeros, np.cumsum(np.where(valid, log_returns, 0), axis = 0)])
+        gaps = np.vstack([zeros, np.cumsum(~valid, axis = 0)])
+
+        frames = {}
+
+        for w in windows:
+            window_sums = np.full(log_returns.shape, np.nan)
+            window_sums[w - 1:] = np.where(gaps[w:] - gaps[:-w] > 0, np.nan, sums[w:] - sums[:-w])
+
+            frames[w] = pd.DataFrame(window_sums, index = prices.index, columns = prices.columns)
+
+        return pd.concat(frames, axis = 1)
+
+    @staticmethod
+    def rolling_grid(prices: pd.DataFrame, windows: list, min_obs: list, start_date = START_DATE, end_date = END_DATE) -> dict:
+        """Monthly standard deviations of the rolling sums, keyed by (window, min_obs)."""
+        sums = __class__.rolling_sums(prices, windows)
+        grouped = sums.groupby(sums.index.to_period("M"))
+
+        date_values = DataIngestion.get_index(start_date, end_date)
+        periods = pd.PeriodIndex(date_values, freq = "M")
+
+        st_dev = grouped.std().reindex(periods)
+        count = grouped.count().reindex(periods)
+
+        grid = {}
+
+        for w in windows:
+            for m in min_obs:
+                frame = st_dev[w].where(count[w] >= m)
+                frame.index = date_values
+                grid[(w, m)] = frame
+
+        return grid
+
+    @staticmethod
+    def ewma(prices: pd.DataFrame, decay: float, min_obs: int, start_date = START_DATE, end_date = END_DATE) -> pd.DataFrame:
+        """Month-end EWMA volatility of daily log returns."""
+        log_returns = pd.DataFrame(__class__.get_log_returns(prices), index = prices.index, columns = prices.columns)
+        variance = (log_returns ** 2).ewm(alpha = 1 - decay, adjust = False, ignore_na = True).mean()
+
+        months = prices.index.to_period("M")
+        month_end = variance.groupby(months).last().where(log_returns.groupby(months).count() >= min_obs)
+
+        return __class__.to_index(np.sqrt(month_end), start_date, end_date)
+
+    @staticmethod
+    def parkinson(high: pd.DataFrame, low: pd.DataFrame, min_obs: int, start_date = START_DATE, end_date = END_DATE) -> pd.DataFrame:
+        """Parkinson (1980) daily volatility from the high-low range, averaged within the month."""
+        variance = np.log(high / low) ** 2 / (4 * np.log(2))
+
+        return __class__.monthly_volatility(variance, min_obs, start_date, end_date)
+
+    @staticmethod
+    def garman_klass(open_: pd.DataFrame, high: pd.DataFrame, low: pd.DataFrame, close: pd.DataFrame, min_obs: int, start_date = START_DATE, end_date = END_DATE) -> pd.DataFrame:
+        """Garman and Klass (1980) daily volatility from open, high, low and close, averaged within the month."""
+        variance = 0.5 * np.log(high / low) ** 2 - (2 * np.log(2) - 1) * np.log(close / open_) ** 2
+
+        return __class__.monthly_volatility(variance, min_obs, start_date, end_date)
+
+    @staticmethod
+    def monthly_volatility(variance: pd.DataFrame, min_obs: int, start_date, end_date) -> pd.DataFrame:
+        grouped = variance.groupby(variance.index.to_period("M"))
+        mean = grouped.mean().where(grouped.count() >= min_obs)
+
+        return __class__.to_index(np.sqrt(mean.clip(lower = 0)), start_date, end_date)
+
+    @staticmethod
+    def to_index(monthly: pd.DataFrame, start_date, end_date) -> pd.DataFrame:
+        """Reindexes a frame of monthly periods to the dates of DataIngestion.get_index."""
+        date_values = DataIngestion.get_index(start_date, end_date)
+
+        monthly = monthly.reindex(pd.PeriodIndex(date_values, freq = "M"))
+        monthly.index = date_values
+
+        return monthly
+
+    @staticmethod
+    def build_market_grid(df: pd.DataFrame, comp: dict, sub: dict, tickers: list, start_date = START_DATE, end_date = END_DATE) -> pd.DataFrame:
+        """
+        Stacks the Market Model panel of every spec, with the spec in the
+        first columns, so the regressions can be run by Specification.
+        comp and sub are the results of estimate for the companies and for
+        the Market and Oil benchmarks.
+        """
+        panels = []
+
+        for spec in comp:
+            panel = Panel.build_market_panel(df, comp[spec], sub[spec], tickers, start_date, end_date)
+
+            panel.insert(0, "Specification", spec.get_name())
+            panel.insert(1, "Estimator", spec.estimator)
+            panel.insert(2, "Window", spec.window if spec.window else 0)
+            panel.insert(3, "Min_Obs", spec.min_obs)
+
+            panels.append(panel)
+
+        return pd.concat(panels, ignore_index = True)
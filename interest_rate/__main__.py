@@ -0,0 +1,6 @@
+"""
+Runs the pipeline from the repository root, e.g. python -m interest_rate alert.
+"""
+from shared.project import run
+
+run(__file__)
@@ -0,0 +1,104 @@
+"""
+Deterministic synthetic inputs for the benchmarks, so no downloads are needed.
+
+Concept payloads follow the SEC companyconcept JSON: facts under
+units.USD with start (duration facts only), end, val, accn, fy, fp, form
+and filed. Every 10-Q reports the quarter and, from Q2, the year to date;
+every 10-K the full year. Each filing repeats the same period of the
+previous year as a comparative, as real filings do.
+"""
+import numpy as np
+import pandas as pd
+
+END_DATE = pd.Timestamp("2024-12-31")
+NUM_YEARS = 10
+
+# (fp, form, last month of the period, months in the year-to-date period)
+FILINGS = [("Q1", "10-Q", 3, 3), ("Q2", "10-Q", 6, 6), ("Q3", "10-Q", 9, 9), ("FY", "10-K", 12, 12)]
+
+def get_banks_info(num_banks) -> list:
+    return [{'ticker': f"B{i}", 'cik': f"CIK{i:010d}"} for i in range(num_banks)]
+
+def generate_prices(tickers: list, num_years = NUM_YEARS, seed = 0) -> tuple:
+    """Weekly log returns of the banks and the long bond yield over num_years to END_DATE."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end = END_DATE, periods = 52 * num_years, freq = "W-MON")
+
+    # Fat tails, so some weeks move by more than 10%
+    log_returns = pd.DataFrame(rng.standard_t(4, (len(dates), len(tickers))) * 0.035, index = dates, columns = tickers)
+    yields = pd.Series(3 + np.cumsum(rng.normal(0, 0.08, len(dates))), index = dates, name = "^TYX")
+
+    return log_returns, yields
+
+def generate_facts(first_year: int, last_year: int, scale: float, rng, instant = False) -> list:
+    """Facts of one concept in filing order."""
+    facts = []
+    quarterly = {}
+
+    for year in range(first_year, last_year + 1):
+        for quarter in range(1, 5):
+            quarterly[(year, quarter)] = round(scale * rng.lognormal(0, 0.3))
+
+    for year in range(first_year, last_year + 1):
+        for fp, form, month, ytd_months in FILINGS:
+            end = pd.Timestamp(year, month, 1) + pd.offsets.MonthEnd(0)
+            filed = (end + pd.Timedelta(days = 40 if form == "10-Q" else 60)).strftime("%Y-%m-%d")
+            accn = f"0000000000-{year % 100:02d}-{len(facts):06d}"
+
+            # The period of this filing, then the same period a year earlier
+            for fact_year in (year, year - 1):
+                if fact_year < first_year:
+                    continue
+
+                fact_end = pd.Timestamp(fact_year, month, 1) + pd.offsets.MonthEnd(0)
+                quarter = month // 3
+
+                if instant:
+                    periods = [(None, quarterly[(fact_year, quarter)] * 20)]
+                else:
+                    quarter_start = pd.Timestamp(fact_year, month - 2, 1)
+                    year_start = pd.Timestamp(fact_year, 1, 1)
+                    year_to_date = sum(quarterly[(fact_year, q)] for q in range(1, quarter + 1))
+
+                    periods = [(year_start, year_to_date)]
+
+                    if form == "10-Q" and ytd_months > 3:
+                        periods.insert(0, (quarter_start, quarterly[(fact_year, quarter)]))
+
+                for start, val in periods:
+                    fact = {'end': fact_end.strftime("%Y-%m-%d"), 'val': val, 'accn': accn, 'fy': year, 'fp': fp, 'form': form, 'filed': filed}
+
+                    if start is not None:
+                        fact = {'start': start.strftime("%Y-%m-%d"), **fact}
+
+                    facts.append(fact)
+
+    return facts
+
+def generate_payload(cik: str, tag: str, seed = 0, last_year = END_DATE.year, num_years = NUM_YEARS + 1) -> dict:
+    """A companyconcept response for one bank and us-gaap tag."""
+    rng = np.random.default_rng([seed, int(cik[3:]), sum(map(ord, tag))])
+    instant = tag == "AvailableForSaleSecuritiesDebtSecurities"
+
+    return {
+        'cik': int(cik[3:]),
+        'taxonomy': "us-gaap",
+        'tag': tag,
+        'label': tag,
+        'description': "",
+        'entityName': f"Bank {cik}",
+        'units': {'USD': generate_facts(last_year - num_years + 1, last_year, 1e6, rng, instant)}
+    }
+
+def generate_bank_data(banks_info: list, seed = 0) -> dict:
+    """Bank data shaped like DataIngestion.get_bank_data, built from synthetic payloads."""
+    tags = {
+        'other_income': "NoninterestIncomeOther",
+        'profit': "NetIncomeLoss",
+        'assets_for_sale': "AvailableForSaleSecuritiesDebtSecurities"
+    }
+
+    return {
+        x['ticker']: {key: generate_payload(x['cik'], tag, seed)['units']['USD'] for key, tag in tags.items()}
+        for x in banks_info
+    }
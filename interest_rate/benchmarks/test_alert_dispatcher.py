@@ -0,0 +1,184 @@
+"""
+Checks of AlertDispatcher against a local stub SMTP server.
+
+The stub speaks enough SMTP for smtplib and records every message it
+accepts. Its options make it advertise STARTTLS and refuse it, refuse the
+recipients, or close the session after each message.
+"""
+import email
+import socketserver
+import threading
+import time
+import pytest
+from smtp.alert_dispatcher import AlertDispatcher
+
+SENDER = "alerts@example.com"
+
+class StubHandler(socketserver.StreamRequestHandler):
+    # (recipients, message) of every accepted message and the number of sessions
+    messages = []
+    sessions = 0
+    lock = threading.Lock()
+
+    # Refuse STARTTLS, refuse every recipient, close the session after each message
+    refuse_tls = False
+    refuse_recipients = False
+    one_message_per_session = False
+
+    def handle(self):
+        with __class__.lock:
+            __class__.sessions += 1
+
+        self.reply("220 stub")
+        recipients = []
+
+        while line := self.rfile.readline():
+            command = line.decode().strip()
+            verb = command.split(" ")[0].upper()
+
+            if verb == "EHLO":
+                self.reply("250-stub", "250-STARTTLS" if __class__.refuse_tls else "250-8BITMIME", "250 OK")
+            elif verb == "STARTTLS":
+                self.reply("454 TLS not available")
+            elif verb == "RCPT":
+                if __class__.refuse_recipients:
+                    self.reply("550 No such user")
+                else:
+                    recipients.append(command.split(":", 1)[1].strip("<>"))
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = b"".join(iter(self.rfile.readline, b".\r\n")).decode()
+
+                with __class__.lock:
+                    __class__.messages.append((recipients, data))
+
+                recipients = []
+                self.reply("250 OK")
+
+                if __class__.one_message_per_session:
+                    return
+            elif verb == "QUIT":
+                return self.reply("221 Bye")
+            else:
+                # HELO, MAIL, RSET and NOOP
+                self.reply("250 OK")
+
+    def reply(self, *lines):
+        self.wfile.write("".join(f"{x}\r\n" for x in lines).encode())
+
+@pytest.fixture(scope = "module")
+def port():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+
+    yield server.server_address[1]
+
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def stub(port, monkeypatch):
+    """The stub with its options at their defaults and no messages or sessions yet."""
+    monkeypatch.setattr(StubHandler, "messages", [])
+    monkeypatch.setattr(StubHandler, "sessions", 0)
+
+    return StubHandler
+
+def get_dispatcher(port, state_path, use_tls = False):
+    return AlertDispatcher("127.0.0.1", port, SENDER, "", use_tls = use_tls, state_path = state_path)
+
+def wait_for(dispatcher, metric, value, timeout = 5):
+    """Waits until the background thread has brought a metric to a value."""
+    deadline = time.monotonic() + timeout
+
+    while dispatcher.get_metrics()[metric] != value and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def get_tickers(message) -> str:
+    body = email.message_from_string(message).get_payload()[0].get_payload()
+    return body[len("Probability has increased for companies: "):-1]
+
+def test_one_digest_per_recipient(port, stub, tmp_path):
+    with get_dispatcher(port, str(tmp_path / "state.json")) as dispatcher:
+        dispatcher.add_alerts("a@example.com", ["BAC", "JPM"])
+        dispatcher.add_alerts("a@example.com", ["JPM", "C"])
+        dispatcher.add_alerts("b@example.com", ["WFC"])
+
+    digests = {recipients[0]: get_tickers(message) for recipients, message in stub.messages}
+
+    assert len(stub.messages) == 2 and stub.sessions == 1
+    assert digests == {"a@example.com": "BAC, JPM, C", "b@example.com": "WFC"}
+    assert dispatcher.get_metrics()["sent"] == 2
+
+def test_quarter_dedupe(port, stub, tmp_path):
+    """A second run in the same quarter only sends the tickers the first one did not."""
+    state_path = str(tmp_path / "state.json")
+
+    with get_dispatcher(port, state_path) as dispatcher:
+        dispatcher.add_alerts("a@example.com", ["BAC", "JPM"])
+
+    with get_dispatcher(port, state_path) as dispatcher:
+        dispatcher.add_alerts("a@example.com", ["BAC", "JPM", "C"])
+
+    assert [get_tickers(message) for _, message in stub.messages] == ["BAC, JPM", "C"]
+    assert dispatcher.get_metrics()["skipped"] == 2
+
+def test_flush_twice(port, stub, tmp_path):
+    """Tickers queued by a flush are not queued again by the next one."""
+    with get_dispatcher(port, str(tmp_path / "state.json")) as dispatcher:
+        dispatcher.add_alerts("a@example.com", ["BAC"])
+        dispatcher.flush()
+        dispatcher.add_alerts("a@example.com", ["BAC", "JPM"])
+        dispatcher.flush()
+
+    assert sorted(get_tickers(message) for _, message in stub.messages) == ["BAC", "JPM"]
+    assert dispatcher.get_metrics()["skipped"] == 1
+
+def test_reconnect(port, stub, tmp_path, monkeypatch):
+    """A session closed by the server is reopened and the message sent again."""
+    monkeypatch.setattr(StubHandler, "one_message_per_session", True)
+
+    with get_dispatcher(port, str(tmp_path / "state.json")) as dispatcher:
+        for recipient in ["a@example.com", "b@example.com", "c@example.com"]:
+            dispatcher.add_alerts(recipient, ["BAC"])
+
+    assert len(stub.messages) == 3 and stub.sessions == 3
+    assert dispatcher.get_metrics()["failed"] == 0
+
+def test_failed(port, stub, tmp_path, monkeypatch):
+    """A refused digest is counted as failed, not saved as sent, and queued again by a later flush."""
+    state_path = tmp_path / "state.json"
+    monkeypatch.setattr(StubHandler, "refuse_recipients", True)
+
+    with get_dispatcher(port, str(state_path)) as dispatcher:
+        dispatcher.add_alerts("a@example.com", ["BAC"])
+        dispatcher.flush()
+        wait_for(dispatcher, "failed", 1)
+
+        metrics = dispatcher.get_metrics()
+
+        assert metrics["failed"] == 1 and metrics["sent"] == 0
+        assert "a@example.com" in metrics["errors"]
+        assert not state_path.exists()
+
+        monkeypatch.setattr(StubHandler, "refuse_recipients", False)
+        dispatcher.add_alerts("a@example.com", ["BAC"])
+
+    assert [get_tickers(message) for _, message in stub.messages] == ["BAC"]
+    assert dispatcher.get_metrics()["sent"] == 1
+
+def test_starttls_failure(port, stub, tmp_path, monkeypatch):
+    """A refused STARTTLS fails the digest and leaves no plaintext session for the next one."""
+    monkeypatch.setattr(StubHandler, "refuse_tls", True)
+
+    with get_dispatcher(port, str(tmp_path / "state.json"), use_tls = True) as dispatcher:
+        dispatcher.add_alerts("a@example.com", ["BAC"])
+        dispatcher.add_alerts("b@example.com", ["JPM"])
+
+    metrics = dispatcher.get_metrics()
+
+    assert stub.messages == [] and stub.sessions == 2
+    assert metrics["failed"] == 2 and metrics["sent"] == 0
+    assert dispatcher.connection.smtp is None
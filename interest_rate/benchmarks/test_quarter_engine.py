@@ -0,0 +1,172 @@
+"""
+Parity check and benchmarks of QuarterEngine against the per-bar loop it replaced.
+
+The panels are compared on weekly and business-day bars, with missing
+yields (including the opening bar of quarters) and with sparse facts:
+filings dropped at random and whole years missing, so some bars are not
+covered by any filing.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import timedelta
+from models.bank_index import BankIndex
+from models.bank_panel import BankPanel
+from models.bank_record import BankRecord
+from models.quarter_engine import QuarterEngine
+from benchmarks.synthetic import get_banks_info, generate_bank_data, generate_prices
+from shared.benchmark_suite import SCALES
+
+# Banks in main.py
+NUM_BANKS = 8
+
+# The per-bar loop takes about a second per 8 banks on business days, so it is not timed at 100x
+LEGACY_SCALES = [1, 10]
+
+# Share of yields set to NaN and of facts dropped in the sparse cases
+NAN_SHARE = 0.1
+DROP_SHARE = 0.3
+
+def legacy_panel(banks_info, banks_data, log_returns, diff_yields) -> pd.DataFrame:
+    """Step 5 of main.py before QuarterEngine: one BankRecord update per bank and bar."""
+    panel = BankPanel()
+    period = log_returns.index.to_pydatetime()
+
+    for x in banks_info:
+        bank_data = BankIndex(banks_data[x['ticker']])
+
+        sum_other_income = 0
+        sum_profit = 0
+        previous_date = period[0]
+
+        fp = previous_date.month // 3 + 1
+
+        item = BankRecord(x['ticker'], period[0], None, 'Q' + str(fp), diff_yields.iloc[0], bank_data, sum_other_income, sum_profit)
+
+        for y in period:
+            if not (item.start and item.end):
+                fp = y.month // 3 + 1
+
+                if fp == 4:
+                    item = BankRecord(x['ticker'], y, None, 'Q' + str(fp), diff_yields.loc[y], bank_data, sum_other_income, sum_profit)
+                else:
+                    item = BankRecord(x['ticker'], y, previous_date, 'Q' + str(fp), diff_yields.loc[y], bank_data, sum_other_income, sum_profit)
+            elif item.end < y:
+                if item.start and item.end:
+                    panel.append(item)
+
+                fp = y.month // 3 + 1
+
+                if fp == 4:
+                    q4_start_date = item.end + timedelta(days=1)
+
+                    item = BankRecord(x['ticker'], y, None, 'Q' + str(fp), diff_yields.loc[y], bank_data, sum_other_income, sum_profit)
+                    item.start = q4_start_date
+
+                    sum_other_income = 0
+                    sum_profit = 0
+                else:
+                    item = BankRecord(x['ticker'], y, previous_date, 'Q' + str(fp), diff_yields.loc[y], bank_data, sum_other_income, sum_profit)
+
+                    if item.start and item.end:
+                        sum_other_income += item.other_income
+                        sum_profit += item.profit
+            else:
+                item.count_return(log_returns[x['ticker']].loc[y])
+                item.set_extreme_interest_rate(diff_yields.loc[y])
+                item.set_last_interest_rate(diff_yields.loc[y])
+
+            previous_date = y
+
+    return panel.to_df()
+
+def to_business_days(log_returns, yields, seed = 0):
+    """Business-day bars over the same dates, each week's move spread over its days."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(log_returns.index[0], log_returns.index[-1])
+
+    returns = pd.DataFrame(rng.standard_t(4, (len(dates), log_returns.shape[1])) * 0.016, index = dates, columns = log_returns.columns)
+    return returns, yields.reindex(dates).interpolate()
+
+def with_missing_yields(yields, seed = 0):
+    rng = np.random.default_rng(seed)
+    yields = yields.copy()
+
+    # The first bar opens the first quarter, so its yield is dropped too
+    missing = rng.random(len(yields)) < NAN_SHARE
+    missing[0] = True
+    yields[missing] = np.nan
+
+    return yields
+
+def with_sparse_facts(banks_data, seed = 0):
+    """Drops a share of every bank's facts and, for every other bank, two whole years."""
+    rng = np.random.default_rng(seed)
+    sparse = {}
+
+    for i, (ticker, data) in enumerate(banks_data.items()):
+        gap = ("2018", "2019") if i % 2 == 0 else ()
+        sparse[ticker] = {key: [x for x in facts if rng.random() >= DROP_SHARE and x['end'][:4] not in gap] for key, facts in data.items()}
+
+    return sparse
+
+def get_inputs(num_banks, bars = "weekly", missing_yields = False, sparse_facts = False):
+    banks_info = get_banks_info(num_banks)
+    banks_data = generate_bank_data(banks_info)
+    log_returns, yields = generate_prices([x['ticker'] for x in banks_info])
+
+    if bars == "business":
+        log_returns, yields = to_business_days(log_returns, yields)
+    if missing_yields:
+        yields = with_missing_yields(yields)
+    if sparse_facts:
+        banks_data = with_sparse_facts(banks_data)
+
+    return banks_info, banks_data, log_returns, yields
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"bars": "business"},
+    {"missing_yields": True},
+    {"sparse_facts": True},
+    {"bars": "business", "missing_yields": True, "sparse_facts": True}
+], ids = ["weekly", "business days", "missing yields", "sparse facts", "business days, missing yields and sparse facts"])
+def test_parity(options):
+    inputs = get_inputs(NUM_BANKS, **options)
+    expected = legacy_panel(*inputs)
+
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(QuarterEngine.build_panel(*inputs), expected)
+
+@pytest.mark.parametrize("bars", ["weekly", "business"])
+@pytest.mark.parametrize("scale", SCALES)
+def test_build_panel(benchmark, scale, bars):
+    inputs = get_inputs(NUM_BANKS * scale, bars, missing_yields = True, sparse_facts = True)
+    benchmark.group = f"build_panel {bars} {scale}x"
+
+    benchmark.pedantic(QuarterEngine.build_panel, args = inputs, rounds = 3)
+
+@pytest.mark.parametrize("bars", ["weekly", "business"])
+@pytest.mark.parametrize("scale", LEGACY_SCALES)
+def test_legacy_panel(benchmark, scale, bars):
+    inputs = get_inputs(NUM_BANKS * scale, bars, missing_yields = True, sparse_facts = True)
+    benchmark.group = f"build_panel {bars} {scale}x"
+
+    benchmark.pedantic(legacy_panel, args = inputs, rounds = 1)
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_bank_index(benchmark, scale):
+    banks_info = get_banks_info(NUM_BANKS * scale)
+    banks_data = generate_bank_data(banks_info)
+
+    benchmark(lambda: [BankIndex(banks_data[x['ticker']]) for x in banks_info])
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_bank_record_lookups(benchmark, scale):
+    banks_info, banks_data, log_returns, _ = get_inputs(NUM_BANKS * scale)
+
+    indexes = [BankIndex(banks_data[x['ticker']]) for x in banks_info]
+    dates = log_returns.index.to_pydatetime()
+
+    # A record for every bank and week, as the per-bar loop used to create
+    benchmark.pedantic(lambda: [BankRecord(x['ticker'], date, previous, 'Q1', 0.0, index, 0, 0) for x, index in zip(banks_info, indexes) for previous, date in zip(dates[:-1], dates[1:])], rounds = 3)
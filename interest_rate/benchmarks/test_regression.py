@@ -0,0 +1,98 @@
+"""
+Parity check and benchmarks of RegressionRunner against statsmodels OLS.
+
+The regressors are shaped like those of the regress stage; y sits near 1e6
+with noise of 1e-4, so the fits only match if the SSR keeps its precision,
+and one regressor is constant on the rows of a subset.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+from regression.regression import RegressionRunner
+from shared.benchmark_suite import SCALES
+
+REGRESSORS = ["Extreme_Interest_Rate", "Period_Interest_Rate", "Margin", "AFS"]
+
+# Bank quarters of the panel: 8 banks over 10 years
+NUM_ROWS = 320
+
+def generate_sample(num_rows, seed = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+
+    sample = pd.DataFrame({
+        "Extreme_Interest_Rate": rng.gamma(2, 0.1, num_rows),
+        "Period_Interest_Rate": rng.normal(0, 0.2, num_rows),
+        "Margin": rng.normal(0.3, 0.1, num_rows),
+        "AFS": rng.normal(0.05, 0.02, num_rows)
+    })
+
+    # No assets for sale on the rows of the upper half of the extreme rates
+    sample.loc[sample["Extreme_Interest_Rate"] >= sample["Extreme_Interest_Rate"].median(), "AFS"] = 0.0
+
+    sample["Return"] = 1e6 + sample[REGRESSORS].to_numpy() @ [-0.02, 0.01, 0.05, -0.1] + rng.normal(0, 1e-4, num_rows)
+
+    return sample
+
+def get_specs(runner, sample) -> list:
+    extreme_median = sample["Extreme_Interest_Rate"].median()
+
+    return [
+        runner.spec("Full Regression"),
+        runner.spec("Restricted", ["Extreme_Interest_Rate", "Period_Interest_Rate"]),
+        runner.spec("Period above 0", mask = sample["Period_Interest_Rate"] >= 0),
+        runner.spec("Extreme above the median", mask = sample["Extreme_Interest_Rate"] >= extreme_median)
+    ]
+
+def reference_fit(sample, spec):
+    """statsmodels OLS of the spec, without the regressors constant on its rows."""
+    rows = sample.iloc[spec.rows] if spec.rows is not None else sample
+    regressors = [x for x in spec.regressors if rows[x].nunique() > 1]
+
+    return sm.OLS(rows["Return"], sm.add_constant(rows[regressors])).fit(), regressors
+
+def test_parity():
+    sample = generate_sample(NUM_ROWS)
+    runner = RegressionRunner(sample, "Return", REGRESSORS)
+    specs = get_specs(runner, sample)
+    results = runner.fit_all(specs)
+
+    for spec, result in zip(specs, results):
+        expected, regressors = reference_fit(sample, spec)
+        kept = [0] + [1 + spec.regressors.index(x) for x in regressors]
+
+        np.testing.assert_allclose(result.params[kept], expected.params, rtol = 1e-6)
+        np.testing.assert_allclose(result.bse[kept], expected.bse, rtol = 1e-6)
+        np.testing.assert_allclose(result.rsquared, expected.rsquared, rtol = 1e-6)
+        assert result.nobs == expected.nobs
+
+        # Regressors constant on the rows are omitted
+        assert np.isnan(np.delete(result.params, kept)).all()
+
+    assert np.isnan(results[-1].params[-1])
+
+def test_processes():
+    sample = generate_sample(NUM_ROWS)
+    runner = RegressionRunner(sample, "Return", REGRESSORS)
+    specs = get_specs(runner, sample)
+
+    for result, expected in zip(runner.fit_all(specs, processes = 2), runner.fit_all(specs)):
+        np.testing.assert_array_equal(result.params, expected.params)
+        np.testing.assert_array_equal(result.bse, expected.bse)
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_fit_all(benchmark, scale):
+    sample = generate_sample(NUM_ROWS * scale)
+    runner = RegressionRunner(sample, "Return", REGRESSORS)
+    specs = get_specs(runner, sample)
+    benchmark.group = f"fit_all {scale}x"
+
+    benchmark(runner.fit_all, specs)
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_statsmodels(benchmark, scale):
+    sample = generate_sample(NUM_ROWS * scale)
+    specs = get_specs(RegressionRunner(sample, "Return", REGRESSORS), sample)
+    benchmark.group = f"fit_all {scale}x"
+
+    benchmark(lambda: [reference_fit(sample, spec) for spec in specs])
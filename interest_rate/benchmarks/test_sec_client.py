@@ -0,0 +1,124 @@
+"""
+Checks and benchmarks of SECClient against a local stub of the SEC API.
+
+The stub answers companyconcept requests by CIK: 'OK' with 200 and an ETag
+(304 when it matches), 'THROTTLED' with one 429 before the 200, 'BLOCKED'
+with 429 every time and 'SLOW' with a 200 after STUB_LATENCY seconds.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from data_ingestion.sec_client import SECClient
+from shared.benchmark_suite import SCALES
+
+ETAG = '"v1"'
+FACTS = [{"end": "2023-12-31", "val": 100, "form": "10-K", "fp": "FY"}]
+
+STUB_LATENCY = 0.05
+NUM_CONCEPTS = 40
+RATE_LIMIT = 20
+
+# Concurrent requests of the benchmarks; one worker waits for every response in turn, so it is not timed at 100x
+MAX_WORKERS = 8
+SERIAL_SCALES = [1, 10]
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests = []
+    throttled = set()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cik, link = self.path.split("/")[-3], self.path.split("/")[-1]
+
+        with __class__.lock:
+            __class__.requests.append((time.monotonic(), cik, link))
+
+        if cik == "BLOCKED" or (cik == "THROTTLED" and link not in __class__.throttled):
+            if cik == "THROTTLED":
+                __class__.throttled.add(link)
+
+            return self.reply(429)
+
+        if cik == "SLOW":
+            time.sleep(STUB_LATENCY)
+
+        if self.headers.get("If-None-Match") == ETAG:
+            return self.reply(304)
+
+        self.reply(200, json.dumps({"units": {"USD": FACTS}}).encode())
+
+    def reply(self, status, body = b""):
+        self.send_response(status)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture(scope = "module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+
+    yield f"http://127.0.0.1:{server.server_port}"
+
+    server.shutdown()
+
+def get_requests(cik):
+    return [x for x in StubHandler.requests if x[1] == cik]
+
+def test_etag_cache(base_url, tmp_path):
+    """200, then 304 served from the cache written with the ETag."""
+    client = SECClient(base_url, cache_folder = str(tmp_path), max_workers = 4, requests_per_second = 1000)
+    start = len(get_requests("OK"))
+
+    assert client.get_concept("OK", "Assets") == FACTS
+    assert client.get_concept("OK", "Assets") == FACTS
+    assert len(get_requests("OK")) - start == 2
+
+def test_retries(base_url, tmp_path):
+    """A 429 is retried; a concept that stays throttled is left out of the batch."""
+    client = SECClient(base_url, cache_folder = str(tmp_path), max_workers = 4, requests_per_second = 1000)
+    results = client.get_concepts([("THROTTLED", "Assets"), ("BLOCKED", "Assets"), ("OK", "Liabilities")])
+
+    assert results[("THROTTLED", "Assets")] == FACTS and len(get_requests("THROTTLED")) == 2
+    assert results[("BLOCKED", "Assets")] == [] and results[("OK", "Liabilities")] == FACTS
+
+def test_connection_error(tmp_path):
+    """No server listening: the concept is left out as well."""
+    client = SECClient("http://127.0.0.1:9", cache_folder = str(tmp_path), max_workers = 1)
+    client.session.adapters["http://"].max_retries.total = 0
+
+    assert client.get_concept("OK", "Equity") == []
+
+def test_rate_limit(base_url, tmp_path):
+    client = SECClient(base_url, cache_folder = str(tmp_path), max_workers = 8, requests_per_second = RATE_LIMIT)
+    start = len(StubHandler.requests)
+
+    client.get_concepts([("OK", f"Rate{i}") for i in range(NUM_CONCEPTS)])
+
+    times = [x[0] for x in StubHandler.requests[start:]]
+
+    # Request i may start no earlier than i / RATE_LIMIT seconds after the first
+    assert max(times) - min(times) >= (NUM_CONCEPTS - 1) / RATE_LIMIT * 0.95
+
+def get_concepts(base_url, folder, workers, num_concepts):
+    client = SECClient(base_url, cache_folder = folder, max_workers = workers, requests_per_second = 1000)
+    return client.get_concepts([("SLOW", f"Concept{i}") for i in range(num_concepts)])
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_get_concepts(benchmark, base_url, tmp_path, scale):
+    benchmark.group = f"get_concepts {scale}x"
+
+    # One round, as a second one would be served from the cache
+    benchmark.pedantic(get_concepts, args = (base_url, str(tmp_path), MAX_WORKERS, NUM_CONCEPTS * scale), rounds = 1)
+
+@pytest.mark.parametrize("scale", SERIAL_SCALES)
+def test_serial_get_concepts(benchmark, base_url, tmp_path, scale):
+    benchmark.group = f"get_concepts {scale}x"
+
+    benchmark.pedantic(get_concepts, args = (base_url, str(tmp_path), 1, NUM_CONCEPTS * scale), rounds = 1)
@@ -4,4 +4,14 @@ SMTP_PORT = 0
 EMAIL_SENDER = ""
 EMAIL_PASSWORD = ""
 
-EMAIL_RECEIVER = ""
\ No newline at end of file
+EMAIL_RECEIVER = ""
+
+# SEC EDGAR allows up to 10 requests per second
+SEC_REQUESTS_PER_SECOND = 10
+SEC_MAX_WORKERS = 8
+
+# Output files written after the panel build: any of "xlsx", "parquet", "csv"
+OUTPUT_FORMATS = ["xlsx"]
+
+# Quarters used to fit the early-warning logit, None for an expanding window
+LOGIT_WINDOW = None
@@ -1,39 +1,85 @@
 import pandas as pd
-import requests
-import yfinance as yf
-from config.config import EMAIL_RECEIVER
-
-BASE_URL = "https://data.sec.gov"
-
-HEADERS = {
-    "Content-Type": "application/json",
-    "Accept-Encoding": "gzip, deflate",
-    "User-Agent": f"BS/1.0 ({EMAIL_RECEIVER})"
-}
+from shared.price_store import PriceStore
+from shared.tracer import Tracer
+from data_ingestion.sec_client import SECClient
 
 class DataIngestion:
+    store = PriceStore()
+    sec_client = SECClient()
+
     @staticmethod
+    @Tracer.traced()
     def download_daily_data(tickers) -> pd.DataFrame:
         """Downloads historical monthly closing price data."""
-        df = yf.download(tickers, period='10y', interval='1wk', auto_adjust=True)
+        end_date = pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+        start_date = end_date - pd.DateOffset(years=10)
 
-        return df['Close']
+        return __class__.store.get_close(tickers, start_date, end_date, '1wk', auto_adjust=True)
 
     @staticmethod
     def download_financial_data(cik: str, link: str):
-        url = f"{BASE_URL}/api/xbrl/companyconcept/{cik}/us-gaap/{link}.json"
+        return __class__.sec_client.get_concept(cik, link)
+
+    @staticmethod
+    @Tracer.traced()
+    def get_bank_data(banks_info: list) -> dict:
+        """Downloads other income, profit and AFS facts of all banks concurrently."""
+        links = {
+            x['ticker']: {
+                'other_income': __class__.get_other_income_links(x['ticker']),
+                'profit': __class__.get_profit_links(x['ticker']),
+                'assets_for_sale': __class__.get_assets_for_sale_links(x['ticker'])
+            }
+            for x in banks_info
+        }
+
+        concepts = [(x['cik'], link) for x in banks_info for key_links in links[x['ticker']].values() for link in key_links]
+        facts = __class__.sec_client.get_concepts(concepts)
+
+        bank_data = {}
 
-        response = requests.get(url = url, headers = HEADERS)
+        for x in banks_info:
+            bank_data[x['ticker']] = {}
 
-        if response.status_code == 200:
-            repos = response.json()
-            return repos.get('units', [])['USD']
-        else:
-            print(f"Failed. Status {response.status_code}. Reason: {response.reason}")
-            return []
+            for key, key_links in links[x['ticker']].items():
+                result = []
+
+                for link in key_links:
+                    result.extend(facts[(x['cik'], link)])
+
+                bank_data[x['ticker']][key] = result
+
+        return bank_data
 
     @staticmethod
     def get_other_income(ticker: str, cik: str) -> list:
+        result = []
+
+        for x in __class__.get_other_income_links(ticker):
+            result.extend(__class__.download_financial_data(cik, x))
+        
+        return result
+
+    @staticmethod
+    def get_profit(ticker: str, cik: str) -> list:
+        result = []
+
+        for x in __class__.get_profit_links(ticker):
+            result.extend(__class__.download_financial_data(cik, x))
+        
+        return result
+
+    @staticmethod
+    def get_assets_for_sale(ticker: str, cik: str) -> list:
+        result = []
+
+        for x in __class__.get_assets_for_sale_links(ticker):
+            result.extend(__class__.download_financial_data(cik, x))
+        
+        return result
+
+    @staticmethod
+    def get_other_income_links(ticker: str) -> list:
         link = []
 
         if ticker in ['JPM', 'C', 'BAC', 'HBAN']:
@@ -45,15 +91,10 @@ class DataIngestion:
         if ticker in ['TFC']:
             link.append('OtherComprehensiveIncomeUnrealizedHoldingGainLossOnSecuritiesArisingDuringPeriodNetOfTax')
         
-        result = []
-
-        for x in link:
-            result.extend(__class__.download_financial_data(cik, x))
-        
-        return result
+        return link
 
     @staticmethod
-    def get_profit(ticker: str, cik: str) -> list:
+    def get_profit_links(ticker: str) -> list:
         link = []
 
         if ticker in ['JPM', 'BAC', 'TFSL', 'HBAN']:
@@ -65,15 +106,10 @@ class DataIngestion:
         if ticker in ['WFC']:
             link.append('IncomeLossFromContinuingOperationsIncludingPortionAttributableToNoncontrollingInterest')
         
-        result = []
-
-        for x in link:
-            result.extend(__class__.download_financial_data(cik, x))
-        
-        return result
+        return link
 
     @staticmethod
-    def get_assets_for_sale(ticker: str, cik: str) -> list:
+    def get_assets_for_sale_links(ticker: str) -> list:
         link = []
 
         if ticker in ['JPM', 'C', 'WFC', 'BAC', 'HBAN']:
@@ -88,9 +124,4 @@ class DataIngestion:
         if ticker in ['HBAN']:
             link.append('MarketableSecuritiesUnrealizedGainLoss')
         
-        result = []
-
-        for x in link:
-            result.extend(__class__.download_financial_data(cik, x))
-        
-        return result
\ No newline at end of file
+        return link
\ No newline at end of file
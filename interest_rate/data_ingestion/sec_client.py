@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from shared.tracer import Tracer
+from config.config import EMAIL_RECEIVER, SEC_MAX_WORKERS, SEC_REQUESTS_PER_SECOND
+
+BASE_URL = "https://data.sec.gov"
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": f"BS/1.0 ({EMAIL_RECEIVER})"
+}
+
+class RateLimiter:
+    """Spaces out calls so that at most requests_per_second start every second."""
+    def __init__(self, requests_per_second: float):
+        self.interval = 1 / requests_per_second
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            wait_time = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+class SECClient:
+    """
+    Fetches XBRL companyconcept data over one pooled HTTP session.
+
+    Requests run concurrently under a shared rate limit. Responses are cached
+    on disk with their ETag/Last-Modified headers, so unchanged concepts are
+    answered by a 304 and served locally.
+    """
+    def __init__(self, base_url=BASE_URL, cache_folder="cache/sec", max_workers=SEC_MAX_WORKERS, requests_per_second=SEC_REQUESTS_PER_SECOND):
+        self.base_url = base_url
+        self.cache_folder = cache_folder
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_second)
+
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_concept(self, cik: str, link: str) -> list:
+        """Returns the USD facts of a single concept."""
+        url = f"{self.base_url}/api/xbrl/companyconcept/{cik}/us-gaap/{link}.json"
+        cached = self.read(cik, link)
+
+        headers = {}
+
+        if cached:
+            if cached.get('etag'):
+                headers["If-None-Match"] = cached['etag']
+            if cached.get('last_modified'):
+                headers["If-Modified-Since"] = cached['last_modified']
+
+        self.rate_limiter.wait()
+
+        # Retries used up (RetryError) or no connection: this concept is left out, not the panel
+        try:
+            response = self.session.get(url = url, headers = headers)
+        except requests.exceptions.RequestException as e:
+            print(f"Failed. {cik} {link}: {e}")
+            return []
+
+        if response.status_code == 304 and cached:
+            Tracer.count_cache(True)
+            return cached['usd']
+
+        Tracer.count_cache(False)
+
+        if response.status_code == 200:
+            repos = response.json()
+            usd = repos.get('units', {}).get('USD', [])
+
+            self.write(cik, link, {
+                'etag': response.headers.get("ETag"),
+                'last_modified': response.headers.get("Last-Modified"),
+                'usd': usd
+            })
+
+            return usd
+
+        print(f"Failed. Status {response.status_code}. Reason: {response.reason}")
+        return []
+
+    def get_concepts(self, concepts: list) -> dict:
+        """Fetches (cik, link) pairs concurrently and returns their facts keyed by the pair."""
+        concepts = list(dict.fromkeys(concepts))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(Tracer.bind(lambda x: self.get_concept(*x)), concepts)
+
+            return dict(zip(concepts, results))
+
+    def get_path(self, cik: str, link: str) -> str:
+        return os.path.join(self.cache_folder, cik, f"{link}.json")
+
+    def read(self, cik: str, link: str):
+        path = self.get_path(cik, link)
+
+        if not os.path.exists(path):
+            return None
+
+        with open(path) as file:
+            return json.load(file)
+
+    def write(self, cik: str, link: str, data: dict):
+        path = self.get_path(cik, link)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # A unique temporary file keeps concurrent writers from clashing
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+
+        with open(temp_path, "w") as file:
+            json.dump(data, file)
+
+        os.replace(temp_path, path)
@@ -1,11 +1,15 @@
-import statsmodels.formula.api as smf
-import numpy as np
-import pandas as pd
-import yfinance as yf
-from datetime import date, timedelta
-from data_ingestion.data_ingestion import DataIngestion
-from models.bank_record import BankRecord
-from smtp.SMTPEmail import SMTPEmail
+import argparse
+import os
+from shared.project import resolve_path
+from shared.tracer import Tracer
+from config.config import OUTPUT_FORMATS, LOGIT_WINDOW, EMAIL_RECEIVER
+
+# Stages that can be run on their own; "all" runs the whole pipeline. "regress"
+# and "alert" read the panel saved by the "panel" stage and only build it if
+# missing, stale or asked to with --refresh.
+STAGES = ["panel", "regress", "alert", "all"]
+
+PANEL_PATH = "output.parquet"
 
 ###########
 # Step 1: Declaration of banks handled in the code
@@ -21,142 +25,180 @@ banks_info = [
     {'ticker': 'TFC', 'cik': 'CIK0000092230'}
 ]
 
-###########
-# Step 2: Prepare companies' returns
-###########
-data = DataIngestion.download_daily_data(list(map(lambda x: x['ticker'], banks_info)))
-log_returns = np.log(data/data.shift(1))[1:]
-
-###########
-# Step 3: Prepare yields
-###########
-yields = DataIngestion.download_daily_data('^TYX')
-diff_yields = yields[1:]
-diff_yields = diff_yields['^TYX']
-
-###########
-# Step 4: Adjust to ensure the number of days is equal
-###########
-log_returns = log_returns.loc[log_returns.index.intersection(diff_yields.index)]
-diff_yields = diff_yields.loc[diff_yields.index.intersection(log_returns.index)]
-
-###########
-# Step 5: Retrieve and create data for regressions
-###########
-df = pd.DataFrame(columns=["Ticker", "Year", "Quarter", "Start", "End", "Return", "Extreme_Interest_Rate", "Period_Interest_Rate", "Margin", "AFS"])
-period = log_returns.index.to_pydatetime()
-
-for x in banks_info:
-    bank_data = {
-        'other_income': DataIngestion.get_other_income(x['ticker'], x['cik']),
-        'profit': DataIngestion.get_profit(x['ticker'], x['cik']),
-        'assets_for_sale': DataIngestion.get_assets_for_sale(x['ticker'], x['cik'])
-    }
-
-    sum_other_income = 0
-    sum_profit = 0
-    previous_date = period[0]
+@Tracer.traced()
+def build_panel():
+    import numpy as np
+    from data_ingestion.data_ingestion import DataIngestion
+    from models.quarter_engine import QuarterEngine
+
+    ###########
+    # Step 2: Prepare companies' returns
+    ###########
+    data = DataIngestion.download_daily_data(list(map(lambda x: x['ticker'], banks_info)))
+    log_returns = np.log(data/data.shift(1))[1:]
+
+    ###########
+    # Step 3: Prepare yields
+    ###########
+    yields = DataIngestion.download_daily_data('^TYX')
+    diff_yields = yields[1:]
+    diff_yields = diff_yields['^TYX']
+
+    ###########
+    # Step 4: Adjust to ensure the number of days is equal
+    ###########
+    log_returns = log_returns.loc[log_returns.index.intersection(diff_yields.index)]
+    diff_yields = diff_yields.loc[diff_yields.index.intersection(log_returns.index)]
+
+    ###########
+    # Step 5: Retrieve and create data for regressions
+    ###########
+    banks_data = DataIngestion.get_bank_data(banks_info)
 
-    fp = previous_date.month // 3 + 1
+    return QuarterEngine.build_panel(banks_info, banks_data, log_returns, diff_yields)
+
+@Tracer.traced()
+def export(df) -> list:
+    from storage.storage import Storage
+
+    ###########
+    # Step 6: Export data, Excel is written in the background
+    ###########
+    # The parquet file is always written, as the regress and alert stages start from it
+    return Storage.save_results(df, 'output', list(dict.fromkeys(OUTPUT_FORMATS + ["parquet"])), sheet_name = 'Banks')
+
+def is_panel_stale() -> bool:
+    import pandas as pd
+
+    # A weekly bar opens every Monday, so a panel saved before the last one misses
+    # at least that bar and any filing since; the cached SEC facts make the rebuild cheap
+    saved = pd.Timestamp.fromtimestamp(os.path.getmtime(PANEL_PATH))
+    latest_bar = pd.Timestamp.today().to_period("W-SUN").start_time
+
+    return saved < latest_bar
+
+@Tracer.traced()
+def load_panel(refresh = False):
+    import pandas as pd
+    from storage.storage import Storage
+
+    # The panel of the last panel stage, so regress and alert download nothing while it is current
+    if os.path.exists(PANEL_PATH) and not refresh:
+        if not is_panel_stale():
+            return pd.read_parquet(PANEL_PATH)
+
+        print(f"Warning: {PANEL_PATH} was saved before the latest weekly bar, rebuilding the panel")
+
+    df = build_panel()
+    Storage.save_results(df, 'output', ["parquet"], sheet_name = 'Banks')
+
+    return df
 
-    item = BankRecord(x['ticker'], period[0], None, 'Q' + str(fp), diff_yields.iloc[0], bank_data, sum_other_income, sum_profit)
+@Tracer.traced()
+def regress(reg_df, regressors):
+    from regression.regression import RegressionRunner
 
-    for y in period:
-        if not (item.start and item.end):
-            fp = y.month // 3 + 1
+    ###########
+    # Step 7: Run additional regressions
+    ###########
+    runner = RegressionRunner(reg_df, "Return", regressors)
 
-            if fp == 4:
-                item = BankRecord(x['ticker'], y, None, 'Q' + str(fp), diff_yields.loc[y], bank_data, sum_other_income, sum_profit)
-            else:
-                item = BankRecord(x['ticker'], y, previous_date, 'Q' + str(fp), diff_yields.loc[y], bank_data, sum_other_income, sum_profit)
-        elif item.end < y:
-            if item.start and item.end:
-                df = pd.concat([df, item.convert_to_df()], ignore_index = True)
+    extreme_quantile = reg_df["Extreme_Interest_Rate"].quantile(0.75)
+    period_quantile = reg_df["Period_Interest_Rate"].quantile(0.75)
 
-            fp = y.month // 3 + 1
+    results = runner.fit_all([
+        runner.spec("Full Regression"),
+        runner.spec("Restricted", ["Extreme_Interest_Rate", "Period_Interest_Rate"]),
+        runner.spec("Extreme 75th percentile", mask = reg_df["Extreme_Interest_Rate"] >= extreme_quantile),
+        runner.spec("Period 75th percentile", mask = reg_df["Period_Interest_Rate"] >= period_quantile)
+    ])
 
-            if fp == 4:
-                q4_start_date = item.end + timedelta(days=1)
+    for res in results:
+        print("\n" + res.summary())
 
-                item = BankRecord(x['ticker'], y, None, 'Q' + str(fp), diff_yields.loc[y], bank_data, sum_other_income, sum_profit)
-                item.start = q4_start_date
+@Tracer.traced()
+def alert(reg_df, regressors):
+    import pandas as pd
+    from datetime import date
+    from regression.walk_forward import WalkForwardLogit
+    from smtp.alert_dispatcher import AlertDispatcher
 
-                sum_other_income = 0
-                sum_profit = 0
-            else:
-                item = BankRecord(x['ticker'], y, previous_date, 'Q' + str(fp), diff_yields.loc[y], bank_data, sum_other_income, sum_profit)
+    ###########
+    # Step 8: Run a walk-forward logistic regression
+    ###########
+    logit_df = reg_df.copy()
+    logit_df.loc[logit_df["Return"] > 0, "Return"] = 1
 
-                if item.start and item.end:
-                    sum_other_income += item.other_income
-                    sum_profit += item.profit
-        else:
-            item.count_return(log_returns[x['ticker']].loc[y])
-            item.set_extreme_interest_rate(diff_yields.loc[y])
-            item.set_last_interest_rate(diff_yields.loc[y])
+    logit_df["Start"] = pd.to_datetime(logit_df["Start"])
+    logit_df["End"] = pd.to_datetime(logit_df["End"])
 
-        previous_date = y
-
-###########
-# Step 6: Export data to Excel
-###########
-df.to_excel('output.xlsx', sheet_name = 'Banks', index = False)
+    # Each quarter is scored only with quarters that ended before it
+    logit = WalkForwardLogit("Return", regressors, window = LOGIT_WINDOW)
+    logit_df["Reg"] = logit.walk_forward(logit_df)
 
-###########
-# Step 7: Run additional regressions
-###########
-reg_df = pd.ExcelFile("output.xlsx").parse()
+    print("\nLogit")
 
-reg_df = reg_df.dropna()
+    if logit.params is not None:
+        print(pd.Series(logit.params, index = ["Intercept"] + regressors))
 
-print("\nFull Regression")
+    ###########
+    # Step 9: Notify about the increased risk
+    ###########
+    current = logit.score_current(logit_df, date.today())
 
-res = smf.ols("Return ~ Extreme_Interest_Rate + Period_Interest_Rate + Margin + AFS", data = reg_df).fit()
-print(res.summary())
+    toSend = logit_df.loc[current.index[current >= 0.3], "Ticker"].unique()
 
-print("\nRestricted")
+    # Alerts are sent in the background while the exports finish
+    dispatcher = AlertDispatcher()
+    dispatcher.add_alerts(EMAIL_RECEIVER, toSend)
+    dispatcher.flush()
 
-res = smf.ols("Return ~ Extreme_Interest_Rate + Period_Interest_Rate", data = reg_df).fit()
-print(res.summary())
+    return dispatcher
 
-print("\nExtreme 75th percentile")
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Interest rate risk of US banks")
+    parser.add_argument("stage", nargs = "?", default = "all", choices = STAGES, help = "stage to run (default: all)")
+    parser.add_argument("--refresh", action = "store_true", help = "rebuild the panel even if the saved one is current (regress and alert stages)")
+    parser.add_argument("--trace", type = resolve_path, help = "write the stage timings to this .json or .csv file")
+    parser.add_argument("--profile", metavar = "STAGE", help = "profile one traced stage: run, a stage function or a download")
+    parser.add_argument("--profiler", default = "cprofile", choices = ["cprofile", "pyinstrument"])
+    args = parser.parse_args(argv)
 
-extreme_quantile = reg_df["Extreme_Interest_Rate"].quantile(0.75)
-res = smf.ols("Return ~ Extreme_Interest_Rate + Period_Interest_Rate + Margin + AFS", data = reg_df.loc[reg_df["Extreme_Interest_Rate"] >= extreme_quantile]).fit()
-print(res.summary())
+    if args.trace or args.profile:
+        Tracer.start(args.profile, args.profiler)
 
-print("\nPeriod 75th percentile")
+    with Tracer.stage("run"):
+        run(args.stage, args.refresh)
 
-period_quantile = reg_df["Period_Interest_Rate"].quantile(0.75)
-res = smf.ols("Return ~ Extreme_Interest_Rate + Period_Interest_Rate + Margin + AFS", data = reg_df.loc[reg_df["Period_Interest_Rate"] >= period_quantile]).fit()
-print(res.summary())
+    if args.trace:
+        Tracer.save(args.trace)
+        print("\n" + Tracer.summary())
 
-###########
-# Step 8: Run a logistic regression
-###########
+def run(stage, refresh = False):
+    from storage.storage import Storage
 
-print("\nLogit")
+    if stage in ("panel", "all"):
+        df = build_panel()
+        exports = export(df)
+    else:
+        df = load_panel(refresh)
+        exports = []
 
-logit_df = reg_df
-logit_df.loc[logit_df["Return"] > 0, "Return"] = 1
+    reg_df = Storage.as_excel_values(df)
+    reg_df = reg_df.dropna()
 
-res = smf.logit("Return ~ Extreme_Interest_Rate + Period_Interest_Rate + Margin + AFS", data = logit_df).fit()
-print(res.summary())
+    regressors = ["Extreme_Interest_Rate", "Period_Interest_Rate", "Margin", "AFS"]
 
-logit_df["Reg"] = res.predict(logit_df).to_frame()
+    if stage in ("regress", "all"):
+        regress(reg_df, regressors)
 
-###########
-# Step 9: Notify about the increased risk
-###########
-logit_df["Start"] = pd.to_datetime(logit_df["Start"])
-logit_df["End"] = pd.to_datetime(logit_df["End"])
+    dispatcher = alert(reg_df, regressors) if stage in ("alert", "all") else None
 
-toSend = logit_df.loc[
-    (logit_df["Start"].dt.date <= date.today()) & 
-    (logit_df["End"].dt.date >= date.today()) &
-    (logit_df["Reg"] >= 0.3),
-    "Ticker"
-].unique()
+    for export_thread in exports:
+        export_thread.join()
 
+    if dispatcher is not None:
+        dispatcher.close()
 
-smtp = SMTPEmail()
-smtp.send_warning(toSend)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
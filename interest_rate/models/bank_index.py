@@ -0,0 +1,63 @@
+import numpy as np
+
+class BankIndex:
+    """XBRL facts of a single bank, parsed once for fast period and value lookups."""
+    def __init__(self, bank_data: dict):
+        profit = bank_data['profit']
+
+        starts = __class__.parse_dates([x['start'] for x in profit])
+        ends = __class__.parse_dates([x['end'] for x in profit])
+
+        # Filing intervals sorted by start; positions keep the original filing order
+        self.positions = np.argsort(starts, kind='stable')
+        self.starts = starts[self.positions]
+        self.ends = ends[self.positions]
+
+        self.other_income = __class__.index_by_period(bank_data['other_income'])
+        self.profit = __class__.index_by_period(profit)
+        self.assets_for_sale = __class__.index_by_end(bank_data['assets_for_sale'])
+
+    @staticmethod
+    def parse_dates(values: list) -> np.ndarray:
+        return np.array(values, dtype='datetime64[D]').astype('datetime64[us]')
+
+    @staticmethod
+    def index_by_period(facts: list) -> dict:
+        """Maps (start, end) to the value of the first fact filed for that period."""
+        starts = __class__.parse_dates([x['start'] for x in facts]).tolist()
+        ends = __class__.parse_dates([x['end'] for x in facts]).tolist()
+
+        index = {}
+
+        for start, end, x in zip(starts, ends, facts):
+            index.setdefault((start, end), x['val'])
+
+        return index
+
+    @staticmethod
+    def index_by_end(facts: list) -> dict:
+        """Maps end to the value of the first fact filed for that date."""
+        ends = __class__.parse_dates([x['end'] for x in facts]).tolist()
+
+        index = {}
+
+        for end, x in zip(ends, facts):
+            index.setdefault(end, x['val'])
+
+        return index
+
+    def find_period(self, date, previous_date=None):
+        """Returns start and end of the first profit filing covering date, starting no earlier than previous_date."""
+        date = np.datetime64(date, 'us')
+
+        lo = np.searchsorted(self.starts, np.datetime64(previous_date, 'us'), 'left') if previous_date else 0
+        hi = np.searchsorted(self.starts, date, 'right')
+
+        candidates = lo + np.flatnonzero(self.ends[lo:hi] >= date)
+
+        if len(candidates) == 0:
+            return None, None
+
+        i = candidates[np.argmin(self.positions[candidates])]
+
+        return self.starts[i].item(), self.ends[i].item()
@@ -0,0 +1,16 @@
+import pandas as pd
+from models.bank_record import BankRecord
+
+class BankPanel:
+    """Collects closed BankRecord quarters and builds the regression panel once."""
+    def __init__(self):
+        self.rows = []
+
+    def append(self, record: BankRecord):
+        self.rows.append(record.to_row())
+
+    def __len__(self):
+        return len(self.rows)
+
+    def to_df(self) -> pd.DataFrame:
+        return pd.DataFrame.from_records(self.rows, columns = BankRecord.COLUMNS)
@@ -1,15 +1,22 @@
 import numpy as np
 import pandas as pd
-from datetime import datetime
 
 class BankRecord:
+    __slots__ = (
+        "ticker", "year", "quarter", "start", "end", "stock_return",
+        "lowest_interest_rate", "highest_interest_rate", "first_interest_rate", "last_interest_rate",
+        "other_income", "profit", "afs"
+    )
+
+    # Column order of the regression panel
+    COLUMNS = ["Ticker", "Year", "Quarter", "Start", "End", "Return", "Extreme_Interest_Rate", "Period_Interest_Rate", "Margin", "AFS", "Profit", "Other_Income"]
+
     def __init__(self, ticker, date, previous_date, fp, interest_rate, bank_data, sum_other_income, sum_profit):
         self.ticker = ticker
         self.year = date.year
         self.quarter = fp
 
-        self.start = __class__.get_start_date(date, previous_date, bank_data)
-        self.end = __class__.get_end_date(date, previous_date, bank_data)
+        self.start, self.end = bank_data.find_period(date, previous_date)
         self.stock_return = 0
         self.lowest_interest_rate = interest_rate
         self.highest_interest_rate = interest_rate
@@ -21,54 +28,6 @@ class BankRecord:
             self.profit = __class__.get_profit(self, bank_data, sum_profit)
             self.afs = __class__.get_afs(self, bank_data)
 
-    def get_start_date(date, previous_date, bank_data) -> datetime:
-        data = list()
-
-        if previous_date:
-            data = list(
-                filter(lambda x: 
-                    datetime.strptime(x['start'], "%Y-%m-%d") <= date and 
-                    datetime.strptime(x['end'], "%Y-%m-%d") >= date and 
-                    datetime.strptime(x['start'], "%Y-%m-%d") >= previous_date
-                , bank_data['profit'])
-            )
-        else:
-            data = list(
-                filter(lambda x: 
-                    datetime.strptime(x['start'], "%Y-%m-%d") <= date and 
-                    datetime.strptime(x['end'], "%Y-%m-%d") >= date
-                , bank_data['profit'])
-            )
-
-        if len(data) > 0:
-            return datetime.strptime(data[0]['start'], "%Y-%m-%d")
-        
-        return None
-    
-    def get_end_date(date, previous_date, bank_data) -> datetime:
-        data = list()
-        
-        if previous_date:
-            data = list(
-                filter(lambda x: 
-                    datetime.strptime(x['start'], "%Y-%m-%d") <= date and 
-                    datetime.strptime(x['end'], "%Y-%m-%d") >= date and 
-                    datetime.strptime(x['start'], "%Y-%m-%d") >= previous_date
-                , bank_data['profit'])
-            )
-        else:
-            data = list(
-                filter(lambda x: 
-                    datetime.strptime(x['start'], "%Y-%m-%d") <= date and 
-                    datetime.strptime(x['end'], "%Y-%m-%d") >= date
-                , bank_data['profit'])
-            )
-
-        if len(data) > 0:
-            return datetime.strptime(data[0]['end'], "%Y-%m-%d")
-        
-        return None
-
     def count_return(self, stock_return):
         if (stock_return >= 0.1 or stock_return <= -0.1):
             self.stock_return += 1
@@ -84,32 +43,32 @@ class BankRecord:
         self.last_interest_rate = interest_rate
     
     def get_other_income(self, bank_data, sum_other_income) -> float:
-        other_income = list(filter(lambda x: x['start'] == self.start.strftime('%Y-%m-%d') and x['end'] == self.end.strftime('%Y-%m-%d'), bank_data['other_income']))
+        other_income = bank_data.other_income.get((self.start, self.end))
 
-        if len(other_income) > 0:
+        if other_income is not None:
             if self.quarter == 'Q4':
-                return other_income[0]['val'] - sum_other_income
+                return other_income - sum_other_income
             else:
-                return other_income[0]['val']
+                return other_income
         
         return 0
     
     def get_profit(self, bank_data, sum_profit) -> float:
-        profit = list(filter(lambda x: x['start'] == self.start.strftime('%Y-%m-%d') and x['end'] == self.end.strftime('%Y-%m-%d'), bank_data['profit']))
+        profit = bank_data.profit.get((self.start, self.end))
 
-        if len(profit) > 0:
+        if profit is not None:
             if self.quarter == 'Q4':
-                return profit[0]['val'] - sum_profit
+                return profit - sum_profit
             else:
-                return profit[0]['val']
+                return profit
         
         return 0
     
     def get_afs(self, bank_data) -> float:
-        assets_for_sale = list(filter(lambda x: x['end'] == self.end.strftime('%Y-%m-%d'), bank_data['assets_for_sale']))
+        assets_for_sale = bank_data.assets_for_sale.get(self.end)
 
-        if len(assets_for_sale) > 0:
-            return assets_for_sale[0]['val']
+        if assets_for_sale is not None:
+            return assets_for_sale
         
         return 0
 
@@ -125,18 +84,21 @@ class BankRecord:
         
         return 0
 
+    def to_row(self) -> tuple:
+        return (
+            self.ticker,
+            self.year,
+            self.quarter,
+            self.start,
+            self.end,
+            self.stock_return,
+            self.highest_interest_rate - self.lowest_interest_rate,
+            self.last_interest_rate - self.first_interest_rate,
+            self.calculate_margin(),
+            self.calculate_afs(),
+            self.profit / 1000,
+            self.other_income / 1000
+        )
+
     def convert_to_df(self) -> pd.DataFrame:
-        return pd.DataFrame({
-            "Ticker" : [self.ticker],
-            "Year" : [self.year],
-            "Quarter" : [self.quarter],
-            "Start" : [self.start],
-            "End" : [self.end],
-            "Return" : [self.stock_return],
-            "Extreme_Interest_Rate" : [self.highest_interest_rate - self.lowest_interest_rate],
-            "Period_Interest_Rate" : [self.last_interest_rate - self.first_interest_rate],
-            "Margin" : [self.calculate_margin()],
-            "Profit" : [self.profit / 1000],
-            "Other_Income" : [self.other_income / 1000],
-            "AFS" : [self.calculate_afs()]
-        })
\ No newline at end of file
+        return pd.DataFrame([self.to_row()], columns = __class__.COLUMNS)
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from models.bank_index import BankIndex
+from models.bank_panel import BankPanel
+from models.bank_record import BankRecord
+
+class QuarterEngine:
+    """
+    Builds the quarterly bank panel without visiting every bar in Python.
+
+    Quarters are found by jumping from one filing end to the next bar after it,
+    so the Python loop runs once per quarter. Bars are then assigned to their
+    quarter and the return counts and yield statistics of all banks are computed
+    with a single set of ufunc reductions.
+    """
+    @staticmethod
+    def build_panel(banks_info: list, banks_data: dict, log_returns: pd.DataFrame, diff_yields: pd.Series) -> pd.DataFrame:
+        period = log_returns.index.to_pydatetime()
+        bar_dates = log_returns.index.values
+
+        rates = diff_yields.reindex(log_returns.index).to_numpy(dtype=float)
+        returns = log_returns[[x['ticker'] for x in banks_info]].to_numpy(dtype=float)
+
+        records = []
+
+        for column, x in enumerate(banks_info):
+            bank_data = BankIndex(banks_data[x['ticker']])
+
+            for item, start, stop in __class__.find_records(x['ticker'], bank_data, period, bar_dates, rates):
+                records.append((item, column, start, stop))
+
+        __class__.aggregate(records, returns, rates)
+
+        panel = BankPanel()
+
+        for item, _, _, _ in records:
+            panel.append(item)
+
+        return panel.to_df()
+
+    @staticmethod
+    def find_records(ticker: str, bank_data: BankIndex, period: np.ndarray, bar_dates: np.ndarray, rates: np.ndarray) -> list:
+        """
+        Returns the closed quarters of a bank with the [start, stop) range of bars counted in each.
+
+        Each quarter opens on a bar, whose yield is the first one, and counts the
+        following bars up to the filing end. The first quarter also counts its opening bar.
+        """
+        records = []
+
+        sum_other_income = 0
+        sum_profit = 0
+
+        fp = period[0].month // 3 + 1
+        item = BankRecord(ticker, period[0], None, 'Q' + str(fp), rates[0], bank_data, sum_other_income, sum_profit)
+
+        next_bar = 0
+        counted_from = 0
+
+        while next_bar < len(period):
+            if not (item.start and item.end):
+                # No filing covers the bar, try again with the next one
+                y = next_bar
+                previous_date = period[max(y - 1, 0)]
+                fp = period[y].month // 3 + 1
+
+                item = BankRecord(ticker, period[y], None if fp == 4 else previous_date, 'Q' + str(fp), rates[y], bank_data, sum_other_income, sum_profit)
+
+                next_bar = counted_from = y + 1
+                continue
+
+            # First bar after the end of the filing period closes the quarter
+            stop = np.searchsorted(bar_dates, np.datetime64(item.end).astype(bar_dates.dtype), 'right')
+
+            if stop >= len(period):
+                break
+
+            records.append((item, counted_from, stop))
+
+            y = stop
+            fp = period[y].month // 3 + 1
+
+            if fp == 4:
+                q4_start_date = item.end + timedelta(days=1)
+
+                item = BankRecord(ticker, period[y], None, 'Q' + str(fp), rates[y], bank_data, sum_other_income, sum_profit)
+                item.start = q4_start_date
+
+                sum_other_income = 0
+                sum_profit = 0
+            else:
+                item = BankRecord(ticker, period[y], period[y - 1], 'Q' + str(fp), rates[y], bank_data, sum_other_income, sum_profit)
+
+                if item.start and item.end:
+                    sum_other_income += item.other_income
+                    sum_profit += item.profit
+
+            next_bar = counted_from = y + 1
+
+        return records
+
+    @staticmethod
+    def aggregate(records: list, returns: np.ndarray, rates: np.ndarray):
+        """Sets the return count and yield statistics of every record from its bars."""
+        if len(records) == 0:
+            return
+
+        columns = np.array([x[1] for x in records])
+        starts = np.array([x[2] for x in records])
+        stops = np.array([x[3] for x in records])
+        first_rates = np.array([x[0].first_interest_rate for x in records], dtype=float)
+
+        # Bar positions of every record laid end to end
+        lengths = stops - starts
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        bars = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+
+        bar_rates = rates[bars]
+        hits = (np.abs(returns[bars, np.repeat(columns, lengths)]) >= 0.1).astype(int)
+
+        counts = np.zeros(len(records), dtype=int)
+        lowest = first_rates.copy()
+        highest = first_rates.copy()
+        last = first_rates.copy()
+
+        non_empty = lengths > 0
+
+        if non_empty.any():
+            segments = offsets[non_empty]
+
+            counts[non_empty] = np.add.reduceat(hits, segments)
+            lowest[non_empty] = np.fmin(lowest[non_empty], np.fmin.reduceat(bar_rates, segments))
+            highest[non_empty] = np.fmax(highest[non_empty], np.fmax.reduceat(bar_rates, segments))
+            last[non_empty] = rates[stops[non_empty] - 1]
+
+        # A missing opening yield is never replaced by a later one
+        lowest[np.isnan(first_rates)] = np.nan
+        highest[np.isnan(first_rates)] = np.nan
+
+        for i, (item, _, _, _) in enumerate(records):
+            item.stock_return = counts[i]
+            item.lowest_interest_rate = lowest[i]
+            item.highest_interest_rate = highest[i]
+            item.last_interest_rate = last[i]
@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from scipy import stats
+from scipy.linalg import cho_factor, cho_solve
+from shared.collinearity import get_independent
+
+@dataclass
+class OLSResult:
+    """Coefficients and nonrobust inference of a single OLS fit."""
+    name: str
+    columns: list
+    params: np.ndarray
+    bse: np.ndarray
+    tvalues: np.ndarray
+    pvalues: np.ndarray
+    nobs: int
+    rsquared: float
+    rsquared_adj: float
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "coef": self.params,
+            "std err": self.bse,
+            "t": self.tvalues,
+            "P>|t|": self.pvalues
+        }, index = self.columns)
+
+    def summary(self) -> str:
+        return (
+            f"{self.name}\n"
+            f"No. Observations: {self.nobs}  R-squared: {self.rsquared:.3f}  Adj. R-squared: {self.rsquared_adj:.3f}\n"
+            f"{self.to_frame().to_string(float_format = lambda x: f'{x:.4f}')}"
+        )
+
+@dataclass
+class Spec:
+    """A model to fit: a subset of the regressors on a subset of the rows."""
+    name: str
+    regressors: list
+    rows: np.ndarray = None
+
+# Design matrix of the worker process, set once by the pool initializer
+_worker_design = None
+
+class RegressionRunner:
+    """
+    Fits many OLS models that share one dependent variable and design matrix.
+
+    The design matrix is built once. Full-sample fits are solved from the
+    cached cross-products; row subsets compute their own. The slopes are
+    solved from the cross-products of the centered data and the SSR from
+    the residuals, so large levels of y do not swamp its variation.
+    Regressors collinear with the intercept or the regressors before them,
+    e.g. constant on a subset of rows, are omitted (NaN) in column order.
+    """
+    def __init__(self, data: pd.DataFrame, dependent: str, regressors: list):
+        self.columns = ["Intercept"] + list(regressors)
+
+        self.X = np.column_stack([np.ones(len(data))] + [data[x].to_numpy(dtype = float) for x in regressors])
+        self.y = data[dependent].to_numpy(dtype = float)
+
+        self.cross_products = __class__.get_cross_products(self.X, self.y)
+
+    def spec(self, name: str, regressors: list = None, mask = None) -> Spec:
+        """Creates a Spec; mask is a boolean row filter evaluated once here."""
+        regressors = regressors if regressors else self.columns[1:]
+        rows = np.flatnonzero(np.asarray(mask)) if mask is not None else None
+
+        return Spec(name, regressors, rows)
+
+    def fit(self, spec: Spec) -> OLSResult:
+        return __class__.fit_spec(self.X, self.y, self.columns, spec, self.cross_products)
+
+    def fit_all(self, specs: list, processes: int = None) -> list:
+        """Fits all specs, in a process pool when processes is given."""
+        if not processes:
+            return [self.fit(spec) for spec in specs]
+
+        with ProcessPoolExecutor(max_workers = processes, initializer = __class__.init_worker, initargs = (self.X, self.y, self.columns)) as executor:
+            return list(executor.map(__class__.fit_in_worker, specs, chunksize = max(1, len(specs) // (4 * processes))))
+
+    @staticmethod
+    def init_worker(X: np.ndarray, y: np.ndarray, columns: list):
+        global _worker_design
+        _worker_design = (X, y, columns, __class__.get_cross_products(X, y))
+
+    @staticmethod
+    def fit_in_worker(spec: Spec) -> OLSResult:
+        X, y, columns, cross_products = _worker_design
+        return __class__.fit_spec(X, y, columns, spec, cross_products)
+
+    @staticmethod
+    def get_cross_products(X: np.ndarray, y: np.ndarray) -> tuple:
+        """X'X, which shows the collinear columns, and the cross-products of the regressors and y centered on their means."""
+        means = X.mean(axis = 0)
+        Xc, yc = X[:, 1:] - means[1:], y - y.mean()
+
+        return X.T @ X, Xc.T @ Xc, Xc.T @ yc, yc @ yc, means, y.mean(), len(y)
+
+    @staticmethod
+    def fit_spec(X: np.ndarray, y: np.ndarray, columns: list, spec: Spec, cross_products: tuple) -> OLSResult:
+        if spec.rows is not None:
+            X, y = X[spec.rows], y[spec.rows]
+            cross_products = __class__.get_cross_products(X, y)
+
+        XtX, XcXc, Xcyc, centered_tss, means, y_mean, nobs = cross_products
+
+        # Restricted models use the matching block of the cross-products
+        requested = [0] + [columns.index(x) for x in spec.regressors]
+        selected = [requested[i] for i in get_independent(XtX[np.ix_(requested, requested)])]
+        slopes = [x - 1 for x in selected[1:]]
+
+        factor = cho_factor(XcXc[np.ix_(slopes, slopes)])
+        b = cho_solve(factor, Xcyc[slopes])
+        params = np.concatenate([[y_mean - means[selected[1:]] @ b], b])
+
+        df_model = len(selected) - 1
+        df_resid = nobs - len(selected)
+
+        resid = y - X[:, selected] @ params
+        ssr = resid @ resid
+
+        # The intercept's variance adds that of the regressors' means to 1/n
+        inverse = cho_solve(factor, np.eye(len(slopes)))
+        variances = np.concatenate([[1 / nobs + means[selected[1:]] @ inverse @ means[selected[1:]]], np.diag(inverse)])
+
+        bse = np.sqrt(variances * ssr / df_resid)
+        tvalues = params / bse
+        pvalues = 2 * stats.t.sf(np.abs(tvalues), df_resid)
+
+        rsquared = 1 - ssr / centered_tss
+        rsquared_adj = 1 - (1 - rsquared) * (nobs - 1) / df_resid if df_model > 0 else rsquared
+
+        # Omitted regressors are reported as NaN
+        values = np.full((4, len(requested)), np.nan)
+        values[:, [requested.index(x) for x in selected]] = [params, bse, tvalues, pvalues]
+
+        return OLSResult(spec.name, ["Intercept"] + list(spec.regressors), *values, nobs, rsquared, rsquared_adj)
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from shared.tracer import Tracer
+
+class WalkForwardLogit:
+    """
+    Point-in-time logit: the rows of every quarter are scored with a model
+    fitted only on quarters that ended before it, on an expanding window or on
+    the last window quarters. Each fit starts from the previous coefficients.
+
+    Coefficients are cached on disk by a fingerprint of the training rows and
+    the probabilities of every scored quarter with the fingerprint they were
+    scored with, so a rerun only fits and scores the quarters whose data or
+    training window has changed. Fingerprints come from one hash per quarter,
+    so checking a quarter does not hash its whole training window again.
+    Entries the last run did not use are dropped when the cache is saved.
+    """
+    def __init__(self, dependent: str, regressors: list, window: int = None, min_obs: int = 30, cache_path = "cache/logit.json"):
+        self.dependent = dependent
+        self.regressors = list(regressors)
+        self.window = window
+        self.min_obs = min_obs
+        self.cache_path = cache_path
+
+        self.cache = {}
+        self.quarters = {}
+        self.used = set()
+        self.params = None
+
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path) as file:
+                state = json.load(file)
+
+            self.cache = state.get("params", {})
+            self.quarters = state.get("quarters", {})
+
+    def walk_forward(self, data: pd.DataFrame) -> pd.Series:
+        """Returns the point-in-time probability of every row."""
+        probabilities = pd.Series(np.nan, index = data.index)
+        digests = self.get_digests(data)
+        quarters = {}
+
+        for end in digests:
+            rows = data["End"] == end
+            train_ends = self.get_training_ends(list(digests), end)
+
+            key = self.get_key(digests, train_ends)
+            quarter_key = hashlib.sha1(f"{key}{digests[end]}{self.min_obs}".encode()).hexdigest()
+            stored = self.quarters.get(end.isoformat())
+
+            if stored and stored["key"] == quarter_key:
+                Tracer.count_cache(True)
+                quarters[end.isoformat()] = stored
+                probabilities[rows] = np.array(stored["probabilities"], dtype = float)
+
+                # The next fit, if any, starts from these coefficients
+                if key in self.cache:
+                    self.params = np.array(self.cache[key])
+                    self.used.add(key)
+
+                continue
+
+            params = self.fit(data.loc[data["End"].isin(train_ends)], key)
+
+            if params is not None:
+                probabilities[rows] = self.predict(data.loc[rows], params)
+
+            quarters[end.isoformat()] = {"key": quarter_key, "params": key, "probabilities": probabilities[rows].tolist()}
+
+        # Quarters no longer in the data are dropped
+        self.quarters = quarters
+        self.save_cache()
+
+        return probabilities
+
+    def score_current(self, data: pd.DataFrame, today) -> pd.Series:
+        """Returns probabilities of the quarters open on today, using only quarters that ended before it."""
+        today = pd.Timestamp(today)
+        current = data.loc[(data["Start"] <= today) & (data["End"] >= today)]
+
+        digests = self.get_digests(data)
+        train_ends = self.get_training_ends(list(digests), today)
+
+        params = self.fit(data.loc[data["End"].isin(train_ends)], self.get_key(digests, train_ends))
+        self.save_cache()
+
+        if params is None:
+            return pd.Series(np.nan, index = current.index)
+
+        return pd.Series(self.predict(current, params), index = current.index)
+
+    def get_training_ends(self, ends: list, as_of) -> list:
+        """Ends of the quarters a model used on as_of is fitted on, oldest first."""
+        ends = [x for x in ends if x < as_of]
+
+        return ends[-self.window:] if self.window else ends
+
+    def fit(self, train: pd.DataFrame, key: str):
+        """Fits the logit, or takes the coefficients cached under key. Returns None if the window cannot be fitted."""
+        if len(train) < self.min_obs or train[self.dependent].nunique() < 2:
+            return None
+
+        Tracer.count_cache(key in self.cache)
+        self.used.add(key)
+
+        if key in self.cache:
+            self.params = np.array(self.cache[key])
+            return self.params
+
+        # statsmodels is only loaded when a window is not in the cache
+        import statsmodels.api as sm
+        from statsmodels.tools.sm_exceptions import PerfectSeparationError
+
+        start_params = self.params if self.params is not None else None
+
+        try:
+            res = sm.Logit(train[self.dependent].to_numpy(dtype = float), self.get_design(train)).fit(start_params = start_params, disp = 0)
+        except (np.linalg.LinAlgError, PerfectSeparationError):
+            return None
+
+        self.params = res.params
+        self.cache[key] = self.params.tolist()
+
+        return self.params
+
+    def predict(self, data: pd.DataFrame, params: np.ndarray) -> np.ndarray:
+        return 1 / (1 + np.exp(-self.get_design(data) @ params))
+
+    def get_design(self, data: pd.DataFrame) -> np.ndarray:
+        return np.column_stack([np.ones(len(data))] + [data[x].to_numpy(dtype = float) for x in self.regressors])
+
+    def get_digests(self, data: pd.DataFrame) -> dict:
+        """A hash of the rows of every quarter, by quarter end, oldest first."""
+        hashes = pd.util.hash_pandas_object(data[[self.dependent] + self.regressors], index = False).to_numpy()
+
+        return {pd.Timestamp(end): hashlib.sha1(hashes[positions].tobytes()).hexdigest() for end, positions in sorted(data.groupby("End").indices.items())}
+
+    def get_key(self, digests: dict, train_ends: list) -> str:
+        """Fingerprint of the training rows of the given quarters."""
+        return hashlib.sha1("".join(digests[x] for x in train_ends).encode() + str(self.regressors).encode()).hexdigest()
+
+    def save_cache(self):
+        if not self.cache_path:
+            return
+
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok = True)
+
+        # Coefficients neither fitted nor read this run, nor behind a stored quarter, no longer match the data
+        keys = self.used | {x["params"] for x in self.quarters.values()}
+        state = {"params": {key: params for key, params in self.cache.items() if key in keys}, "quarters": self.quarters}
+
+        with open(self.cache_path + ".tmp", "w") as file:
+            json.dump(state, file)
+
+        os.replace(self.cache_path + ".tmp", self.cache_path)
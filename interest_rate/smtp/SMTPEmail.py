@@ -1,41 +1,14 @@
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from config.config import SMTP_SERVER, SMTP_PORT, EMAIL_SENDER, EMAIL_PASSWORD, EMAIL_RECEIVER
+from config.config import EMAIL_RECEIVER
+from smtp.alert_dispatcher import AlertDispatcher
 
 class SMTPEmail:
     @staticmethod
     def send_email(subject, body):
-        try:
-            msg = MIMEMultipart()
-            msg["From"] = EMAIL_SENDER
-            msg["To"] = EMAIL_RECEIVER
-            msg["Subject"] = subject
-            msg.attach(MIMEText(body, "plain"))
-
-            server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-
-            server.starttls()
-            server.login(EMAIL_SENDER, EMAIL_PASSWORD)
-            server.sendmail(EMAIL_SENDER, EMAIL_RECEIVER, msg.as_string())
-            server.quit()
-            
-            print("Email sent successfully!")
-        except Exception as e:
-            print(f"Error: {e}")
+        with AlertDispatcher() as dispatcher:
+            dispatcher.send(EMAIL_RECEIVER, subject, body)
 
     @staticmethod
     def send_warning(tickers: list):
         if len(tickers) > 0:
-            subject = "Warning! Higher probability!"
-            body = "Probability has increased for companies: "
-
-            for i, t in enumerate(tickers):
-                if i != 0:
-                    body += ", "
-            
-                body += t
-
-            body += "."
-
-            __class__.send_email(subject, body)
\ No newline at end of file
+            with AlertDispatcher() as dispatcher:
+                dispatcher.add_alerts(EMAIL_RECEIVER, tickers)
@@ -0,0 +1,219 @@
+import json
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+from datetime import date
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from config.config import SMTP_SERVER, SMTP_PORT, EMAIL_SENDER, EMAIL_PASSWORD
+
+logger = logging.getLogger(__name__)
+
+class SMTPConnection:
+    """A reusable SMTP session, opened on first use and reopened after a disconnect."""
+    def __init__(self, server, port, sender, password, use_tls=True):
+        self.server = server
+        self.port = port
+        self.sender = sender
+        self.password = password
+        self.use_tls = use_tls
+        self.smtp = None
+
+    def connect(self):
+        # The session is only kept once TLS and the login succeed, so a failed
+        # STARTTLS can never leave a plaintext session for the next message
+        smtp = smtplib.SMTP(self.server, self.port)
+
+        try:
+            if self.use_tls:
+                smtp.starttls()
+
+            if self.password:
+                smtp.login(self.sender, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+
+        self.smtp = smtp
+
+    def send(self, recipients: list, message: str):
+        if self.smtp is None:
+            self.connect()
+
+        try:
+            self.smtp.sendmail(self.sender, recipients, message)
+        except smtplib.SMTPServerDisconnected:
+            self.reset()
+            self.connect()
+            self.smtp.sendmail(self.sender, recipients, message)
+
+    def reset(self):
+        """Drops the session without QUIT, as after an error its state is unknown."""
+        if self.smtp is not None:
+            self.smtp.close()
+            self.smtp = None
+
+    def close(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+
+            self.smtp = None
+
+class AlertDispatcher:
+    """
+    Sends risk alerts as one digest per recipient over a single SMTP session.
+
+    Digests are sent by a background thread, so callers only enqueue them.
+    Tickers already sent to a recipient in the current quarter, or queued by
+    an earlier flush, are skipped; the sent alerts are kept in state_path
+    between runs. The queued tickers and the metrics are updated by the
+    caller and the background thread, always under the lock. The metrics
+    keep the last error of each recipient.
+    """
+    SUBJECT = "Warning! Higher probability!"
+
+    def __init__(self, server=SMTP_SERVER, port=SMTP_PORT, sender=EMAIL_SENDER, password=EMAIL_PASSWORD, use_tls=True, state_path="cache/alerts_sent.json"):
+        self.connection = SMTPConnection(server, port, sender, password, use_tls)
+        self.sender = sender
+        self.state_path = state_path
+        self.quarter = __class__.get_quarter(date.today())
+
+        self.pending = {}
+        self.queued = {}
+        self.sent = __class__.load_state(state_path, self.quarter)
+        self.lock = threading.Lock()
+
+        self.metrics = {'sent': 0, 'failed': 0, 'skipped': 0, 'total_latency': 0.0, 'max_latency': 0.0, 'errors': {}}
+
+        self.queue = queue.Queue()
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add_alerts(self, recipient: str, tickers):
+        """Buffers alerts for a recipient until the next flush."""
+        # Keys of a dict keep the first order of the tickers without duplicates
+        self.pending.setdefault(recipient, {}).update(dict.fromkeys(tickers))
+
+    def flush(self):
+        """Enqueues one digest per recipient with the tickers not yet sent this quarter nor queued."""
+        for recipient, tickers in self.pending.items():
+            with self.lock:
+                queued = self.queued.setdefault(recipient, set())
+                already_sent = set(self.sent.get(recipient, []))
+
+                new_tickers = [t for t in tickers if t not in already_sent and t not in queued]
+                queued.update(new_tickers)
+                self.metrics['skipped'] += len(tickers) - len(new_tickers)
+
+            if len(new_tickers) > 0:
+                self.send(recipient, self.SUBJECT, __class__.get_warning_body(new_tickers), new_tickers)
+
+        self.pending = {}
+
+    def get_metrics(self) -> dict:
+        """A consistent copy of the metrics, safe to read while the background thread sends."""
+        with self.lock:
+            return {**self.metrics, 'errors': dict(self.metrics['errors'])}
+
+    def send(self, recipient: str, subject: str, body: str, tickers: list = None):
+        """Enqueues a single message."""
+        self.queue.put((recipient, subject, body, tickers or []))
+
+    def close(self):
+        """Sends everything still buffered or queued and closes the session."""
+        self.flush()
+        self.queue.put(None)
+        self.worker.join()
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+
+            if item is None:
+                break
+
+            recipient, subject, body, tickers = item
+            start = time.perf_counter()
+
+            try:
+                self.connection.send([recipient], __class__.build_message(self.sender, recipient, subject, body))
+            except (smtplib.SMTPException, OSError) as e:
+                # The next message starts from a new session
+                self.connection.reset()
+
+                # The tickers are no longer queued, so a later flush sends them again
+                with self.lock:
+                    self.queued.get(recipient, set()).difference_update(tickers)
+                    self.metrics['failed'] += 1
+                    self.metrics['errors'][recipient] = e
+
+                logger.error("Alert to %s failed: %s", recipient, e)
+                continue
+
+            latency = time.perf_counter() - start
+
+            logger.info("Alert sent to %s", recipient)
+
+            with self.lock:
+                self.metrics['sent'] += 1
+                self.metrics['total_latency'] += latency
+                self.metrics['max_latency'] = max(self.metrics['max_latency'], latency)
+
+                if tickers:
+                    self.queued.get(recipient, set()).difference_update(tickers)
+                    self.sent.setdefault(recipient, []).extend(tickers)
+                    self.save_state()
+
+        self.connection.close()
+
+    @staticmethod
+    def build_message(sender: str, recipient: str, subject: str, body: str) -> str:
+        msg = MIMEMultipart()
+        msg["From"] = sender
+        msg["To"] = recipient
+        msg["Subject"] = subject
+        msg.attach(MIMEText(body, "plain"))
+
+        return msg.as_string()
+
+    @staticmethod
+    def get_warning_body(tickers: list) -> str:
+        return "Probability has increased for companies: " + ", ".join(tickers) + "."
+
+    @staticmethod
+    def get_quarter(day: date) -> str:
+        return f"{day.year}Q{(day.month - 1) // 3 + 1}"
+
+    @staticmethod
+    def load_state(state_path: str, quarter: str) -> dict:
+        if not state_path or not os.path.exists(state_path):
+            return {}
+
+        with open(state_path) as file:
+            state = json.load(file)
+
+        # Alerts from previous quarters can be sent again
+        return state.get(quarter, {})
+
+    def save_state(self):
+        if not self.state_path:
+            return
+
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+
+        with open(self.state_path + ".tmp", "w") as file:
+            json.dump({self.quarter: self.sent}, file)
+
+        os.replace(self.state_path + ".tmp", self.state_path)
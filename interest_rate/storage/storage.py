@@ -0,0 +1,61 @@
+import threading
+import numpy as np
+import pandas as pd
+
+class Storage:
+    @staticmethod
+    def save_results(data: pd.DataFrame, name: str, formats: list, sheet_name: str) -> list:
+        """Saves results in the given formats. Excel files are written in a background thread."""
+        threads = []
+
+        for file_format in formats:
+            filename = f"{name}.{file_format}"
+
+            if file_format == "xlsx":
+                threads.append(__class__.save_to_excel_in_background(data, filename, sheet_name))
+            elif file_format == "parquet":
+                data.to_parquet(filename, index = False)
+            elif file_format == "csv":
+                data.to_csv(filename, index = False)
+            else:
+                raise ValueError(f"Unsupported output format: {file_format}")
+
+        return threads
+
+    @staticmethod
+    def save_to_excel(data: pd.DataFrame, filename: str, sheet_name: str):
+        """Streams rows into a write-only workbook."""
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only = True)
+        sheet = workbook.create_sheet(sheet_name)
+
+        sheet.append(list(data.columns))
+
+        for row in data.astype(object).where(data.notna(), None).itertuples(index = False):
+            sheet.append(row)
+
+        workbook.save(filename)
+
+    @staticmethod
+    def save_to_excel_in_background(data: pd.DataFrame, filename: str, sheet_name: str) -> threading.Thread:
+        thread = threading.Thread(target = __class__.save_to_excel, args = (data.copy(), filename, sheet_name))
+        thread.start()
+
+        return thread
+
+    @staticmethod
+    def as_excel_values(data: pd.DataFrame) -> pd.DataFrame:
+        """Returns the values an Excel round trip would give back: openpyxl keeps 16 significant digits."""
+        data = data.copy()
+
+        for column in data.select_dtypes(include = "float").columns:
+            values = data[column].to_numpy()
+            finite = np.isfinite(values)
+
+            values = values.copy()
+            values[finite] = np.char.mod("%.16g", values[finite]).astype(float)
+
+            data[column] = values
+
+        return data
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from monitoring.monitoring import PortfolioOptimization
+from risk_management.covariance import CovarianceEstimator
+from config.config import RISK_FREE_RATE
+
+@dataclass(frozen=True)
+class BacktestConfig:
+    """Estimation window and rebalancing rules of one backtest."""
+    window: int = 60
+    expanding: bool = False
+    rebalance_every: int = 1
+    risk_free_rate: float = RISK_FREE_RATE
+    transaction_cost: float = 0.001
+    max_weight: float = 1.0
+    covariance_method: str = "sample"
+
+@dataclass
+class BacktestResult:
+    """Monthly returns, rebalanced weights and annualized statistics of one backtest."""
+    config: BacktestConfig
+    returns: pd.DataFrame
+    weights: pd.DataFrame
+
+    def summary(self) -> pd.Series:
+        net = self.returns["Net"]
+        years = len(net) / 12
+
+        annual_return = net.mean() * 12
+        annual_volatility = net.std() * np.sqrt(12)
+
+        return pd.Series({
+            "Return": annual_return,
+            "Volatility": annual_volatility,
+            "Sharpe": (annual_return - self.config.risk_free_rate) / annual_volatility,
+            "Turnover": self.returns["Turnover"].sum() / years,
+            "Cost": self.returns["Cost"].sum() / years
+        })
+
+# Monthly returns of the worker process, set once by the pool initializer
+_worker_returns = None
+
+class Backtest:
+    """
+    Out-of-sample backtest of the maximum Sharpe ratio portfolio.
+
+    At every rebalancing month the weights are fitted on the previous window
+    months (or all previous months when expanding) and held, drifting with
+    prices, until the next rebalancing. The covariance estimator is moved
+    along the months with rank-one updates and each solve starts from the
+    previous weights. Returns, drift, turnover and costs of all holding
+    periods are then computed at once from cumulative log returns.
+    """
+    @staticmethod
+    def run(monthly_returns: pd.DataFrame, config: BacktestConfig = BacktestConfig()) -> BacktestResult:
+        returns = np.asarray(monthly_returns, dtype=float)
+        num_months, num_assets = returns.shape
+
+        if config.window >= num_months:
+            raise ValueError(f"Window of {config.window} months leaves no months to test out of {num_months}")
+
+        starts = np.arange(config.window, num_months, config.rebalance_every)
+        weights = __class__.get_weights(returns, starts, config)
+
+        # Growth of each asset since the start of its holding period
+        log_growth = np.vstack([np.zeros(num_assets), np.cumsum(np.log1p(returns), axis=0)])
+        period = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, num_months)))
+        months = np.arange(config.window, num_months)
+
+        growth = np.exp(log_growth[months + 1] - log_growth[starts[period]])
+        value = (weights[period] * growth).sum(axis=1)
+
+        first_month = np.r_[True, period[1:] != period[:-1]]
+        previous_value = np.where(first_month, 1.0, np.roll(value, 1))
+        gross = value / previous_value - 1
+
+        # Weights at the end of each holding period, before the next rebalancing
+        last_month = np.r_[first_month[1:], True]
+        drifted = weights * growth[last_month] / value[last_month][:, np.newaxis]
+
+        turnover = np.zeros(len(months))
+        turnover[first_month] = np.abs(weights - np.vstack([np.zeros(num_assets), drifted[:-1]])).sum(axis=1)
+        cost = config.transaction_cost * turnover
+
+        index = monthly_returns.index[months] if isinstance(monthly_returns, pd.DataFrame) else months
+        columns = monthly_returns.columns if isinstance(monthly_returns, pd.DataFrame) else range(num_assets)
+
+        return BacktestResult(
+            config=config,
+            returns=pd.DataFrame({"Gross": gross, "Turnover": turnover, "Cost": cost, "Net": gross - cost}, index=index),
+            weights=pd.DataFrame(weights, index=index[starts - config.window], columns=columns)
+        )
+
+    @staticmethod
+    def get_weights(returns: np.ndarray, starts: np.ndarray, config: BacktestConfig) -> np.ndarray:
+        """Optimal weights at each rebalancing month, fitted on the months before it."""
+        estimator = CovarianceEstimator(config.covariance_method).fit(returns[:config.window])
+        first, last = 0, config.window
+
+        weights = np.empty((len(starts), returns.shape[1]))
+        previous = None
+
+        for k, start in enumerate(starts):
+            for t in range(last, start):
+                estimator.update(returns[t])
+            last = start
+
+            if not config.expanding:
+                for t in range(first, start - config.window):
+                    estimator.remove(returns[t])
+                first = max(first, start - config.window)
+
+            previous = PortfolioOptimization.optimize_portfolio(
+                estimator.mean(),
+                estimator.covariance(),
+                config.risk_free_rate,
+                initial_weights=previous,
+                max_weight=config.max_weight
+            )
+            weights[k] = previous
+
+        return weights
+
+    @staticmethod
+    def sweep(monthly_returns: pd.DataFrame, configs: list, processes: int = None) -> tuple:
+        """
+        Runs one backtest per config, in a process pool when processes is given.
+
+        Returns the results and a table of their summaries, one row per config.
+        """
+        if not processes:
+            results = [__class__.run(monthly_returns, config) for config in configs]
+        else:
+            with ProcessPoolExecutor(max_workers=processes, initializer=__class__.init_worker, initargs=(monthly_returns,)) as executor:
+                results = list(executor.map(__class__.run_in_worker, configs))
+
+        summary = pd.DataFrame([{**asdict(result.config), **result.summary()} for result in results])
+        return results, summary
+
+    @staticmethod
+    def init_worker(monthly_returns: pd.DataFrame):
+        global _worker_returns
+        _worker_returns = monthly_returns
+
+    @staticmethod
+    def run_in_worker(config: BacktestConfig) -> BacktestResult:
+        return __class__.run(_worker_returns, config)
@@ -0,0 +1,16 @@
+"""
+Deterministic synthetic inputs for the benchmarks, so no downloads are needed.
+"""
+import numpy as np
+import pandas as pd
+
+NUM_MONTHS = 300
+
+def generate_returns(num_assets, num_months=NUM_MONTHS, seed=0):
+    """Generates synthetic monthly returns driven by a market factor."""
+    rng = np.random.default_rng(seed)
+    betas = rng.uniform(0.5, 1.5, num_assets)
+    market = rng.normal(0.006, 0.04, num_months)
+    returns = np.outer(market, betas) + rng.normal(0.002, 0.06, (num_months, num_assets)) * rng.uniform(0.5, 1.5, num_assets)
+
+    return pd.DataFrame(returns, columns=[f"A{i}" for i in range(num_assets)])
@@ -0,0 +1,82 @@
+"""
+Compares scoring portfolios one call at a time with the batched PortfolioBatch.
+
+The loop calls PortfolioOptimization.portfolio_performance and the
+RiskManagement VaR and CVaR functions for every weight vector, on the pandas
+inputs, as main.py does for a single portfolio.
+"""
+import numpy as np
+import pytest
+from config.config import RISK_FREE_RATE
+from monitoring.monitoring import PortfolioOptimization
+from risk_management.portfolio_batch import PortfolioBatch
+from risk_management.risk_management import RiskManagement
+from benchmarks.synthetic import generate_returns
+from shared.benchmark_suite import SCALES
+
+# Tickers in config.py
+NUM_ASSETS = 8
+
+# Portfolios scored per call
+NUM_PORTFOLIOS = 1000
+
+# Portfolios of the feasible set, of 50 assets, and its chunks
+NUM_RANDOM_PORTFOLIOS = 1000000
+CHUNK_SIZES = [1000, 10000, 100000]
+
+def score_loop(weights, monthly_returns, mean_returns, cov_matrix):
+    rows = []
+
+    for w in weights:
+        annual_return, annual_volatility = PortfolioOptimization.portfolio_performance(w, mean_returns, cov_matrix)
+        portfolio_mean, portfolio_std_dev = RiskManagement.calculate_portfolio_metrics(monthly_returns, w)
+
+        rows.append([
+            annual_return,
+            annual_volatility,
+            (annual_return - RISK_FREE_RATE) / annual_volatility,
+            RiskManagement.calculate_var(portfolio_mean, portfolio_std_dev, 0.95),
+            RiskManagement.calculate_cvar(portfolio_mean, portfolio_std_dev, 0.95),
+            RiskManagement.calculate_var(portfolio_mean, portfolio_std_dev, 0.99),
+            RiskManagement.calculate_cvar(portfolio_mean, portfolio_std_dev, 0.99)
+        ])
+
+    return np.array(rows)
+
+def get_inputs(num_assets):
+    monthly_returns = generate_returns(num_assets)
+    weights = np.random.default_rng(0).dirichlet(np.ones(num_assets), NUM_PORTFOLIOS)
+
+    return monthly_returns, monthly_returns.mean(), monthly_returns.cov(), weights
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_parity(scale):
+    monthly_returns = generate_returns(NUM_ASSETS * scale)
+    batch = PortfolioBatch(monthly_returns.mean(), monthly_returns.cov(), RISK_FREE_RATE)
+    weights = next(batch.random_portfolios(50, alpha=0.5, seed=1))
+
+    expected = score_loop(weights, monthly_returns, monthly_returns.mean(), monthly_returns.cov())
+    np.testing.assert_allclose(batch.evaluate(weights).to_numpy(), expected, rtol=1e-10)
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_score_loop(benchmark, scale):
+    monthly_returns, mean_returns, cov_matrix, weights = get_inputs(NUM_ASSETS * scale)
+    benchmark.group = f"score {NUM_PORTFOLIOS} portfolios {scale}x"
+
+    benchmark.pedantic(score_loop, args=(weights, monthly_returns, mean_returns, cov_matrix), rounds=3)
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_portfolio_batch(benchmark, scale):
+    _, mean_returns, cov_matrix, weights = get_inputs(NUM_ASSETS * scale)
+    benchmark.group = f"score {NUM_PORTFOLIOS} portfolios {scale}x"
+
+    # Factoring the covariance is part of every batched call
+    benchmark(lambda: PortfolioBatch(mean_returns, cov_matrix, RISK_FREE_RATE).evaluate(weights))
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_feasible_set(benchmark, chunk_size):
+    monthly_returns = generate_returns(50)
+    batch = PortfolioBatch(monthly_returns.mean(), monthly_returns.cov(), RISK_FREE_RATE)
+    benchmark.group = f"feasible set of {NUM_RANDOM_PORTFOLIOS} portfolios"
+
+    benchmark.pedantic(batch.feasible_set, args=(NUM_RANDOM_PORTFOLIOS,), kwargs={"chunk_size": chunk_size, "seed": 0}, rounds=1)
@@ -0,0 +1,71 @@
+"""
+Compares the active-set QP Sharpe maximization with the previous SLSQP solve.
+"""
+import numpy as np
+import pytest
+from scipy.optimize import minimize
+from config.config import RISK_FREE_RATE
+from monitoring.monitoring import PortfolioOptimization
+from benchmarks.synthetic import generate_returns
+from shared.benchmark_suite import SCALES
+
+# Tickers in config.py
+NUM_ASSETS = 8
+
+# SLSQP with finite-difference gradients takes minutes on hundreds of assets, so it is not run at 100x
+LEGACY_SCALES = [1, 10]
+
+def legacy_optimize_portfolio(mean_returns, cov_matrix, risk_free_rate):
+    """SLSQP with finite-difference gradients, as previously used."""
+    num_assets = len(mean_returns)
+    constraints = {'type': 'eq', 'fun': lambda x: np.sum(x) - 1}
+    bounds = tuple((0.0, 1.0) for _ in range(num_assets))
+
+    result = minimize(
+        PortfolioOptimization.negative_sharpe_ratio,
+        num_assets * [1. / num_assets],
+        args=(mean_returns, cov_matrix, risk_free_rate),
+        method='SLSQP',
+        bounds=bounds,
+        constraints=constraints
+    )
+    return result.x
+
+def sharpe_ratio(weights, mean_returns, cov_matrix):
+    annual_return, annual_volatility = PortfolioOptimization.portfolio_performance(weights, mean_returns, cov_matrix)
+    return (annual_return - RISK_FREE_RATE) / annual_volatility
+
+def get_inputs(num_assets):
+    monthly_returns = generate_returns(num_assets)
+    return monthly_returns.mean(), monthly_returns.cov()
+
+@pytest.mark.parametrize("scale", LEGACY_SCALES)
+def test_parity(scale):
+    mean_returns, cov_matrix = get_inputs(NUM_ASSETS * scale)
+
+    legacy_weights = legacy_optimize_portfolio(mean_returns, cov_matrix, RISK_FREE_RATE)
+    qp_weights = PortfolioOptimization.optimize_portfolio(mean_returns, cov_matrix, RISK_FREE_RATE)
+
+    # The QP optimum can only match or beat the SLSQP one
+    assert sharpe_ratio(qp_weights, mean_returns, cov_matrix) >= sharpe_ratio(legacy_weights, mean_returns, cov_matrix) - 1e-6
+    assert qp_weights.min() >= 0 and abs(qp_weights.sum() - 1) < 1e-9
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_optimize_portfolio(benchmark, scale):
+    mean_returns, cov_matrix = get_inputs(NUM_ASSETS * scale)
+    benchmark.group = f"optimize_portfolio {scale}x"
+
+    benchmark(PortfolioOptimization.optimize_portfolio, mean_returns, cov_matrix, RISK_FREE_RATE)
+
+@pytest.mark.parametrize("scale", LEGACY_SCALES)
+def test_legacy_optimize_portfolio(benchmark, scale):
+    mean_returns, cov_matrix = get_inputs(NUM_ASSETS * scale)
+    benchmark.group = f"optimize_portfolio {scale}x"
+
+    benchmark.pedantic(legacy_optimize_portfolio, args=(mean_returns, cov_matrix, RISK_FREE_RATE), rounds=1)
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_efficient_frontier(benchmark, scale):
+    mean_returns, cov_matrix = get_inputs(NUM_ASSETS * scale)
+
+    benchmark(PortfolioOptimization.efficient_frontier, mean_returns, cov_matrix, 50)
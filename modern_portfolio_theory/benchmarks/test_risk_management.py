@@ -0,0 +1,28 @@
+"""
+Benchmarks of the VaR and CVaR methods of RiskManagement on synthetic returns.
+"""
+import numpy as np
+import pytest
+from risk_management.covariance import CovarianceEstimator
+from risk_management.risk_management import RiskManagement
+from benchmarks.synthetic import generate_returns
+from shared.benchmark_suite import SCALES
+
+# Tickers in config.py
+NUM_ASSETS = 8
+
+@pytest.mark.parametrize("method", ["parametric", "historical", "filtered_historical", "monte_carlo"])
+@pytest.mark.parametrize("scale", SCALES)
+def test_var_cvar(benchmark, scale, method):
+    num_assets = NUM_ASSETS * scale
+
+    monthly_returns = generate_returns(num_assets)
+    weights = np.full(num_assets, 1 / num_assets)
+    benchmark.group = f"var_cvar {scale}x"
+
+    # The covariance cache is cleared first, so every round does the full work
+    def var_cvar():
+        CovarianceEstimator.cache.clear()
+        return RiskManagement.calculate_var_cvar(monthly_returns, weights, method)
+
+    benchmark(var_cvar)
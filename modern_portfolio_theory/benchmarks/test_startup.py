@@ -0,0 +1,41 @@
+"""
+Measures the import time of each CLI stage with python -X importtime.
+
+A stage imports what the functions it runs import in main.py; those import
+statements are read from main.py and run in a fresh interpreter, so no data
+is downloaded. The legacy case imports what main.py loaded up front before
+the stages were split. The benchmark times the whole interpreter run; the
+import time and the slowest imports are kept in its extra info.
+"""
+import os
+import pytest
+from shared.benchmark_startup import get_stage_imports, measure
+
+FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Functions of main.py run by each stage
+STAGE_FUNCTIONS = {
+    "cli": [],
+    "risk": ["run", "load_returns", "risk"],
+    "optimize": ["run", "load_returns", "optimize"],
+    "backtest": ["run", "load_returns", "backtest"],
+    "feasible": ["run", "load_returns", "feasible"],
+    "all": ["run", "load_returns", "risk", "optimize", "backtest", "feasible"]
+}
+
+LEGACY_IMPORTS = """
+import pandas, yfinance, matplotlib.pyplot, scipy.optimize, scipy.stats
+from storage.storage import Storage
+from data_ingestion.data_ingestion import DataIngestion
+from risk_management.risk_management import RiskManagement
+from risk_management.covariance import CovarianceEstimator
+from monitoring.monitoring import PortfolioOptimization
+"""
+
+@pytest.mark.parametrize("stage", ["legacy", *STAGE_FUNCTIONS])
+def test_startup(benchmark, stage):
+    code = LEGACY_IMPORTS if stage == "legacy" else get_stage_imports(STAGE_FUNCTIONS[stage], os.path.join(FOLDER, "main.py"))
+    benchmark.group = "startup"
+
+    total, slowest = benchmark.pedantic(measure, args=(code, FOLDER), rounds=5)
+    benchmark.extra_info.update({"import_ms": total, "slowest_imports_ms": slowest})
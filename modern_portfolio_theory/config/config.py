@@ -7,4 +7,10 @@ RISK_FREE_RATE = 0.0375
 
 # Portfolio Tickers and Weights
 TICKERS = ["MMM", "BP.L", "C", "T", "DAL", "PSN.L", "CNR.TO", "GSK.L"]
-MY_WEIGHTS = np.array([0.1424, 0.1468, 0.2213, 0.0308, 0.0525, 0.1463, 0.1360, 0.1240])
\ No newline at end of file
+MY_WEIGHTS = np.array([0.1424, 0.1468, 0.2213, 0.0308, 0.0525, 0.1463, 0.1360, 0.1240])
+# Covariance estimator: "sample", "ledoit_wolf", "constant_correlation" or "ewma"
+COVARIANCE_METHOD = "sample"
+# Random long-only portfolios of the "feasible" stage, drawn from a Dirichlet
+# distribution (alpha = 1 is uniform over all weights summing to 1)
+NUM_RANDOM_PORTFOLIOS = 100000
+DIRICHLET_ALPHA = 1.0
@@ -1,12 +1,15 @@
-import yfinance as yf
 import pandas as pd
+from shared.price_store import PriceStore
+from shared.tracer import Tracer
 
 class DataIngestion:
+    store = PriceStore()
+
     @staticmethod
+    @Tracer.traced()
     def download_monthly_data(tickers, start_date, end_date):
         """Downloads historical monthly adjusted closing price data."""
-        data = yf.download(tickers, start=start_date, end=end_date, interval='1mo',auto_adjust=True)
-        return data['Close']
+        return DataIngestion.store.get_close(tickers, start_date, end_date, '1mo', auto_adjust=True)
 
     @staticmethod
     def calculate_monthly_returns(data):
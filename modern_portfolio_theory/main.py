@@ -1,26 +1,101 @@
-import pandas as pd
-from storage.storage import Storage
-from data_ingestion.data_ingestion import DataIngestion
-from risk_management.risk_management import RiskManagement
-from monitoring.monitoring import PortfolioOptimization
-from config.config import START_DATE, END_DATE, RISK_FREE_RATE, TICKERS, MY_WEIGHTS
+import argparse
+from shared.project import resolve_path
+from shared.tracer import Tracer
+from config.config import START_DATE, END_DATE, RISK_FREE_RATE, TICKERS, MY_WEIGHTS, COVARIANCE_METHOD
 
+# Stages that can be run on their own; "all" runs the whole pipeline and
+# "feasible" scores NUM_RANDOM_PORTFOLIOS random portfolios against mine
+STAGES = ["risk", "optimize", "backtest", "feasible", "all"]
 
-# Step 1: Download Data and Compute Returns
-data = DataIngestion.download_monthly_data(TICKERS, START_DATE, END_DATE)
-monthly_returns = DataIngestion.calculate_monthly_returns(data)
+@Tracer.traced()
+def load_returns():
+    from data_ingestion.data_ingestion import DataIngestion
 
-# Step 2: Calculate VaR and CVaR
-var_cvar_results = RiskManagement.calculate_var_cvar(monthly_returns, MY_WEIGHTS)
-print("\nRisk Metrics (VaR & CVaR):", var_cvar_results)
+    # Step 1: Download Data and Compute Returns
+    data = DataIngestion.download_monthly_data(TICKERS, START_DATE, END_DATE)
+    return DataIngestion.calculate_monthly_returns(data)
 
-# Step 3: Portfolio Optimization
-mean_returns = monthly_returns.mean()
-cov_matrix = monthly_returns.cov()
+@Tracer.traced()
+def risk(monthly_returns):
+    from risk_management.risk_management import RiskManagement
 
-optimal_weights = PortfolioOptimization.optimize_portfolio(mean_returns, cov_matrix, RISK_FREE_RATE)
-PortfolioOptimization.compare_portfolios(MY_WEIGHTS, optimal_weights, mean_returns, cov_matrix, RISK_FREE_RATE)
+    # Step 2: Calculate VaR and CVaR
+    var_cvar_results = RiskManagement.calculate_var_cvar(monthly_returns, MY_WEIGHTS)
+    print("\nRisk Metrics (VaR & CVaR):", var_cvar_results)
 
-# Step 4: Save Results
-top_portfolios = pd.DataFrame({'Tickers': TICKERS, 'My Portfolio Weights': MY_WEIGHTS, 'Optimal Portfolio Weights': optimal_weights * 100})
-Storage.save_results_to_excel(top_portfolios)
\ No newline at end of file
+@Tracer.traced()
+def optimize(monthly_returns):
+    import pandas as pd
+    from storage.storage import Storage
+    from risk_management.covariance import CovarianceEstimator
+    from monitoring.monitoring import PortfolioOptimization
+
+    # Step 3: Portfolio Optimization
+    mean_returns = monthly_returns.mean()
+    cov_matrix = CovarianceEstimator.get_covariance(monthly_returns, COVARIANCE_METHOD)
+
+    optimal_weights = PortfolioOptimization.optimize_portfolio(mean_returns, cov_matrix, RISK_FREE_RATE)
+    PortfolioOptimization.compare_portfolios(MY_WEIGHTS, optimal_weights, mean_returns, cov_matrix, RISK_FREE_RATE)
+
+    # Step 4: Save Results
+    top_portfolios = pd.DataFrame({'Tickers': TICKERS, 'My Portfolio Weights': MY_WEIGHTS, 'Optimal Portfolio Weights': optimal_weights * 100})
+    Storage.save_results_to_excel(top_portfolios)
+
+@Tracer.traced()
+def backtest(monthly_returns):
+    from backtest.backtest import Backtest, BacktestConfig
+
+    # Step 5: Rolling Backtest of the Optimal Portfolio
+    result = Backtest.run(monthly_returns, BacktestConfig(covariance_method=COVARIANCE_METHOD))
+    print("\nBacktest (annualized):", result.summary().to_dict())
+
+@Tracer.traced()
+def feasible(monthly_returns):
+    from config.config import NUM_RANDOM_PORTFOLIOS, DIRICHLET_ALPHA
+    from storage.storage import Storage
+    from risk_management.portfolio_batch import PortfolioBatch
+
+    # Step 6: Random Portfolios of the Feasible Set, Scored in Batches
+    batch = PortfolioBatch.from_returns(monthly_returns, RISK_FREE_RATE, method=COVARIANCE_METHOD)
+    feasible_set = batch.feasible_set(NUM_RANDOM_PORTFOLIOS, DIRICHLET_ALPHA, keep_weights=True, seed=0)
+    my_portfolio = batch.evaluate(MY_WEIGHTS).iloc[0]
+
+    print("\nMy Portfolio:", my_portfolio.to_dict())
+    print(f"Random portfolios with a higher Sharpe ratio: {(feasible_set['Sharpe'] > my_portfolio['Sharpe']).mean():.2%}")
+    Storage.save_feasible_set(feasible_set)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Modern portfolio theory: risk, optimization and backtest")
+    parser.add_argument("stage", nargs="?", default="all", choices=STAGES, help="stage to run (default: all)")
+    parser.add_argument("--trace", type=resolve_path, help="write the stage timings to this .json or .csv file")
+    parser.add_argument("--profile", metavar="STAGE", help="profile one traced stage: run, a stage function or a download")
+    parser.add_argument("--profiler", default="cprofile", choices=["cprofile", "pyinstrument"])
+    args = parser.parse_args(argv)
+
+    if args.trace or args.profile:
+        Tracer.start(args.profile, args.profiler)
+
+    with Tracer.stage("run"):
+        run(args.stage)
+
+    if args.trace:
+        Tracer.save(args.trace)
+        print("\n" + Tracer.summary())
+
+def run(stage):
+    monthly_returns = load_returns()
+
+    if stage in ("risk", "all"):
+        risk(monthly_returns)
+
+    if stage in ("optimize", "all"):
+        optimize(monthly_returns)
+
+    if stage in ("backtest", "all"):
+        backtest(monthly_returns)
+
+    if stage in ("feasible", "all"):
+        feasible(monthly_returns)
+
+if __name__ == "__main__":
+    main()
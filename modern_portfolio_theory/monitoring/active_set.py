@@ -0,0 +1,75 @@
+import numpy as np
+
+class ActiveSetQP:
+    """
+    Primal active-set method for
+
+        min 1/2 x'Qx + c'x   subject to   Ax = b, x >= 0
+
+    started from a feasible point. The bounds held at zero form the working
+    set; one bound is added or released per iteration, so a warm start close
+    to the solution needs only a few iterations.
+    """
+    @staticmethod
+    def solve(Q: np.ndarray, c: np.ndarray, A: np.ndarray, x0: np.ndarray, tol=1e-10, max_iter=None) -> np.ndarray:
+        x = np.array(x0, dtype=float)
+        active = x <= tol
+        x[active] = 0.0
+
+        max_iter = max_iter if max_iter else 10 * len(x) + 100
+
+        for _ in range(max_iter):
+            free = ~active
+            g = Q @ x + c
+
+            p, nu = __class__.solve_equality_qp(Q[np.ix_(free, free)], g[free], A[:, free])
+
+            if np.abs(p).max(initial=0.0) <= tol * max(1.0, np.abs(x).max()):
+                # Stationary on the working set: release the bound with the most negative multiplier
+                multipliers = (g + A.T @ nu)[active]
+
+                if len(multipliers) == 0 or multipliers.min() >= -tol * max(np.abs(g).max(), 1e-300):
+                    return x
+
+                active[np.flatnonzero(active)[np.argmin(multipliers)]] = False
+                continue
+
+            # Longest step that keeps every free weight non-negative
+            free_index = np.flatnonzero(free)
+            decreasing = p < 0
+
+            alpha, blocking = 1.0, None
+
+            if decreasing.any():
+                ratios = -x[free_index[decreasing]] / p[decreasing]
+                j = np.argmin(ratios)
+
+                if ratios[j] < 1.0:
+                    alpha, blocking = ratios[j], free_index[decreasing][j]
+
+            x[free_index] += alpha * p
+
+            if blocking is not None:
+                x[blocking] = 0.0
+                active[blocking] = True
+
+        raise RuntimeError("Active-set QP did not converge.")
+
+    @staticmethod
+    def solve_equality_qp(Q: np.ndarray, g: np.ndarray, A: np.ndarray):
+        """Solves min 1/2 p'Qp + g'p subject to Ap = 0 through its KKT system."""
+        n, m = len(g), A.shape[0]
+
+        kkt = np.zeros((n + m, n + m))
+        kkt[:n, :n] = Q
+        kkt[:n, n:] = A.T
+        kkt[n:, :n] = A
+
+        rhs = np.concatenate([-g, np.zeros(m)])
+
+        try:
+            solution = np.linalg.solve(kkt, rhs)
+        except np.linalg.LinAlgError:
+            solution = np.linalg.lstsq(kkt, rhs, rcond=None)[0]
+
+        return solution[:n], solution[n:]
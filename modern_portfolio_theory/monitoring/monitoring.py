@@ -1,7 +1,6 @@
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from scipy.optimize import minimize
+from monitoring.active_set import ActiveSetQP
 
 class PortfolioOptimization:
     @staticmethod
@@ -18,22 +17,118 @@ class PortfolioOptimization:
         return - (returns - risk_free_rate) / std_dev
 
     @staticmethod
-    def optimize_portfolio(mean_returns, cov_matrix, risk_free_rate):
-        """Finds the portfolio with the highest Sharpe ratio."""
+    def negative_sharpe_ratio_gradient(weights, mean_returns, cov_matrix, risk_free_rate):
+        """Analytic gradient of the negative Sharpe ratio on numpy arrays."""
+        cov_weights = cov_matrix @ weights
+        annual_return = 12 * mean_returns @ weights
+        annual_volatility = np.sqrt(12 * weights @ cov_weights)
+
+        excess_return = annual_return - risk_free_rate
+        sharpe_ratio = excess_return / annual_volatility
+
+        gradient = -(12 * mean_returns - sharpe_ratio * 12 * cov_weights / annual_volatility) / annual_volatility
+        return -sharpe_ratio, gradient
+
+    @staticmethod
+    def optimize_portfolio(mean_returns, cov_matrix, risk_free_rate, method='qp', initial_weights=None, max_weight=1.0):
+        """
+        Finds the long-only portfolio with the highest Sharpe ratio.
+
+        The 'qp' method solves the equivalent convex problem min y'Σy subject to
+        (12μ - rf)'y = 1, y >= 0 with an active-set method and rescales y to
+        weights. The 'slsqp' method uses SLSQP with an analytic gradient; it is
+        also used when single weights are capped below 1 by max_weight.
+        """
+        mean_returns = np.asarray(mean_returns, dtype=float)
+        cov_matrix = np.asarray(cov_matrix, dtype=float)
         num_assets = len(mean_returns)
-        constraints = {'type': 'eq', 'fun': lambda x: np.sum(x) - 1}
-        bounds = tuple((0.0, 1.0) for _ in range(num_assets))
+
+        excess_returns = 12 * mean_returns - risk_free_rate
+
+        # Without an asset beating the risk-free rate the convex form has no solution
+        if method == 'qp' and max_weight >= 1.0 and excess_returns.max() > 0:
+            if initial_weights is not None and excess_returns @ initial_weights > 0:
+                start = initial_weights / (excess_returns @ initial_weights)
+            else:
+                # Starting from the single best asset keeps the working set small
+                start = np.zeros(num_assets)
+                start[np.argmax(excess_returns)] = 1 / excess_returns.max()
+
+            y = ActiveSetQP.solve(cov_matrix, np.zeros(num_assets), excess_returns[np.newaxis, :], start)
+            return y / y.sum()
+
+        from scipy.optimize import minimize
+
+        if initial_weights is None:
+            initial_weights = np.full(num_assets, 1. / num_assets)
+
+        constraints = {'type': 'eq', 'fun': lambda x: np.sum(x) - 1, 'jac': lambda x: np.ones_like(x)}
+        bounds = tuple((0.0, max_weight) for _ in range(num_assets))
 
         result = minimize(
-            PortfolioOptimization.negative_sharpe_ratio,
-            num_assets * [1. / num_assets],
+            PortfolioOptimization.negative_sharpe_ratio_gradient,
+            initial_weights,
             args=(mean_returns, cov_matrix, risk_free_rate),
             method='SLSQP',
+            jac=True,
             bounds=bounds,
             constraints=constraints
         )
         return result.x  # Optimal weights
 
+    @staticmethod
+    def min_variance_portfolio(cov_matrix, initial_weights=None):
+        """Finds the long-only portfolio with the lowest variance."""
+        cov_matrix = np.asarray(cov_matrix, dtype=float)
+        num_assets = len(cov_matrix)
+
+        if initial_weights is None:
+            initial_weights = np.zeros(num_assets)
+            initial_weights[np.argmin(np.diag(cov_matrix))] = 1.0
+
+        return ActiveSetQP.solve(cov_matrix, np.zeros(num_assets), np.ones((1, num_assets)), initial_weights)
+
+    @staticmethod
+    def efficient_frontier(mean_returns, cov_matrix, n_points):
+        """
+        Computes n_points long-only frontier portfolios with evenly spaced annual returns,
+        from the minimum-variance portfolio to the highest-return asset.
+
+        Each point starts from the previous one, mixed with the highest-return asset
+        just enough to reach the next target, so only a few active-set steps are needed.
+        """
+        names = mean_returns.index if isinstance(mean_returns, pd.Series) else range(len(mean_returns))
+        mean_returns = np.asarray(mean_returns, dtype=float)
+        cov_matrix = np.asarray(cov_matrix, dtype=float)
+        num_assets = len(mean_returns)
+
+        top_asset = np.zeros(num_assets)
+        top_asset[np.argmax(mean_returns)] = 1.0
+
+        weights = PortfolioOptimization.min_variance_portfolio(cov_matrix)
+        targets = np.linspace(mean_returns @ weights, mean_returns.max(), n_points)
+
+        constraints = np.vstack([np.ones(num_assets), mean_returns])
+        frontier = [weights]
+
+        for target in targets[1:-1]:
+            current = mean_returns @ weights
+            theta = (target - current) / (mean_returns.max() - current)
+
+            start = (1 - theta) * weights + theta * top_asset
+            weights = ActiveSetQP.solve(cov_matrix, np.zeros(num_assets), constraints, start)
+            frontier.append(weights)
+
+        if n_points > 1:
+            frontier.append(top_asset)
+
+        frontier = np.array(frontier)
+
+        result = pd.DataFrame(frontier, columns=names)
+        result.insert(0, 'Volatility', np.sqrt(12 * np.einsum('ki,ij,kj->k', frontier, cov_matrix, frontier)))
+        result.insert(0, 'Return', 12 * frontier @ mean_returns)
+        return result
+
     @staticmethod
     def compare_portfolios(my_weights, optimal_weights, mean_returns, cov_matrix, risk_free_rate):
         """Compares my portfolio against the optimized one."""
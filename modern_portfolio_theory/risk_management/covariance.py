@@ -0,0 +1,210 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from math import comb
+from shared.tracer import Tracer
+
+class CovarianceEstimator:
+    """
+    Covariance of monthly returns: 'sample', 'ledoit_wolf' (shrinkage to a
+    scaled identity), 'constant_correlation' (shrinkage to the average
+    correlation) or 'ewma'.
+
+    The estimator keeps running raw moment sums instead of the returns, so a
+    new month is added with rank-one updates in O(N^2) and every estimate is
+    computed from the sums without revisiting past months. The sums of
+    higher powers are only kept for the shrinkage methods, which need them.
+    """
+    METHODS = ['sample', 'ledoit_wolf', 'constant_correlation', 'ewma']
+    SHRINKAGE_METHODS = ['ledoit_wolf', 'constant_correlation']
+
+    # Estimates already computed in this run, by data fingerprint, least recently used first
+    cache = OrderedDict()
+    cache_size = 32
+
+    def __init__(self, method='sample', decay=0.97):
+        if method not in __class__.METHODS:
+            raise ValueError(f"Unknown covariance method: {method}")
+
+        self.method = method
+        self.decay = decay
+        self.higher_moments = method in __class__.SHRINKAGE_METHODS
+        self.columns = None
+        self.num_obs = 0
+
+    @staticmethod
+    def get_covariance(monthly_returns, method='sample', decay=0.97):
+        """
+        Returns the covariance of monthly_returns, computed once per data set and
+        method. The result is a copy, so callers cannot change the cached estimate.
+        """
+        key = (__class__.get_fingerprint(monthly_returns), method, decay)
+        Tracer.count_cache(key in __class__.cache)
+
+        if key in __class__.cache:
+            __class__.cache.move_to_end(key)
+        else:
+            __class__.cache[key] = __class__(method, decay).fit(monthly_returns).covariance()
+
+            if len(__class__.cache) > __class__.cache_size:
+                __class__.cache.popitem(last=False)
+
+        return __class__.cache[key].copy()
+
+    @staticmethod
+    def get_fingerprint(monthly_returns) -> str:
+        values = np.ascontiguousarray(monthly_returns, dtype=float)
+        digest = hashlib.sha1(values.tobytes())
+        digest.update(str(values.shape).encode())
+
+        if isinstance(monthly_returns, pd.DataFrame):
+            digest.update(str(list(monthly_returns.columns)).encode())
+
+        return digest.hexdigest()
+
+    def fit(self, monthly_returns):
+        """Starts the running sums from a (T x N) block of returns."""
+        if isinstance(monthly_returns, pd.DataFrame):
+            self.columns = monthly_returns.columns
+
+        x = np.asarray(monthly_returns, dtype=float)
+        num_assets = x.shape[1]
+
+        # Raw sums of the whole block at once; EWMA weights decay from the last month
+        self.num_obs = len(x)
+        self.powers = np.array([np.ones(num_assets) * len(x)] + [(x ** k).sum(axis=0) for k in range(1, 4)])
+        self.m11 = x.T @ x
+
+        if self.higher_moments:
+            self.m21 = (x ** 2).T @ x
+            self.m22 = (x ** 2).T @ (x ** 2)
+            self.m31 = (x ** 3).T @ x
+
+        weights = self.decay ** np.arange(len(x) - 1, -1, -1)
+        self.ewma_sum = (x * weights[:, np.newaxis]).T @ x
+        self.ewma_weight = weights.sum()
+
+        return self
+
+    def update(self, new_returns):
+        """Adds one month of returns with rank-one updates of the running sums."""
+        x = np.asarray(new_returns, dtype=float).ravel()
+        x2, x3 = x ** 2, x ** 3
+
+        self.num_obs += 1
+        self.powers += np.array([np.ones_like(x), x, x2, x3])
+        self.m11 += np.outer(x, x)
+
+        if self.higher_moments:
+            self.m21 += np.outer(x2, x)
+            self.m22 += np.outer(x2, x2)
+            self.m31 += np.outer(x3, x)
+
+        self.ewma_sum = self.decay * self.ewma_sum + np.outer(x, x)
+        self.ewma_weight = self.decay * self.ewma_weight + 1
+
+        return self
+
+    def remove(self, old_returns):
+        """Removes one month of returns added earlier, for rolling windows. EWMA sums are left to decay."""
+        x = np.asarray(old_returns, dtype=float).ravel()
+        x2, x3 = x ** 2, x ** 3
+
+        self.num_obs -= 1
+        self.powers -= np.array([np.ones_like(x), x, x2, x3])
+        self.m11 -= np.outer(x, x)
+
+        if self.higher_moments:
+            self.m21 -= np.outer(x2, x)
+            self.m22 -= np.outer(x2, x2)
+            self.m31 -= np.outer(x3, x)
+
+        return self
+
+    def mean(self) -> np.ndarray:
+        return self.powers[1] / self.num_obs
+
+    def covariance(self):
+        if self.method == 'sample':
+            cov = self.centered(1, 1) / (self.num_obs - 1)
+        elif self.method == 'ledoit_wolf':
+            cov = self.ledoit_wolf()
+        elif self.method == 'constant_correlation':
+            cov = self.constant_correlation()
+        else:
+            cov = self.ewma_sum / self.ewma_weight
+
+        if self.columns is not None:
+            return pd.DataFrame(cov, index=self.columns, columns=self.columns)
+
+        return cov
+
+    def raw(self, k: int, l: int) -> np.ndarray:
+        """Sum over months of x_i^k * x_j^l as an (N x N) matrix."""
+        if k == 0 and l == 0:
+            return np.full_like(self.m11, self.num_obs)
+        if l == 0:
+            return np.repeat(self.powers[k][:, np.newaxis], len(self.m11), axis=1)
+        if k == 0:
+            return np.repeat(self.powers[l][np.newaxis, :], len(self.m11), axis=0)
+
+        if (k, l) == (1, 2):
+            return self.m21.T
+
+        # The sums of higher powers only exist for the shrinkage methods
+        return getattr(self, {(1, 1): 'm11', (2, 1): 'm21', (2, 2): 'm22', (3, 1): 'm31'}[(k, l)])
+
+    def centered(self, a: int, b: int) -> np.ndarray:
+        """Sum over months of (x_i - m_i)^a * (x_j - m_j)^b, expanded in raw sums."""
+        mean = self.mean()
+        result = np.zeros_like(self.m11)
+
+        for k in range(a + 1):
+            for l in range(b + 1):
+                coefficient = comb(a, k) * comb(b, l) * np.outer((-mean) ** (a - k), (-mean) ** (b - l))
+                result += coefficient * self.raw(k, l)
+
+        return result
+
+    def ledoit_wolf(self) -> np.ndarray:
+        """Ledoit and Wolf (2004) shrinkage of the biased sample covariance towards mu * I."""
+        num_obs, num_assets = self.num_obs, len(self.m11)
+
+        sample = self.centered(1, 1) / num_obs
+        mu = np.trace(sample) / num_assets
+
+        target_distance = ((sample - mu * np.eye(num_assets)) ** 2).sum() / num_assets
+        sample_variance = (self.centered(2, 2).sum() - num_obs * (sample ** 2).sum()) / (num_obs ** 2 * num_assets)
+
+        shrinkage = min(sample_variance, target_distance) / target_distance if target_distance > 0 else 1.0
+
+        return shrinkage * mu * np.eye(num_assets) + (1 - shrinkage) * sample
+
+    def constant_correlation(self) -> np.ndarray:
+        """Ledoit and Wolf (2004) shrinkage of the biased sample covariance towards a constant correlation matrix."""
+        num_obs, num_assets = self.num_obs, len(self.m11)
+
+        sample = self.centered(1, 1) / num_obs
+        variances = np.diag(sample)
+        std_devs = np.sqrt(variances)
+
+        correlation = sample / np.outer(std_devs, std_devs)
+        off_diagonal = ~np.eye(num_assets, dtype=bool)
+        average_correlation = correlation[off_diagonal].mean()
+
+        target = average_correlation * np.outer(std_devs, std_devs)
+        np.fill_diagonal(target, variances)
+
+        # Asymptotic variances of the sample entries and their covariance with the variances
+        pi_matrix = self.centered(2, 2) / num_obs - sample ** 2
+        theta = self.centered(3, 1) / num_obs - variances[:, np.newaxis] * sample
+
+        pi = pi_matrix.sum()
+        ratio = np.outer(1 / std_devs, std_devs)
+        rho = np.trace(pi_matrix) + average_correlation / 2 * ((ratio * theta + ratio.T * theta.T)[off_diagonal]).sum()
+        gamma = ((sample - target) ** 2).sum()
+
+        shrinkage = max(0.0, min((pi - rho) / gamma / num_obs, 1.0)) if gamma > 0 else 1.0
+
+        return shrinkage * target + (1 - shrinkage) * sample
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+from risk_management.covariance import CovarianceEstimator
+from risk_management.risk_engine import RiskEngine
+
+class PortfolioBatch:
+    """
+    Return, volatility, Sharpe ratio and parametric VaR and CVaR of many
+    portfolios per call.
+
+    The mean returns and covariance are converted to arrays and the covariance
+    is factored as LL' once, so a (K x N) weight matrix W is scored with one
+    product: the volatilities are the row norms of WL. Return, volatility and
+    Sharpe are annualized as in PortfolioOptimization.portfolio_performance;
+    VaR and CVaR are monthly, as in RiskManagement.calculate_var and
+    calculate_cvar.
+    """
+    def __init__(self, mean_returns, cov_matrix, risk_free_rate=0.0, confidence_levels=(0.95, 0.99)):
+        self.names = list(mean_returns.index) if isinstance(mean_returns, pd.Series) else None
+        self.mean_returns = np.asarray(mean_returns, dtype=float)
+        self.factor = RiskEngine.get_cholesky(np.asarray(cov_matrix, dtype=float))
+        self.risk_free_rate = risk_free_rate
+        self.levels = np.asarray(confidence_levels, dtype=float)
+
+    @staticmethod
+    def from_returns(monthly_returns, risk_free_rate=0.0, confidence_levels=(0.95, 0.99), method='sample') -> "PortfolioBatch":
+        """Batch of the sample mean and the cached covariance estimate of monthly_returns."""
+        return __class__(monthly_returns.mean(), CovarianceEstimator.get_covariance(monthly_returns, method), risk_free_rate, confidence_levels)
+
+    def metrics(self, weights) -> tuple:
+        """Monthly mean return and standard deviation of each portfolio, as RiskManagement.calculate_portfolio_metrics."""
+        weights = np.atleast_2d(np.asarray(weights, dtype=float))
+        loadings = weights @ self.factor
+
+        return weights @ self.mean_returns, np.sqrt(np.einsum('kn,kn->k', loadings, loadings))
+
+    def evaluate(self, weights) -> pd.DataFrame:
+        """One row per portfolio: Return, Volatility, Sharpe and the VaR_<level> and CVaR_<level> columns."""
+        portfolio_mean, portfolio_std_dev = self.metrics(weights)
+
+        annual_return = portfolio_mean * 12
+        annual_volatility = portfolio_std_dev * np.sqrt(12)
+
+        result = RiskEngine.normal_tail(portfolio_mean, portfolio_std_dev, self.levels)
+        result.insert(0, 'Sharpe', (annual_return - self.risk_free_rate) / annual_volatility)
+        result.insert(0, 'Volatility', annual_volatility)
+        result.insert(0, 'Return', annual_return)
+        return result
+
+    def random_portfolios(self, num_portfolios, alpha=1.0, chunk_size=10000, seed=None):
+        """
+        Yields long-only random weights, (chunk_size x N) at a time, drawn from
+        a Dirichlet distribution: alpha = 1 is uniform on the simplex, smaller
+        values favor concentrated portfolios.
+        """
+        rng = np.random.default_rng(seed)
+        alpha = np.broadcast_to(np.asarray(alpha, dtype=float), self.mean_returns.shape)
+
+        for start in range(0, num_portfolios, chunk_size):
+            yield rng.dirichlet(alpha, min(chunk_size, num_portfolios - start))
+
+    def feasible_set(self, num_portfolios, alpha=1.0, chunk_size=10000, seed=None, keep_weights=False) -> pd.DataFrame:
+        """
+        Scores num_portfolios random portfolios chunk by chunk, so only one chunk
+        of weights is in memory unless keep_weights adds them as columns.
+        """
+        frames = []
+
+        for weights in self.random_portfolios(num_portfolios, alpha, chunk_size, seed):
+            frame = self.evaluate(weights)
+
+            if keep_weights:
+                frame = pd.concat([frame, pd.DataFrame(weights, columns=self.names)], axis=1)
+
+            frames.append(frame)
+
+        return pd.concat(frames, ignore_index=True)
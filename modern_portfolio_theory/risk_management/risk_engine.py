@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+from scipy.linalg import cholesky
+from scipy.signal import lfilter
+from scipy.stats import norm
+from risk_management.covariance import CovarianceEstimator
+
+class RiskEngine:
+    """
+    VaR and CVaR of many portfolios at many confidence levels in one pass.
+
+    Weights are a (K x N) matrix, one portfolio per row. Results are (K x L)
+    DataFrames with VaR_<level> and CVaR_<level> columns. VaR is the return
+    quantile at 1 - level and CVaR the mean return beyond it, both as
+    (usually negative) monthly returns. The sample covariance comes from the
+    shared CovarianceEstimator cache.
+    """
+    @staticmethod
+    def parametric(monthly_returns, weights, confidence_levels=(0.95, 0.99)) -> pd.DataFrame:
+        """Normal distribution with the sample mean and covariance."""
+        returns = np.asarray(monthly_returns, dtype=float)
+        weights, levels = np.atleast_2d(weights), np.asarray(confidence_levels, dtype=float)
+
+        portfolio_mean = weights @ returns.mean(axis=0)
+        portfolio_std_dev = np.sqrt(np.einsum('ki,ij,kj->k', weights, np.asarray(CovarianceEstimator.get_covariance(monthly_returns)), weights))
+
+        return __class__.normal_tail(portfolio_mean, portfolio_std_dev, levels)
+
+    @staticmethod
+    def historical(monthly_returns, weights, confidence_levels=(0.95, 0.99)) -> pd.DataFrame:
+        """Empirical distribution of the portfolios over the observed months."""
+        returns = np.asarray(monthly_returns, dtype=float)
+        weights, levels = np.atleast_2d(weights), np.asarray(confidence_levels, dtype=float)
+
+        return __class__.tail_statistics(returns @ weights.T, len(returns), levels)
+
+    @staticmethod
+    def filtered_historical(monthly_returns, weights, confidence_levels=(0.95, 0.99), decay=0.94) -> pd.DataFrame:
+        """
+        Historical returns rescaled to current volatility.
+
+        Each asset's returns are standardized by their EWMA volatility and
+        multiplied by the volatility forecast for the next month. Scenarios keep
+        the dates of the original months, so the cross-asset dependence is kept.
+        """
+        returns = np.asarray(monthly_returns, dtype=float)
+        weights, levels = np.atleast_2d(weights), np.asarray(confidence_levels, dtype=float)
+
+        mean = returns.mean(axis=0)
+        squared = (returns - mean) ** 2
+
+        # variance[t] = decay * variance[t - 1] + (1 - decay) * squared[t], started at the sample variance
+        initial = decay * squared.mean(axis=0)
+        variance = lfilter([1 - decay], [1, -decay], squared, axis=0, zi=initial[np.newaxis, :])[0]
+
+        # Volatility known before each month, and the forecast after the last one
+        previous_variance = np.vstack([squared.mean(axis=0), variance[:-1]])
+        standardized = (returns - mean) / np.sqrt(previous_variance)
+        scenarios = mean + standardized * np.sqrt(variance[-1])
+
+        return __class__.tail_statistics(scenarios @ weights.T, len(scenarios), levels)
+
+    @staticmethod
+    def monte_carlo(monthly_returns, weights, confidence_levels=(0.95, 0.99), num_simulations=100000, distribution='normal', dof=5, chunk_size=None, seed=None) -> pd.DataFrame:
+        """
+        Simulated returns with the sample mean and covariance.
+
+        Draws are normal or Student-t (scaled to the sample covariance), correlated
+        with a Cholesky factor and generated chunk by chunk. Only the worst
+        returns needed for the lowest level are kept, so memory is bounded by the
+        tail and about five million buffered portfolio returns per chunk.
+        """
+        returns = np.asarray(monthly_returns, dtype=float)
+        weights, levels = np.atleast_2d(weights), np.asarray(confidence_levels, dtype=float)
+
+        rng = np.random.default_rng(seed)
+        mean = returns.mean(axis=0)
+        factor = __class__.get_cholesky(np.asarray(CovarianceEstimator.get_covariance(monthly_returns)))
+
+        # Portfolio loadings on the independent draws: (N x K)
+        loadings = factor.T @ weights.T
+        portfolio_mean = weights @ mean
+
+        chunk_size = chunk_size if chunk_size else max(1000, 5000000 // len(weights))
+        tail_size = int(np.ceil((1 - levels.min()) * num_simulations))
+        tail = np.empty((0, len(weights)))
+        chunks, buffered = [], 0
+
+        for start in range(0, num_simulations, chunk_size):
+            size = min(chunk_size, num_simulations - start)
+            draws = rng.standard_normal((size, len(mean)))
+
+            if distribution == 't':
+                draws *= np.sqrt((dof - 2) / rng.chisquare(dof, size))[:, np.newaxis]
+
+            chunks.append(portfolio_mean + draws @ loadings)
+            buffered += size
+
+            # Trim to the tail once the buffer is as large as the tail itself
+            if buffered >= tail_size or start + size == num_simulations:
+                tail = np.vstack([tail] + chunks)
+                chunks, buffered = [], 0
+
+                if len(tail) > tail_size:
+                    tail = np.partition(tail, tail_size - 1, axis=0)[:tail_size]
+
+        return __class__.tail_statistics(tail, num_simulations, levels)
+
+    @staticmethod
+    def normal_tail(mean: np.ndarray, std: np.ndarray, levels: np.ndarray) -> pd.DataFrame:
+        """VaR and CVaR of normal portfolio returns with the given (K) means and standard deviations."""
+        alpha = 1 - levels
+        z = norm.ppf(alpha)
+
+        var = mean[:, np.newaxis] + std[:, np.newaxis] * z
+        cvar = mean[:, np.newaxis] - std[:, np.newaxis] * norm.pdf(z) / alpha
+
+        return __class__.to_frame(var, cvar, levels)
+
+    @staticmethod
+    def tail_statistics(portfolio_returns: np.ndarray, num_scenarios: int, levels: np.ndarray) -> pd.DataFrame:
+        """VaR as the ceil((1 - level) * n)-th worst return and CVaR as the mean of the returns up to it."""
+        worst = np.sort(portfolio_returns, axis=0)
+        cumulative = np.cumsum(worst, axis=0)
+
+        counts = np.maximum(np.ceil((1 - levels) * num_scenarios - 1e-9).astype(int), 1)
+
+        var = worst[counts - 1].T
+        cvar = (cumulative[counts - 1] / counts[:, np.newaxis]).T
+
+        return __class__.to_frame(var, cvar, levels)
+
+    @staticmethod
+    def get_cholesky(cov_matrix: np.ndarray) -> np.ndarray:
+        """Lower Cholesky factor, with a small diagonal loading if the matrix is not positive definite."""
+        jitter = 0.0
+
+        for _ in range(10):
+            try:
+                return cholesky(cov_matrix + jitter * np.eye(len(cov_matrix)), lower=True)
+            except np.linalg.LinAlgError:
+                jitter = max(jitter * 10, 1e-10 * np.trace(cov_matrix) / len(cov_matrix))
+
+        raise np.linalg.LinAlgError("Covariance matrix is not positive definite.")
+
+    @staticmethod
+    def to_frame(var: np.ndarray, cvar: np.ndarray, levels: np.ndarray) -> pd.DataFrame:
+        columns = {}
+
+        for j, level in enumerate(levels):
+            columns[f"VaR_{level * 100:g}"] = var[:, j]
+            columns[f"CVaR_{level * 100:g}"] = cvar[:, j]
+
+        return pd.DataFrame(columns)
@@ -1,12 +1,14 @@
 import numpy as np
 from scipy.stats import norm
+from risk_management.covariance import CovarianceEstimator
+from risk_management.risk_engine import RiskEngine
 
 class RiskManagement:
     @staticmethod
     def calculate_portfolio_metrics(monthly_returns, weights):
         """Computes portfolio mean return and standard deviation."""
         portfolio_mean = np.dot(monthly_returns.mean(), weights)
-        portfolio_cov_matrix = np.dot(weights.T, np.dot(monthly_returns.cov(), weights))
+        portfolio_cov_matrix = np.dot(weights.T, np.dot(CovarianceEstimator.get_covariance(monthly_returns), weights))
         portfolio_std_dev = np.sqrt(portfolio_cov_matrix)
         return portfolio_mean, portfolio_std_dev
 
@@ -19,18 +21,28 @@ class RiskManagement:
     def calculate_cvar(portfolio_mean, portfolio_std_dev, confidence_level=0.95):
         """Computes Conditional Value at Risk (CVaR)."""
         alpha = 1 - confidence_level
-        z = norm.ppf(confidence_level)
+        z = norm.ppf(alpha)
         return portfolio_mean - portfolio_std_dev * (norm.pdf(z) / alpha)
 
     @staticmethod
-    def calculate_var_cvar(monthly_returns, weights):
-        """Computes VaR and CVaR at different confidence levels."""
-        portfolio_mean, portfolio_std_dev = RiskManagement.calculate_portfolio_metrics(monthly_returns, weights)
-
-        results = {
-            'VaR_95': RiskManagement.calculate_var(portfolio_mean, portfolio_std_dev, 0.95),
-            'CVaR_95': RiskManagement.calculate_cvar(portfolio_mean, portfolio_std_dev, 0.95),
-            'VaR_99': RiskManagement.calculate_var(portfolio_mean, portfolio_std_dev, 0.99),
-            'CVaR_99': RiskManagement.calculate_cvar(portfolio_mean, portfolio_std_dev, 0.99),
+    def calculate_var_cvar(monthly_returns, weights, method='parametric', confidence_levels=(0.95, 0.99), **kwargs):
+        """
+        Computes VaR and CVaR at different confidence levels.
+
+        The method is one of 'parametric', 'historical', 'filtered_historical' or
+        'monte_carlo'. A single weight vector gives a dict; a (K x N) weight matrix
+        gives a DataFrame with one row per portfolio.
+        """
+        methods = {
+            'parametric': RiskEngine.parametric,
+            'historical': RiskEngine.historical,
+            'filtered_historical': RiskEngine.filtered_historical,
+            'monte_carlo': RiskEngine.monte_carlo
         }
+
+        results = methods[method](monthly_returns, weights, confidence_levels, **kwargs)
+
+        if np.ndim(weights) == 1:
+            return results.iloc[0].to_dict()
+
         return results
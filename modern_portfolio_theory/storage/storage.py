@@ -13,3 +13,14 @@ class Storage:
         filename = f"{folder}/portfolio_results_{timestamp}.xlsx"
         data.to_excel(filename, index=False)
         print(f"Results saved to {filename}")
+
+    @staticmethod
+    def save_feasible_set(data):
+        """Saves the random portfolios to a Parquet file in the 'results' folder, as they are too many for Excel to write quickly."""
+
+        folder = "results"
+        os.makedirs(folder, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{folder}/feasible_set_{timestamp}.parquet"
+        data.to_parquet(filename, index=False)
+        print(f"Feasible set saved to {filename}")
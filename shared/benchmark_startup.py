@@ -0,0 +1,48 @@
+"""
+Helpers of the startup benchmarks of the projects.
+
+Each project's benchmarks/test_startup.py defines the functions of its
+main.py run by each CLI stage and the imports of its legacy main.py, and
+times their imports in a fresh interpreter with measure().
+"""
+import ast
+import os
+import subprocess
+import sys
+
+# The repository root, where the stages find the shared modules
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def get_stage_imports(functions: list, path: str) -> str:
+    """Import statements in the bodies of the given functions of main.py."""
+    with open(path) as file:
+        tree = ast.parse(file.read())
+
+    statements = ["import main"]
+
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name in functions:
+            statements += [ast.unparse(child) for child in ast.walk(node) if isinstance(child, (ast.Import, ast.ImportFrom))]
+
+    return "\n".join(statements)
+
+def measure(code: str, folder: str) -> tuple:
+    """Total import time in ms and the three slowest top-level imports of one run from a project folder."""
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output = True, text = True, check = True, env = env, cwd = folder).stderr
+
+    total, top_level = 0, []
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_time, cumulative, name = line[len("import time:"):].split("|")
+        total += int(self_time)
+
+        # Nested imports are indented below the module that triggered them
+        if not name[1:].startswith(" "):
+            top_level.append((int(cumulative), name.strip()))
+
+    slowest = ", ".join(f"{name} {cumulative / 1000:.0f}" for cumulative, name in sorted(top_level, reverse = True)[:3])
+    return total / 1000, slowest
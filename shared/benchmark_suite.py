@@ -0,0 +1,12 @@
+"""
+Scales of the pytest-benchmark suites of the projects.
+
+The benchmarks/test_*.py modules of each project check parity with the code
+they replaced and time their cases with the benchmark fixture at 1x, 10x and
+100x the real universe. Run from a project folder:
+    pytest                          # parity checks and timings
+    pytest --benchmark-disable      # parity checks only
+    pytest --benchmark-autosave     # also saves the timings with the commit to .benchmarks
+    pytest --benchmark-compare      # compares the timings with the last saved run
+"""
+SCALES = [1, 10, 100]
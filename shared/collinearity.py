@@ -0,0 +1,23 @@
+"""
+Collinearity checks on the cross-products X'X, shared by the regressions of the projects.
+"""
+import numpy as np
+
+def get_independent(XtX: np.ndarray, tol: float = 1e-10) -> list:
+    """Positions of the columns kept, in order, dropping those collinear with the columns before them."""
+    kept = []
+
+    for j in range(len(XtX)):
+        if XtX[j, j] <= 0:
+            continue
+
+        # Share of the column not explained by the columns already kept
+        if kept:
+            residual = XtX[j, j] - XtX[j, kept] @ np.linalg.solve(XtX[np.ix_(kept, kept)], XtX[kept, j])
+        else:
+            residual = XtX[j, j]
+
+        if residual > tol * XtX[j, j]:
+            kept.append(j)
+
+    return kept
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from concurrent.futures import ProcessPoolExecutor
+from shared.tracer import Tracer
+
+class ExcelStore:
+    """
+    Local store of Excel workbooks with one Feather (Arrow IPC) file per sheet.
+
+    A workbook is parsed once and then served with memory-mapped reads. Its
+    manifest keeps the size, modification time and SHA-256 of the workbook:
+    an unchanged size and mtime is a hit without reading the workbook, and a
+    touched workbook is only parsed again if its content hash changed.
+
+    Columns keep their types. Object columns mixing text with numbers or dates,
+    as in layout sheets, are stored as a text and a value column. Column names
+    of any type are kept in the file's metadata.
+    """
+    def __init__(self, folder="cache/excel"):
+        self.folder = folder
+
+    def read(self, path: str, sheet_name=0):
+        """Reads like pd.read_excel: one sheet by name or position, or a dict of all sheets for None."""
+        return self.read_many([path], sheet_name)[path]
+
+    def read_many(self, paths: list, sheet_name=0, processes: int = None) -> dict:
+        """Reads many workbooks, by path; workbooks not in the store are parsed in a process pool when processes is given."""
+        paths = list(dict.fromkeys(paths))
+        manifests = {path: self.get_manifest(path) for path in paths}
+
+        missing = [path for path, manifest in manifests.items() if manifest is None]
+        Tracer.count_cache(True, len(paths) - len(missing))
+        Tracer.count_cache(False, len(missing))
+
+        if len(missing) > 1 and processes:
+            with ProcessPoolExecutor(max_workers = min(processes, len(missing))) as executor:
+                written = list(executor.map(self.convert, missing))
+        else:
+            written = [self.convert(path) for path in missing]
+
+        manifests.update(zip(missing, written))
+
+        return {path: self.read_sheets(path, manifests[path], sheet_name) for path in paths}
+
+    def read_sheets(self, path: str, manifest: dict, sheet_name):
+        sheets = manifest['sheets']
+
+        if sheet_name is None:
+            return {name: self.read_sheet(path, sheets, name) for name in sheets}
+
+        if isinstance(sheet_name, int):
+            sheet_name = list(sheets)[sheet_name]
+
+        if sheet_name not in sheets:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found in {path}")
+
+        return self.read_sheet(path, sheets, sheet_name)
+
+    def read_sheet(self, path: str, sheets: dict, sheet_name: str) -> pd.DataFrame:
+        """Reads a stored sheet with a memory-mapped Feather read."""
+        table = feather.read_table(os.path.join(self.get_folder(path), sheets[sheet_name]), memory_map=True)
+
+        return __class__.from_table(table)
+
+    def get_folder(self, path: str) -> str:
+        key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+        return os.path.join(self.folder, os.path.splitext(os.path.basename(path))[0] + '_' + key)
+
+    def get_manifest(self, path: str):
+        """The manifest of a stored workbook, or None if it must be parsed again."""
+        manifest_path = os.path.join(self.get_folder(path), 'manifest.json')
+
+        if not os.path.exists(manifest_path):
+            return None
+
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+        stat = os.stat(path)
+
+        if (manifest['size'], manifest['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            return manifest
+
+        # Touched but possibly unchanged, e.g. after a checkout
+        if manifest['size'] != stat.st_size or manifest['sha256'] != __class__.get_hash(path):
+            return None
+
+        manifest['mtime_ns'] = stat.st_mtime_ns
+        __class__.write_manifest(manifest_path, manifest)
+
+        return manifest
+
+    def convert(self, path: str) -> dict:
+        """Parses every sheet of a workbook into the store and returns its manifest."""
+        stat = os.stat(path)
+        sha256 = __class__.get_hash(path)
+
+        sheets = pd.read_excel(path, sheet_name=None)
+
+        # Sheets of an earlier version of the workbook are not left behind
+        folder = self.get_folder(path)
+        shutil.rmtree(folder, ignore_errors=True)
+        os.makedirs(folder, exist_ok=True)
+
+        manifest = {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256, 'sheets': {}}
+
+        for i, (name, df) in enumerate(sheets.items()):
+            file_name = f'{i}.feather'
+
+            # Uncompressed files can be memory-mapped without a copy; replace atomically
+            feather.write_feather(__class__.to_table(df), os.path.join(folder, file_name + '.tmp'), compression='uncompressed')
+            os.replace(os.path.join(folder, file_name + '.tmp'), os.path.join(folder, file_name))
+
+            manifest['sheets'][name] = file_name
+
+        __class__.write_manifest(os.path.join(folder, 'manifest.json'), manifest)
+
+        return manifest
+
+    @staticmethod
+    def write_manifest(path: str, manifest: dict):
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def get_hash(path: str) -> str:
+        sha256 = hashlib.sha256()
+
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha256.update(chunk)
+
+        return sha256.hexdigest()
+
+    @staticmethod
+    def to_table(df: pd.DataFrame) -> pa.Table:
+        """A typed Arrow table of a sheet; columns are stored by position, their names in the metadata."""
+        arrays, names, layout = [], [], []
+
+        for i, (name, series) in enumerate(df.items()):
+            kind = 'column'
+
+            if series.dtype == object:
+                values = series.to_numpy()
+                text = np.array([isinstance(x, str) for x in values], dtype=bool)
+                empty = pd.isna(values)
+
+                if text.any() and not (text | empty).all():
+                    # Text and values of a mixed column are stored apart
+                    kind = 'mixed'
+                    arrays.append(pa.array(np.where(text, values, None), type=pa.string()))
+                    names.append(f'{i}.text')
+
+                    try:
+                        array = pa.array(np.where(text | empty, None, values))
+                    except (pa.ArrowInvalid, pa.ArrowTypeError):
+                        array = pa.array([None if t or e else str(x) for x, t, e in zip(values, text, empty)], type=pa.string())
+
+                    arrays.append(array)
+                    names.append(f'{i}.value')
+                    layout.append([name, kind])
+                    continue
+
+            arrays.append(pa.Array.from_pandas(series))
+            names.append(str(i))
+            layout.append([name, kind])
+
+        table = pa.Table.from_arrays(arrays, names=names)
+        layout_json = json.dumps(layout, default=str)
+
+        return table.replace_schema_metadata({b'layout': layout_json.encode(), b'index_length': str(len(df)).encode()})
+
+    @staticmethod
+    def from_table(table: pa.Table) -> pd.DataFrame:
+        layout = json.loads(table.schema.metadata[b'layout'])
+        columns = {}
+
+        for i, (name, kind) in enumerate(layout):
+            if kind == 'mixed':
+                text = table.column(f'{i}.text').to_numpy(zero_copy_only=False)
+                value = table.column(f'{i}.value').to_pandas().to_numpy(dtype=object)
+                value[pd.isna(value)] = np.nan
+
+                columns[i] = pd.Series(np.where(pd.notna(text), text, value), dtype=object)
+            else:
+                columns[i] = table.column(str(i)).to_pandas()
+
+        df = pd.DataFrame(columns, index=pd.RangeIndex(int(table.schema.metadata[b'index_length'])))
+        df.columns = [name for name, kind in layout]
+
+        return df
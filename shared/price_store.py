@@ -0,0 +1,135 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from shared.tracer import Tracer
+
+class YahooSource:
+    """Downloads closing (or open, high, low) prices from Yahoo Finance."""
+    def __call__(self, tickers: list, start: pd.Timestamp, end: pd.Timestamp, interval: str, auto_adjust: bool, field: str = 'Close') -> pd.DataFrame:
+        # Imported here so that runs served from the store never load yfinance
+        import yfinance as yf
+
+        df = yf.download(tickers, start=start, end=end, interval=interval, auto_adjust=auto_adjust)
+
+        close = df[field]
+
+        if isinstance(close, pd.Series):
+            close = close.to_frame(tickers[0])
+
+        return close
+
+class PriceStore:
+    """
+    Local store of closing prices with one Feather file per (ticker, interval, adjustment).
+    Open, high and low prices are kept the same way, in files of their own.
+
+    Only the date ranges that are not on disk yet are requested from the source.
+    The last stored bar is always requested again, as it may have been incomplete.
+    Any callable with the YahooSource signature can be used as the source.
+    """
+    def __init__(self, folder="cache/prices", source=None):
+        self.folder = folder
+        self.source = source if source else YahooSource()
+
+    def get_close(self, tickers, start, end, interval: str, auto_adjust=True) -> pd.DataFrame:
+        """Returns closing prices in [start, end), one column per ticker."""
+        return self.get_field(tickers, start, end, interval, auto_adjust, 'Close')
+
+    def get_field(self, tickers, start, end, interval: str, auto_adjust=True, field='Close') -> pd.DataFrame:
+        """Returns one price field ('Open', 'High', 'Low' or 'Close') in [start, end), one column per ticker."""
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+
+        cached = {t: self.read(t, interval, auto_adjust, field) for t in tickers}
+
+        # Tickers missing the same range are downloaded in a single request
+        requests = {}
+
+        for t, (series, covered) in cached.items():
+            for date_range in __class__.get_missing_ranges(series, covered, start, end):
+                requests.setdefault(date_range, []).append(t)
+
+        missing = len(set(t for group in requests.values() for t in group))
+        Tracer.count_cache(True, len(tickers) - missing)
+        Tracer.count_cache(False, missing)
+
+        for (range_start, range_end), group in requests.items():
+            # Sources written for closing prices only are called without the field
+            if field == 'Close':
+                fetched = self.source(group, range_start, range_end, interval, auto_adjust)
+            else:
+                fetched = self.source(group, range_start, range_end, interval, auto_adjust, field)
+
+            for t in group:
+                series, covered = cached[t]
+                new_series = fetched[t].dropna() if t in fetched.columns else pd.Series(dtype=float, index=pd.DatetimeIndex([]))
+
+                series = pd.concat([series, new_series])
+                series = series[~series.index.duplicated(keep='last')].sort_index()
+
+                if covered:
+                    covered = (min(covered[0], range_start), max(covered[1], range_end))
+                else:
+                    covered = (range_start, range_end)
+
+                self.write(t, interval, auto_adjust, series, covered, field)
+                cached[t] = (series, covered)
+
+        close = pd.concat({t: cached[t][0] for t in tickers}, axis=1).sort_index()
+        close.index.name = 'Date'
+
+        return close.loc[(close.index >= start) & (close.index < end)]
+
+    @staticmethod
+    def get_missing_ranges(series: pd.Series, covered, start: pd.Timestamp, end: pd.Timestamp) -> list:
+        if not covered:
+            return [(start, end)]
+
+        ranges = []
+
+        if start < covered[0]:
+            ranges.append((start, covered[0]))
+
+        if end > covered[1]:
+            last_bar = series.index.max() if len(series) > 0 else covered[1]
+            ranges.append((min(last_bar, covered[1]), end))
+
+        return ranges
+
+    def get_path(self, ticker: str, interval: str, auto_adjust: bool, field: str = 'Close') -> str:
+        adjustment = 'adjusted' if auto_adjust else 'raw'
+        file_name = ticker.replace('/', '_') + ('' if field == 'Close' else '.' + field) + '.feather'
+
+        return os.path.join(self.folder, interval, adjustment, file_name)
+
+    def read(self, ticker: str, interval: str, auto_adjust: bool, field: str = 'Close'):
+        """Reads a stored series with a memory-mapped Feather read."""
+        path = self.get_path(ticker, interval, auto_adjust, field)
+
+        if not os.path.exists(path):
+            return pd.Series(dtype=float, index=pd.DatetimeIndex([], name='Date')), None
+
+        table = feather.read_table(path, memory_map=True)
+        metadata = table.schema.metadata
+
+        covered = (pd.Timestamp(metadata[b'covered_start'].decode()), pd.Timestamp(metadata[b'covered_end'].decode()))
+        series = table.to_pandas().set_index('Date')[field]
+
+        return series, covered
+
+    def write(self, ticker: str, interval: str, auto_adjust: bool, series: pd.Series, covered, field: str = 'Close'):
+        path = self.get_path(ticker, interval, auto_adjust, field)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        frame = pd.DataFrame({'Date': series.index, field: series.to_numpy(dtype=float)})
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b'covered_start': covered[0].isoformat().encode(),
+            b'covered_end': covered[1].isoformat().encode()
+        })
+
+        # Uncompressed files can be memory-mapped without a copy; replace atomically
+        feather.write_feather(table, path + '.tmp', compression='uncompressed')
+        os.replace(path + '.tmp', path)
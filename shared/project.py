@@ -0,0 +1,28 @@
+"""
+Entry point of the projects, run from the repository root, e.g. python -m interest_rate alert.
+
+The modules of a project import each other from its folder and write their
+caches and outputs relative to it, so run() puts the folder on the path and
+makes it the working directory before calling main(). Paths given on the
+command line are resolved against the caller's working directory first.
+"""
+import os
+import sys
+
+# Working directory of the caller, before run() moves to the project folder
+CALLER_DIR = os.getcwd()
+
+def resolve_path(path: str) -> str:
+    """Absolute path of a command line argument, relative to the caller's working directory."""
+    return os.path.abspath(os.path.join(CALLER_DIR, path))
+
+def run(main_file: str):
+    """Runs main() of the project whose __main__.py is main_file, from the project folder."""
+    folder = os.path.dirname(os.path.abspath(main_file))
+
+    sys.path.insert(0, folder)
+    os.chdir(folder)
+
+    from main import main
+
+    main()
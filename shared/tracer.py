@@ -0,0 +1,286 @@
+import cProfile
+import csv
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+class StageRecord:
+    """Timings, peak memory, row counts and cache counters of one stage run."""
+    __slots__ = ("name", "parent", "depth", "start", "wall", "cpu", "peak_mb", "rows_in", "rows_out", "cache_hits", "cache_misses", "running_peak")
+
+    COLUMNS = ["name", "parent", "depth", "start", "wall", "cpu", "peak_mb", "rows_in", "rows_out", "cache_hits", "cache_misses"]
+
+    def __init__(self, name: str, parent: str, depth: int, rows_in: int = None):
+        self.name = name
+        self.parent = parent
+        self.depth = depth
+        self.start = None
+        self.wall = None
+        self.cpu = None
+        self.peak_mb = None
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.running_peak = 0
+
+    def to_row(self) -> dict:
+        return {column: getattr(self, column) for column in __class__.COLUMNS}
+
+class Tracer:
+    """
+    Opt-in instrumentation of pipeline stages.
+
+    Stages are traced with Tracer.stage(...) blocks or the Tracer.traced(...)
+    decorator; both do nothing until Tracer.start() is called. Every stage
+    records wall and CPU time of this process, peak traced memory, rows in
+    and out and the cache hits and misses reported by the stores while it
+    was open. Nested stages are recorded too and add their counters to the
+    enclosing stage. One stage can also be profiled with cProfile or, when
+    installed, pyinstrument.
+
+    Stages are opened by the thread that called start(). Worker threads
+    report their cache counts to the stage open when their work was
+    submitted, through functions wrapped with Tracer.bind(...).
+    """
+    enabled = False
+    records = []
+    stack = []
+    lock = threading.Lock()
+    local = threading.local()
+    thread = None
+
+    profile_stage = None
+    profiler = "cprofile"
+    profile_folder = "cache/profiles"
+    profile_session = None
+
+    run_start = None
+
+    @staticmethod
+    def start(profile_stage: str = None, profiler: str = "cprofile", profile_folder: str = "cache/profiles"):
+        """Starts recording stages, with peak memory from tracemalloc."""
+        __class__.enabled = True
+        __class__.records = []
+        __class__.stack = []
+        __class__.profile_stage = profile_stage
+        __class__.profiler = profiler
+        __class__.profile_folder = profile_folder
+        __class__.profile_session = None
+        __class__.run_start = time.perf_counter()
+        __class__.thread = threading.get_ident()
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @staticmethod
+    def stop():
+        __class__.enabled = False
+
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @staticmethod
+    def stage(name: str, rows_in: int = None):
+        """Context manager recording one stage; set rows_out on the yielded record."""
+        if not __class__.enabled:
+            return _NullStage()
+
+        return _Stage(name, rows_in)
+
+    @staticmethod
+    def traced(name: str = None):
+        """Decorator recording each call as a stage, with rows from the first argument and the result."""
+        def decorator(function):
+            stage_name = name or function.__name__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not __class__.enabled:
+                    return function(*args, **kwargs)
+
+                with __class__.stage(stage_name, get_rows(args[0]) if args else None) as record:
+                    result = function(*args, **kwargs)
+                    record.rows_out = get_rows(result)
+
+                return result
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def bind(function):
+        """Wraps function for a worker thread, so its cache counts go to the stage open now."""
+        if not __class__.enabled:
+            return function
+
+        with __class__.lock:
+            record = __class__.stack[-1] if __class__.stack else None
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            __class__.local.record = record
+
+            try:
+                return function(*args, **kwargs)
+            finally:
+                __class__.local.record = None
+
+        return wrapper
+
+    @staticmethod
+    def count_cache(hit: bool, count: int = 1):
+        """Called by the stores for every lookup served from (hit) or missing in (miss) their cache."""
+        if not __class__.enabled:
+            return
+
+        with __class__.lock:
+            record = getattr(__class__.local, "record", None)
+
+            # Other threads only count through bind, as the open stage may not be theirs
+            if record is None and threading.get_ident() == __class__.thread and __class__.stack:
+                record = __class__.stack[-1]
+
+            if record is not None:
+                if hit:
+                    record.cache_hits += count
+                else:
+                    record.cache_misses += count
+
+    @staticmethod
+    def to_rows() -> list:
+        return [record.to_row() for record in __class__.records]
+
+    @staticmethod
+    def save(path: str):
+        """Writes the stages of the run as JSON or CSV, by the file extension."""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+
+        rows = __class__.to_rows()
+
+        if path.endswith(".csv"):
+            with open(path, "w", newline = "") as file:
+                writer = csv.DictWriter(file, fieldnames = StageRecord.COLUMNS)
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            with open(path, "w") as file:
+                json.dump(rows, file, indent = 2)
+
+    @staticmethod
+    def summary() -> str:
+        lines = [f"{'Stage':<32} {'Wall [s]':>9} {'CPU [s]':>8} {'Peak [MB]':>10} {'Rows in':>8} {'Rows out':>9} {'Cache':>9}"]
+
+        for record in __class__.records:
+            name = "  " * record.depth + record.name
+            rows_in = "" if record.rows_in is None else record.rows_in
+            rows_out = "" if record.rows_out is None else record.rows_out
+            cache = f"{record.cache_hits}/{record.cache_misses}" if record.cache_hits or record.cache_misses else ""
+
+            lines.append(f"{name:<32} {record.wall:>9.3f} {record.cpu:>8.3f} {record.peak_mb:>10.1f} {rows_in:>8} {rows_out:>9} {cache:>9}")
+
+        return "\n".join(lines)
+
+class _NullStage:
+    """Stage block used while tracing is off; accepts rows_out and records nothing."""
+    rows_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class _Stage:
+    def __init__(self, name: str, rows_in: int):
+        self.name = name
+        self.rows_in = rows_in
+        self.profiler = None
+
+    def __enter__(self) -> StageRecord:
+        with Tracer.lock:
+            parent = Tracer.stack[-1] if Tracer.stack else None
+            self.record = StageRecord(self.name, parent.name if parent else None, len(Tracer.stack), self.rows_in)
+
+            # The peak is reset for this stage, so the parent keeps the peak reached so far
+            if parent is not None:
+                parent.running_peak = max(parent.running_peak, tracemalloc.get_traced_memory()[1])
+
+            Tracer.records.append(self.record)
+            Tracer.stack.append(self.record)
+
+        # Recursive or nested calls of the profiled stage are covered by the outer profiler
+        if Tracer.profile_stage == self.name and not any(record.name == self.name for record in Tracer.stack[:-1]):
+            Tracer.profile_session = start_profiler(Tracer.profile_session, Tracer.profiler)
+            self.profiler = Tracer.profile_session
+
+        tracemalloc.reset_peak()
+        self.record.start = time.perf_counter() - Tracer.run_start
+        self.wall, self.cpu = time.perf_counter(), time.process_time()
+
+        return self.record
+
+    def __exit__(self, *exc):
+        record = self.record
+        record.wall = time.perf_counter() - self.wall
+        record.cpu = time.process_time() - self.cpu
+
+        peak = max(record.running_peak, tracemalloc.get_traced_memory()[1])
+        record.peak_mb = peak / 2 ** 20
+
+        if self.profiler is not None:
+            stop_profiler(self.profiler, Tracer.profiler, os.path.join(Tracer.profile_folder, self.name))
+
+        with Tracer.lock:
+            Tracer.stack.pop()
+
+            if Tracer.stack:
+                parent = Tracer.stack[-1]
+                parent.running_peak = max(parent.running_peak, peak)
+                parent.cache_hits += record.cache_hits
+                parent.cache_misses += record.cache_misses
+
+        return False
+
+def get_rows(value) -> int:
+    """Number of rows of a frame, array or collection, None for anything else."""
+    if isinstance(value, (str, bytes)):
+        return 1
+    if hasattr(value, "shape") and len(value.shape) > 0:
+        return value.shape[0]
+    if hasattr(value, "__len__"):
+        return len(value)
+
+    return None
+
+def start_profiler(session, profiler: str):
+    """Starts or resumes the profiler, so repeated calls of a stage add up in one profile."""
+    if session is None:
+        if profiler == "pyinstrument":
+            # Optional dependency, only needed when asked for
+            from pyinstrument import Profiler
+
+            session = Profiler()
+        else:
+            session = cProfile.Profile()
+
+    session.start() if profiler == "pyinstrument" else session.enable()
+    return session
+
+def stop_profiler(session, profiler: str, path: str):
+    """Pauses the profiler and writes everything profiled so far."""
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+
+    if profiler == "pyinstrument":
+        session.stop()
+
+        with open(path + ".html", "w") as file:
+            file.write(session.output_html())
+    else:
+        session.disable()
+        session.dump_stats(path + ".prof")
@@ -0,0 +1,6 @@
+"""
+Runs the pipeline from the repository root, e.g. python -m valuation grid.
+"""
+from shared.project import run
+
+run(__file__)
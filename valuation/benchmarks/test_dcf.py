@@ -0,0 +1,160 @@
+"""
+Parity check and benchmarks of the vectorized DCF.
+
+Checks DCF.value against the values cached in the workbooks: the Value
+sheet and every cell of the Sensitive sheet's data tables. A year by year
+reference of the Value sheet formulas checks the scenario grid, which is
+then timed against valuing one scenario at a time, with the Monte Carlo for
+a range of chunk sizes.
+"""
+import os
+import numpy as np
+import pytest
+from dataclasses import fields
+from config.config import WORKBOOKS, GRID, MONTE_CARLO_SHOCKS
+from data_ingestion.data_ingestion import DataIngestion
+from dcf.dcf import Companies, DCF
+from shared.benchmark_suite import SCALES
+
+FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Monte Carlo draws of 10x the workbook companies
+NUM_DRAWS = 100000
+CHUNK_SIZES = [1000, 10000, 100000]
+
+# Column input of each data table of the Sensitive sheet, top to bottom
+SENSITIVE_INPUTS = ["operating_margin", "sales_to_capital", "risk_free_rate"]
+
+def load_companies():
+    books = DataIngestion.read_workbooks([os.path.join(FOLDER, x) for x in WORKBOOKS])
+    return books, Companies.from_records([DataIngestion.get_company(sheets) for sheets in books.values()])
+
+def select(companies, index):
+    return Companies(**{x.name: getattr(companies, x.name)[index] for x in fields(companies)})
+
+def generate_companies(companies, num_companies, seed = 0):
+    """Copies of the workbook companies with their inputs scaled by up to 10%."""
+    rng = np.random.default_rng(seed)
+    index = np.arange(num_companies) % len(companies)
+    inputs = {}
+
+    for x in fields(companies):
+        values = getattr(companies, x.name)[index]
+
+        if x.name in ("ticker", "year", "maturity", "risk_free_rate"):
+            inputs[x.name] = values
+        else:
+            inputs[x.name] = values * rng.uniform(0.9, 1.1, num_companies)
+
+    inputs["ticker"] = np.array([f"{ticker}{i}" for i, ticker in enumerate(inputs["ticker"])])
+
+    return Companies(**inputs)
+
+def reference_value(company, scenario):
+    """Equity value of one company and scenario, computed as the Value and WACC sheets do."""
+    inputs = {name: scenario.get(name, company.get(name)) for name in DCF.SCENARIO_INPUTS if name in company}
+    rf = inputs["risk_free_rate"]
+    terminal_growth = scenario.get("terminal_growth", rf)
+    margin0 = scenario.get("operating_margin", company["ebit"] / company["revenue"])
+
+    kd = rf + company["spread"]
+    debt_value = sum(company["interest"] / (1 + kd) ** t for t in range(1, int(company["maturity"]) + 1))
+    debt_value += company["debt"] / (1 + kd) ** company["maturity"]
+
+    unlevered_beta = company["industry_beta"] / (1 + (1 - company["marginal_tax_rate"]) * company["industry_debt_to_equity"])
+    ke = rf + company["erp"] * unlevered_beta * (1 + (1 - company["marginal_tax_rate"]) * company["debt"] / company["market_cap"])
+    wd = debt_value / (company["market_cap"] + debt_value)
+
+    revenue, factor, enterprise_value = company["revenue"], 1.0, 0.0
+
+    for t in range(1, 11):
+        growth = inputs["initial_growth"] - (inputs["initial_growth"] - terminal_growth) * (t - 1) / 9
+        margin = margin0 - (margin0 - inputs["target_margin"]) * t / 10
+        tax = company["tax_rate"] - (company["tax_rate"] - inputs["target_tax_rate"]) * t / 10
+
+        wacc = scenario.get("wacc", (1 - wd) * ke + wd * kd * (1 - tax))
+        factor /= 1 + wacc
+
+        nopat = revenue * (1 + growth) * margin * (1 - tax)
+        enterprise_value += (nopat - revenue * growth / inputs["sales_to_capital"]) * factor
+        revenue *= 1 + growth
+
+    return_on_capital = company["ebit"] * (1 - company["tax_rate"]) / (company["revenue"] / inputs["sales_to_capital"])
+    enterprise_value += nopat * (1 - terminal_growth / return_on_capital) / (wacc - terminal_growth) * factor
+
+    return enterprise_value - debt_value + company["cash"]
+
+def test_value_sheets():
+    books, companies = load_companies()
+    values = DCF.value(companies)
+
+    for i, sheets in enumerate(books.values()):
+        value = DataIngestion.get_grid(sheets, "Value")
+        np.testing.assert_allclose(values["enterprise_value"][i], DataIngestion.get_right(value, "Total Value of Enterprise"), rtol = 1e-12)
+        np.testing.assert_allclose(values["equity_value"][i], DataIngestion.get_right(value, "Equity Value in Common Stock"), rtol = 1e-12)
+
+def test_data_tables():
+    """Data tables: initial growth down the rows, one input across the columns."""
+    books, companies = load_companies()
+    num_cells = 0
+
+    for i, sheets in enumerate(books.values()):
+        sensitive = DataIngestion.get_grid(sheets, "Sensitive")
+        rows, columns = np.nonzero(sensitive == "Initial Growth Rate")
+
+        for row, column, name in zip(rows, columns, SENSITIVE_INPUTS):
+            growth = sensitive[row:row + 9, column + 1].astype(float)
+            axis = sensitive[row - 1, column + 2:column + 12].astype(float)
+            table = sensitive[row:row + 9, column + 2:column + 12]
+
+            # The first column holds the table formula, without a cached value
+            cached = np.array([[isinstance(x, float) and not np.isnan(x) for x in line] for line in table])
+            result = DCF.grid(select(companies, [i]), initial_growth = growth, **{name: axis})["equity_value"][0]
+
+            np.testing.assert_allclose(result[cached], table[cached].astype(float), rtol = 1e-12)
+            num_cells += cached.sum()
+
+    assert num_cells > 0
+
+def test_grid():
+    """The configured grid against the year by year reference, on a corner of each axis."""
+    _, companies = load_companies()
+    axes = {name: values[::4] for name, values in GRID.items()}
+    result = DCF.grid(companies, **axes)["equity_value"]
+
+    for i in range(len(companies)):
+        company = {x.name: getattr(companies, x.name)[i] for x in fields(companies)}
+
+        for point in np.ndindex(result.shape[1:]):
+            scenario = {name: axes[name][j] for name, j in zip(axes, point)}
+            np.testing.assert_allclose(result[(i,) + point], reference_value(company, scenario), rtol = 1e-10)
+
+def value_loop(companies):
+    """One call per grid point, as a data table recomputes the sheet for every cell."""
+    for point in np.ndindex(*[len(x) for x in GRID.values()]):
+        DCF.value(companies, **{name: values[i] for name, values, i in zip(GRID, GRID.values(), point)})
+
+@pytest.fixture(scope = "module")
+def companies():
+    return load_companies()[1]
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_value_loop(benchmark, companies, scale):
+    sample = generate_companies(companies, len(companies) * scale)
+    benchmark.group = f"grid {scale}x"
+
+    benchmark.pedantic(value_loop, args = (sample,), rounds = 3)
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_value_grid(benchmark, companies, scale):
+    sample = generate_companies(companies, len(companies) * scale)
+    benchmark.group = f"grid {scale}x"
+
+    benchmark(DCF.grid, sample, **GRID)
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_monte_carlo(benchmark, companies, chunk_size):
+    sample = generate_companies(companies, len(companies) * 10)
+    benchmark.group = f"Monte Carlo of {NUM_DRAWS} draws"
+
+    benchmark.pedantic(DCF.simulate, args = (sample, MONTE_CARLO_SHOCKS, NUM_DRAWS), kwargs = {"chunk_size": chunk_size}, rounds = 1)
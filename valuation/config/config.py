@@ -0,0 +1,24 @@
+import numpy as np
+
+# Valuation workbooks, one company each
+WORKBOOKS = ["3M.xlsx", "ATT.xlsx", "Delta.xlsx"]
+
+# Scenario grid of the "grid" stage: every company is valued at every
+# combination of cost of capital, terminal growth and target EBIT margin
+GRID = {
+    "wacc": np.round(np.arange(0.06, 0.1201, 0.005), 4),
+    "terminal_growth": np.round(np.arange(0.01, 0.0401, 0.0025), 4),
+    "target_margin": np.round(np.arange(0.05, 0.3001, 0.025), 4)
+}
+
+# Monte Carlo of the "montecarlo" stage: standard deviations of the normal
+# shocks added to each company's inputs. Draws are valued CHUNK_SIZE at a time.
+MONTE_CARLO_SHOCKS = {
+    "initial_growth": 0.02,
+    "target_margin": 0.02,
+    "sales_to_capital": 0.05,
+    "risk_free_rate": 0.005
+}
+NUM_DRAWS = 100000
+CHUNK_SIZE = 10000
+SEED = 42
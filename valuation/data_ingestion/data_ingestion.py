@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from shared.excel_store import ExcelStore
+from shared.tracer import Tracer
+
+class DataIngestion:
+    excel_store = ExcelStore()
+
+    @staticmethod
+    @Tracer.traced()
+    def read_workbooks(paths: list, processes: int = None) -> dict:
+        """Reads every sheet of many workbooks, by path, parsing those not in the store in parallel."""
+        return __class__.excel_store.read_many(paths, None, processes)
+
+    @staticmethod
+    def get_company(sheets: dict) -> dict:
+        """
+        Inputs of one valuation workbook. Cells are found by their labels, as
+        the rows move between workbooks with the number of regions and the
+        length of the debt schedule.
+        """
+        wacc = __class__.get_grid(sheets, "WACC")
+        value = __class__.get_grid(sheets, "Value")
+        sensitive = __class__.get_grid(sheets, "Sensitive")
+
+        # Rows of the Value sheet, from time 0 to time 10
+        margin = __class__.get_row(value, "EBIT Margin")
+        tax_rate = __class__.get_row(value, "Tax Rate")
+
+        return {
+            "ticker": __class__.get_below(wacc, "Ticker"),
+            "year": int(__class__.get_sheet(sheets, "Value").columns[1]),
+            "revenue": float(__class__.get_row(value, "Revenue")[0]),
+            "ebit": float(__class__.get_row(value, "Adjusted EBIT")[0]),
+            "tax_rate": float(tax_rate[0]),
+            "target_tax_rate": float(tax_rate[10]),
+            "target_margin": float(margin[10]),
+            "initial_growth": float(__class__.get_row(value, "Revenue Growth")[1]),
+            "sales_to_capital": float(__class__.get_row(value, "Sales To Capital")[0]),
+            "risk_free_rate": __class__.get_right(sensitive, "Risk-Free Rate"),
+            "erp": __class__.get_right(wacc, "ERP"),
+            "marginal_tax_rate": __class__.get_right(wacc, "Tax Rate"),
+            "industry_beta": __class__.get_right(wacc, "Levered Beta for Industry"),
+            "industry_debt_to_equity": __class__.get_right(wacc, "Debt-To-Equity For Industry"),
+            "market_cap": __class__.get_below(wacc, "Market Cap"),
+            "debt": __class__.get_below(wacc, "Total Debt"),
+            "spread": __class__.get_below(wacc, "Spread"),
+            "interest": __class__.get_below(wacc, "Interest Expense"),
+            "maturity": __class__.get_schedule_length(wacc, "Time"),
+            "cash": __class__.get_right(value, "Cash"),
+            "shares": __class__.get_right(value, "Shares Outstanding")
+        }
+
+    @staticmethod
+    def get_sheet(sheets: dict, name: str) -> pd.DataFrame:
+        # Sheet names differ in case between workbooks, e.g. Sales-To-Capital
+        for sheet_name, df in sheets.items():
+            if sheet_name.lower() == name.lower():
+                return df
+
+        raise ValueError(f"Worksheet named '{name}' not found")
+
+    @staticmethod
+    def get_grid(sheets: dict, name: str) -> np.ndarray:
+        """The cells of a sheet, header row included, with text labels stripped."""
+        df = __class__.get_sheet(sheets, name)
+        grid = np.vstack([np.array(df.columns, dtype = object), df.to_numpy(dtype = object)])
+        return np.vectorize(lambda x: x.strip() if isinstance(x, str) else x, otypes = [object])(grid)
+
+    @staticmethod
+    def find(grid: np.ndarray, label: str) -> tuple:
+        rows, columns = np.nonzero(grid == label)
+
+        if len(rows) == 0:
+            raise ValueError(f"Label '{label}' not found")
+
+        return rows[0], columns[0]
+
+    @staticmethod
+    def get_right(grid: np.ndarray, label: str) -> float:
+        row, column = __class__.find(grid, label)
+        return float(grid[row, column + 1])
+
+    @staticmethod
+    def get_below(grid: np.ndarray, label: str):
+        row, column = __class__.find(grid, label)
+        value = grid[row + 1, column]
+
+        return value if isinstance(value, str) else float(value)
+
+    @staticmethod
+    def get_row(grid: np.ndarray, label: str) -> np.ndarray:
+        """Values of a Value sheet row from time 0 to time 10."""
+        row, column = __class__.find(grid, label)
+        return pd.to_numeric(pd.Series(grid[row, column + 1:column + 12]), errors = "coerce").to_numpy()
+
+    @staticmethod
+    def get_schedule_length(grid: np.ndarray, label: str) -> int:
+        """Number of periods of the debt schedule below its Time header."""
+        row, column = __class__.find(grid, label)
+        values = pd.to_numeric(pd.Series(grid[row + 1:, column]), errors = "coerce").to_numpy()
+
+        return int(np.argmax(np.isnan(values))) if np.isnan(values).any() else len(values)
@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, fields
+
+@dataclass
+class Companies:
+    """Valuation inputs of many companies, one array entry per company."""
+    ticker: np.ndarray
+    year: np.ndarray
+    revenue: np.ndarray
+    ebit: np.ndarray
+    tax_rate: np.ndarray
+    target_tax_rate: np.ndarray
+    target_margin: np.ndarray
+    initial_growth: np.ndarray
+    sales_to_capital: np.ndarray
+    risk_free_rate: np.ndarray
+    erp: np.ndarray
+    marginal_tax_rate: np.ndarray
+    industry_beta: np.ndarray
+    industry_debt_to_equity: np.ndarray
+    market_cap: np.ndarray
+    debt: np.ndarray
+    spread: np.ndarray
+    interest: np.ndarray
+    maturity: np.ndarray
+    cash: np.ndarray
+    shares: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ticker)
+
+    @staticmethod
+    def from_records(records: list) -> "Companies":
+        """Companies from one dict of inputs per company, as DataIngestion.get_company returns."""
+        return Companies(**{x.name: np.array([record[x.name] for record in records]) for x in fields(Companies)})
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({x.name: getattr(self, x.name) for x in fields(self)}).set_index("ticker")
+
+class DCF:
+    """
+    Free cash flow to the firm valuation of the valuation/ workbooks, for many
+    companies and scenarios at once.
+
+    Each year follows the Value sheet: revenue growth fades linearly from the
+    initial growth to the terminal growth (the risk-free rate unless given),
+    and EBIT margin and tax rate move linearly to their targets over ten
+    years. Reinvestment is the revenue change over sales to capital, and the
+    terminal reinvestment rate is the terminal growth over the base return on
+    capital. The cost of capital comes from the WACC sheet: the industry beta
+    relevered at the company's debt to equity, and debt at the market value of
+    its interest and principal schedule.
+
+    Scenario inputs are arrays broadcast against the company axis, so one call
+    values every company under every scenario with the years as the last axis.
+    """
+    YEARS = 10
+
+    # Inputs a scenario can set; 'operating_margin' is the margin the path starts
+    # from (EBIT over revenue unless given) and 'wacc' replaces the cost of
+    # capital of every year
+    SCENARIO_INPUTS = ['initial_growth', 'operating_margin', 'target_margin', 'target_tax_rate', 'sales_to_capital', 'risk_free_rate', 'terminal_growth', 'wacc']
+
+    @staticmethod
+    def value(companies: Companies, per_company: bool = False, **scenario) -> dict:
+        """
+        Values every company under the scenario inputs, which broadcast
+        together to a scenario shape S, or to (companies, *S) with per_company
+        for inputs given per company. Returns arrays of shape (companies, *S).
+        """
+        for name in scenario:
+            if name not in __class__.SCENARIO_INPUTS:
+                raise ValueError(f"Unknown scenario input: {name}")
+
+        scenario = {name: np.asarray(x, dtype = float) for name, x in scenario.items()}
+        ndim = max([x.ndim for x in scenario.values()], default = 0) - int(per_company)
+
+        # Company inputs along the first axis, scenario axes after it
+        def get(name):
+            if name in scenario:
+                return scenario[name]
+
+            return getattr(companies, name).astype(float).reshape((-1,) + (1,) * ndim)
+
+        revenue, ebit, tax_rate, sales_to_capital = get('revenue'), get('ebit'), get('tax_rate'), get('sales_to_capital')
+        risk_free_rate = get('risk_free_rate')
+        terminal_growth = scenario.get('terminal_growth', risk_free_rate)
+
+        # Years 1 to 10 on the last axis
+        t = np.arange(1, __class__.YEARS + 1)
+        e = lambda x: np.asarray(x)[..., None]
+
+        growth = e(get('initial_growth')) - (e(get('initial_growth')) - e(terminal_growth)) * (t - 1) / (__class__.YEARS - 1)
+        revenues = e(revenue) * np.cumprod(1 + growth, axis = -1)
+
+        operating_margin = scenario.get('operating_margin', ebit / revenue)
+        margin = e(operating_margin) - (e(operating_margin) - e(get('target_margin'))) * t / __class__.YEARS
+        taxes = e(tax_rate) - (e(tax_rate) - e(get('target_tax_rate'))) * t / __class__.YEARS
+
+        nopat = revenues * margin * (1 - taxes)
+        reinvestment = np.diff(revenues, axis = -1, prepend = np.broadcast_to(e(revenue), revenues.shape[:-1] + (1,))) / e(sales_to_capital)
+        fcff = nopat - reinvestment
+
+        debt_value = __class__.get_debt_value(companies, risk_free_rate, ndim)
+
+        if 'wacc' in scenario:
+            wacc = e(scenario['wacc'])
+        else:
+            wacc = __class__.get_wacc(companies, risk_free_rate, debt_value, taxes, ndim)
+
+        discount = (1 + wacc) ** -t
+
+        # Terminal year: the year 10 NOPAT less reinvestment at the base return on capital
+        return_on_capital = ebit * (1 - tax_rate) / (revenue / sales_to_capital)
+        terminal_fcff = nopat[..., -1] * (1 - terminal_growth / return_on_capital)
+        terminal_value = terminal_fcff / (wacc[..., -1] - terminal_growth) * discount[..., -1]
+
+        enterprise_value = (fcff * discount).sum(axis = -1) + terminal_value
+        equity_value = enterprise_value - debt_value + get('cash')
+
+        shape = np.broadcast_shapes(enterprise_value.shape, equity_value.shape)
+
+        return {
+            'enterprise_value': np.broadcast_to(enterprise_value, shape),
+            'equity_value': np.broadcast_to(equity_value, shape),
+            'value_per_share': np.broadcast_to(equity_value / get('shares'), shape)
+        }
+
+    @staticmethod
+    def get_debt_value(companies: Companies, risk_free_rate, ndim: int) -> np.ndarray:
+        """Market value of debt: interest for each year of the schedule and the principal in its last year."""
+        reshape = lambda x: getattr(companies, x).astype(float).reshape((-1,) + (1,) * ndim)
+        cost_of_debt = risk_free_rate + reshape('spread')
+        maturity = reshape('maturity')
+
+        annuity = (1 - (1 + cost_of_debt) ** -maturity) / cost_of_debt
+        return reshape('interest') * annuity + reshape('debt') * (1 + cost_of_debt) ** -maturity
+
+    @staticmethod
+    def get_wacc(companies: Companies, risk_free_rate, debt_value, taxes: np.ndarray, ndim: int) -> np.ndarray:
+        """Cost of capital of every year, with the after-tax cost of debt at that year's tax rate."""
+        reshape = lambda x: getattr(companies, x).astype(float).reshape((-1,) + (1,) * ndim)
+        marginal_tax_rate = reshape('marginal_tax_rate')
+
+        unlevered_beta = reshape('industry_beta') / (1 + (1 - marginal_tax_rate) * reshape('industry_debt_to_equity'))
+        levered_beta = unlevered_beta * (1 + (1 - marginal_tax_rate) * reshape('debt') / reshape('market_cap'))
+        cost_of_equity = risk_free_rate + reshape('erp') * levered_beta
+
+        cost_of_debt = risk_free_rate + reshape('spread')
+        debt_weight = debt_value / (reshape('market_cap') + debt_value)
+
+        e = lambda x: np.asarray(x)[..., None]
+        return e((1 - debt_weight) * cost_of_equity) + e(debt_weight * cost_of_debt) * (1 - taxes)
+
+    @staticmethod
+    def grid(companies: Companies, **axes) -> dict:
+        """
+        Values every company on the full grid of the given inputs, e.g.
+        wacc, terminal_growth and target_margin. Each input is one axis, so
+        the arrays returned have shape (companies, len(axis 1), len(axis 2), ...).
+        """
+        scenario = {}
+
+        for i, (name, values) in enumerate(axes.items()):
+            shape = [1] * len(axes)
+            shape[i] = len(values)
+            scenario[name] = np.asarray(values, dtype = float).reshape(shape)
+
+        return __class__.value(companies, **scenario)
+
+    @staticmethod
+    def grid_to_frame(companies: Companies, axes: dict, values: np.ndarray, name: str = 'value_per_share') -> pd.DataFrame:
+        """One row per company and grid point."""
+        index = pd.MultiIndex.from_product([companies.ticker] + [np.asarray(x) for x in axes.values()], names = ['ticker'] + list(axes))
+        return pd.DataFrame({name: values.ravel()}, index = index).reset_index()
+
+    @staticmethod
+    def simulate(companies: Companies, shocks: dict, num_draws: int, chunk_size: int = 1000, seed: int = 0, output: str = 'value_per_share') -> np.ndarray:
+        """
+        Monte Carlo values of every company, shape (companies, num_draws).
+        Each shocked input is drawn as its company value plus a normal shock
+        with the given standard deviation. Draws are valued chunk_size at a
+        time, so memory grows with the chunk and not with num_draws.
+        """
+        rng = np.random.default_rng(seed)
+        values = np.empty((len(companies), num_draws))
+
+        for start in range(0, num_draws, chunk_size):
+            size = min(chunk_size, num_draws - start)
+
+            scenario = {}
+
+            for name, stdev in shocks.items():
+                scenario[name] = __class__.get_base(companies, name)[:, None] + rng.normal(0.0, stdev, (len(companies), size))
+
+            values[:, start:start + size] = __class__.value(companies, per_company = True, **scenario)[output]
+
+        return values
+
+    @staticmethod
+    def get_base(companies: Companies, name: str) -> np.ndarray:
+        """Company values of a scenario input when the scenario does not set it."""
+        if name == 'terminal_growth':
+            return companies.risk_free_rate.astype(float)
+        elif name == 'operating_margin':
+            return companies.ebit.astype(float) / companies.revenue.astype(float)
+        elif name == 'wacc':
+            raise ValueError("The cost of capital varies by year and has no single company value to shock")
+
+        return getattr(companies, name).astype(float)
+
+    @staticmethod
+    def summarize(companies: Companies, values: np.ndarray, percentiles: tuple = (5, 25, 50, 75, 95)) -> pd.DataFrame:
+        """Mean, standard deviation and percentiles of the simulated values of each company."""
+        summary = pd.DataFrame({'Mean': np.nanmean(values, axis = 1), 'Std': np.nanstd(values, axis = 1)}, index = pd.Index(companies.ticker, name = 'ticker'))
+
+        for p, column in zip(percentiles, np.nanpercentile(values, percentiles, axis = 1)):
+            summary[f'P{p}'] = column
+
+        return summary
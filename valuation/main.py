@@ -0,0 +1,99 @@
+import argparse
+import os
+from shared.project import resolve_path
+from shared.tracer import Tracer
+
+# Stages that can be run on their own; "value" values every workbook at its own
+# inputs, "grid" on the GRID of config.py and "montecarlo" under MONTE_CARLO_SHOCKS.
+STAGES = ["value", "grid", "montecarlo", "all"]
+
+@Tracer.traced()
+def load_companies():
+    from config.config import WORKBOOKS
+    from data_ingestion.data_ingestion import DataIngestion
+    from dcf.dcf import Companies
+
+    ###########
+    # Step 1: Read the inputs of every workbook
+    ###########
+    books = DataIngestion.read_workbooks(WORKBOOKS)
+
+    return Companies.from_records([DataIngestion.get_company(sheets) for sheets in books.values()])
+
+@Tracer.traced()
+def value(companies):
+    import pandas as pd
+    from dcf.dcf import DCF
+
+    ###########
+    # Step 2: Value every company at the inputs of its workbook
+    ###########
+    df = pd.DataFrame(DCF.value(companies), index = pd.Index(companies.ticker, name = "ticker"))
+    df.to_excel('output/Value.xlsx')
+
+    print(df)
+
+@Tracer.traced()
+def grid(companies):
+    from config.config import GRID
+    from dcf.dcf import DCF
+
+    ###########
+    # Step 3: Value every company on the full scenario grid at once
+    ###########
+    values = DCF.grid(companies, **GRID)
+    df = DCF.grid_to_frame(companies, GRID, values['value_per_share'])
+
+    df.to_csv('output/Grid.csv', index = False)
+
+@Tracer.traced()
+def montecarlo(companies):
+    from config.config import MONTE_CARLO_SHOCKS, NUM_DRAWS, CHUNK_SIZE, SEED
+    from dcf.dcf import DCF
+
+    ###########
+    # Step 4: Simulate the value per share of every company
+    ###########
+    values = DCF.simulate(companies, MONTE_CARLO_SHOCKS, NUM_DRAWS, chunk_size = CHUNK_SIZE, seed = SEED)
+    df = DCF.summarize(companies, values)
+
+    df.to_excel('output/Monte_Carlo.xlsx')
+
+    print(df)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Valuation: DCF of the company workbooks")
+    parser.add_argument("stage", nargs = "?", default = "all", choices = STAGES, help = "stage to run (default: all)")
+    parser.add_argument("--trace", type = resolve_path, help = "write the stage timings to this .json or .csv file")
+    parser.add_argument("--profile", metavar = "STAGE", help = "profile one traced stage: run or a stage function")
+    parser.add_argument("--profiler", default = "cprofile", choices = ["cprofile", "pyinstrument"])
+    args = parser.parse_args(argv)
+
+    if args.trace or args.profile:
+        Tracer.start(args.profile, args.profiler)
+
+    with Tracer.stage("run"):
+        run(args.stage)
+
+    if args.trace:
+        Tracer.save(args.trace)
+        print("\n" + Tracer.summary())
+
+def run(stage):
+    import os
+
+    os.makedirs("output", exist_ok = True)
+
+    companies = load_companies()
+
+    if stage in ("value", "all"):
+        value(companies)
+
+    if stage in ("grid", "all"):
+        grid(companies)
+
+    if stage in ("montecarlo", "all"):
+        montecarlo(companies)
+
+if __name__ == "__main__":
+    main()